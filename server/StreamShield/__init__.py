@@ -1,3 +1,9 @@
-from .media_processor import MediaProcessor
+__all__ = ["MediaProcessor"]
 
-__all__ = ["MediaProcessor"]
\ No newline at end of file
+
+def __getattr__(name):
+    # Imported on first use so helpers like config and metrics load without the model dependencies
+    if name == "MediaProcessor":
+        from .media_processor import MediaProcessor
+        return MediaProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,27 @@
 import os
 import json
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
-import shutil
+import asyncio
+import functools
+import time
+import uuid
+from fastapi import FastAPI, File, Form, Header, Request, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
-from typing import Literal, Optional
+from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional, Tuple
 import logging
 
-from .media_processor import MediaProcessor
+from . import config
+from .batch import JOURNAL_NAME, Batch, BatchJournal, BatchRunner, collect
+from .file_serving import file_response, follow_response
+from .job_queue import PROFILE_FORMATS, Job, JobQueue, QueueFullError
+from .metrics import metrics
+from .model_registry import model_registry
+from .result_cache import result_cache
+from .uploads import ChecksumMismatchError, UploadError, UploadSession, UploadStore
 from .virtual_camera_service import virtual_camera_service
+from .workspace import DiskQuotaError, Workspace
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,11 +35,65 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Default paths
 MODEL_PATH = os.path.join(CURRENT_DIR, "best.pt")
 DEFAULT_BADWORDS_PATH = os.path.join(CURRENT_DIR, "static", "badwords.txt")
+VOSK_MODEL_PATH = os.path.join(CURRENT_DIR, "vosk-model-small-en-in-0.4")
 
 # Create uploads directory if it doesn't exist
 UPLOAD_DIR = Path(CURRENT_DIR) / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Media processing runs in a bounded pool of worker processes
+job_queue = JobQueue(MODEL_PATH, VOSK_MODEL_PATH, config.JOB_WORKERS, config.JOB_QUEUE_DEPTH)
+
+# Batches of server-side files, run on their own lower-priority worker pool
+# (started on the first batch) so they never take job queue capacity
+batch_runner = BatchRunner(MODEL_PATH, VOSK_MODEL_PATH, DEFAULT_BADWORDS_PATH,
+                           workers=config.BATCH_WORKERS, nice=config.BATCH_NICE)
+batches: Dict[str, Batch] = {}
+
+# Resumable chunked uploads, each in its own workspace under UPLOAD_DIR
+upload_store = UploadStore(str(UPLOAD_DIR))
+
+metrics.counter("streamshield_upload_bytes_total", "Bytes of uploaded media stored, by upload kind")
+metrics.histogram("streamshield_upload_seconds", "Time to store an uploaded file or chunk, by upload kind")
+metrics.gauge("streamshield_jobs_active", "Jobs queued or running", job_queue.active)
+metrics.gauge("streamshield_batch_items_active", "Batch items queued or running", batch_runner.active)
+
+@app.on_event("startup")
+async def start_job_queue():
+    """Start the job workers, which load and warm up the models, before serving requests."""
+    job_queue.start()
+    logger.info(f"Job queue started with {job_queue.workers} workers")
+    restored = upload_store.restore()
+    if restored:
+        logger.info(f"Restored {restored} unfinished uploads")
+    app.state.reaper = asyncio.create_task(reap_expired())
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    app.state.reaper.cancel()
+    for batch in batches.values():
+        batch.cancel()
+    batch_runner.shutdown()
+    job_queue.shutdown()
+
+async def reap_expired():
+    """Periodically delete retained results and abandoned uploads past their TTL."""
+    while True:
+        await asyncio.sleep(config.REAP_INTERVAL_SECONDS)
+        try:
+            for job in job_queue.reap(config.RESULT_TTL_SECONDS):
+                logger.info(f"Result of job {job.job_id} expired")
+                await run_in_threadpool(job.workspace.cleanup)
+            for session in upload_store.reap(config.UPLOAD_TTL_SECONDS):
+                logger.info(f"Upload {session.upload_id} expired")
+                await run_in_threadpool(session.workspace.cleanup)
+            now = time.time()
+            for batch_id, batch in list(batches.items()):
+                if batch.finished_at and now - batch.finished_at > config.RESULT_TTL_SECONDS:
+                    del batches[batch_id]
+        except Exception as e:
+            logger.error(f"Error reaping expired results: {e}")
+
 def cleanup_files(*files):
     """Clean up temporary files."""
     for file in files:
@@ -37,87 +104,358 @@ def cleanup_files(*files):
         except Exception as e:
             logger.error(f"Error cleaning up file {file}: {e}")
 
+def save_upload(file: UploadFile, workspace: Workspace) -> Tuple[str, str]:
+    """Save the uploaded media into the job workspace."""
+    filename = os.path.basename(file.filename or "") or "upload"
+    input_path = workspace.file(f"input_{filename}")
+    output_path = workspace.file(f"output_{filename}")
+
+    # Save uploaded media file
+    try:
+        start = time.perf_counter()
+        workspace.copy_into(file.file, os.path.basename(input_path))
+        metrics.observe("streamshield_upload_seconds", time.perf_counter() - start, kind="file")
+        metrics.inc("streamshield_upload_bytes_total", os.path.getsize(input_path), kind="file")
+        logger.info(f"File saved to {input_path}")
+    except DiskQuotaError as e:
+        logger.error(f"Error saving file: {e}")
+        raise HTTPException(status_code=507, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error saving file: {e}")
+        raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
+
+    return input_path, output_path
+
+def parse_bad_words(badWords: Optional[str]) -> Optional[List[str]]:
+    """Parse the optional JSON list of custom bad words and phrases."""
+    if not badWords:
+        return None
+    try:
+        bad_words_list = json.loads(badWords)  # Parse JSON string to list
+        if not isinstance(bad_words_list, list) or not all(isinstance(w, str) for w in bad_words_list):
+            raise ValueError("badWords must be a JSON list of strings")
+        return bad_words_list
+    except Exception as e:
+        logger.error(f"Error parsing custom bad words: {e}")
+        raise HTTPException(status_code=500, detail=f"Error parsing bad words: {str(e)}")
+
+def enqueue_job(job_id: str, input_path: str, output_path: str, workspace: Workspace, processOption: str,
+                bad_words: Optional[List[str]], filename: str, content_type: Optional[str],
+                profile: bool = False) -> Job:
+    """Queue a file that is already in ``workspace`` and clean up after the job."""
+    try:
+        job = job_queue.submit(input_path, output_path, processOption, DEFAULT_BADWORDS_PATH,
+                               bad_words=bad_words, job_id=job_id, profile=profile)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    job.content_type = content_type
+    job.filename = filename
+    job.workspace = workspace
+
+    def on_done(future):
+        # Failed and cancelled jobs have nothing to download
+        if future.cancelled() or future.exception() is not None:
+            workspace.cleanup()
+        else:
+            # The input is no longer needed once the worker is done with it
+            cleanup_files(input_path)
+
+    job.future.add_done_callback(on_done)
+    return job
+
+async def submit_job(file: UploadFile, badWords: Optional[str], processOption: str, profile: bool = False) -> Job:
+    """Save the upload into a fresh workspace and queue it on the job queue."""
+    logger.info(f"Received file: {file.filename} with option: {processOption}")
+    if badWords:
+        logger.info(f"Received custom bad words: {badWords}")
+    # Custom lists go straight to the worker, which caches the compiled matcher
+    bad_words = parse_bad_words(badWords)
+
+    job_id = uuid.uuid4().hex
+    workspace = Workspace(prefix=f"job-{job_id}-", root=str(UPLOAD_DIR))
+    try:
+        input_path, output_path = await run_in_threadpool(save_upload, file, workspace)
+        return enqueue_job(job_id, input_path, output_path, workspace, processOption, bad_words,
+                           file.filename, file.content_type, profile)
+    except BaseException:
+        workspace.cleanup()
+        raise
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+def job_file_response(request: Request, job_id: str, follow: bool = False) -> Response:
+    """Serve a job's retained output with Range and ETag support.
+
+    The output stays available for RESULT_TTL_SECONDS after its last
+    download. The job is pinned while a response streams, so the reaper
+    never deletes a file that is being sent.
+    """
+    job = job_queue.acquire(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    release = functools.partial(job_queue.release, job)
+    try:
+        state = job_queue.status(job)["status"]
+        filename = f"processed_{job.filename}"
+        if follow and state in ("queued", "running") and config.FRAGMENTED_MP4:
+            # Fragmented MP4 is playable while the tail is still being encoded
+            return follow_response(job.output_path, job.future.done, job.content_type, filename, release)
+        if state != "completed":
+            raise HTTPException(status_code=409, detail=f"Job is {state}")
+        if not Path(job.output_path).exists():
+            raise HTTPException(status_code=500, detail="Processing completed but output file not found")
+        return file_response(request, job.output_path, job.content_type, filename, release)
+    except BaseException:
+        release()
+        raise
+
 @app.post("/process-media")
 async def process_media(
-    background_tasks: BackgroundTasks,
+    request: Request,
     file: UploadFile = File(...),
     badWords: Optional[str] = Form(default=None),  # JSON string of bad words
-    processOption: Literal['blur', 'beep_video', 'beep_audio'] = Form(...)
+    processOption: Literal['blur', 'beep_video', 'beep_audio'] = Form(...),
+    profile: bool = Form(default=False)
 ):
+    """Process a file and return the result once it is done."""
+    job = await submit_job(file, badWords, processOption, profile)
     try:
-        logger.info(f"Received file: {file.filename} with option: {processOption}")
-        if badWords:
-            logger.info(f"Received custom bad words: {badWords}")
-        
-        # Generate unique filenames
-        input_path = UPLOAD_DIR / f"input_{file.filename}"
-        output_path = UPLOAD_DIR / f"output_{file.filename}"
-        custom_badwords_path = None
-        
-        # Save uploaded media file
-        try:
-            with open(input_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            logger.info(f"File saved to {input_path}")
-        except Exception as e:
-            logger.error(f"Error saving file: {e}")
-            raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
-        
-        # Create a custom badwords file if badWords is provided
-        if badWords:
-            custom_badwords_path = UPLOAD_DIR / f"badwords_{file.filename}.txt"
-            try:
-                bad_words_list = json.loads(badWords)  # Parse JSON string to list
-                with open(custom_badwords_path, "w") as f:
-                    f.write("\n".join(bad_words_list))  # Write words, one per line
-                logger.info(f"Custom badwords file created at {custom_badwords_path}")
-            except Exception as e:
-                logger.error(f"Error creating custom badwords file: {e}")
-                cleanup_files(str(input_path))
-                raise HTTPException(status_code=500, detail=f"Error creating badwords file: {str(e)}")
-        
-        try:
-            # Determine which badwords file to use
-            badwords_path = str(custom_badwords_path) if custom_badwords_path else DEFAULT_BADWORDS_PATH
-            logger.info(f"Using badwords file: {badwords_path}")
-            
-            # Initialize MediaProcessor with the selected badwords_path
-            processor = MediaProcessor(MODEL_PATH, badwords_path)
-            
-            # Process the media file
-            processor.process_media(str(input_path), str(output_path), processOption)
-            logger.info(f"File processed successfully: {output_path}")
-            
-            # Check if output file exists
-            if not output_path.exists():
-                raise HTTPException(status_code=500, detail="Processing completed but output file not found")
-            
-            # Schedule cleanup after response is sent
-            files_to_cleanup = [str(input_path), str(output_path)]
-            if custom_badwords_path:
-                files_to_cleanup.append(str(custom_badwords_path))
-            background_tasks.add_task(cleanup_files, *files_to_cleanup)
-            
-            # Return the processed file
-            return FileResponse(
-                path=output_path,
-                media_type=file.content_type,
-                filename=f"processed_{file.filename}",
-                headers={"Content-Disposition": f"attachment; filename=processed_{file.filename}"}
-            )
-        
-        except Exception as e:
-            logger.error(f"Error processing file: {e}")
-            # Clean up files if processing fails
-            files_to_cleanup = [str(input_path)]
-            if custom_badwords_path:
-                files_to_cleanup.append(str(custom_badwords_path))
-            cleanup_files(*files_to_cleanup)
-            raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
-            
+        # Wait on the worker without blocking the event loop
+        await asyncio.wrap_future(job.future)
+        logger.info(f"File processed successfully: {job.output_path}")
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+        logger.error(f"Error processing file: {e}")
+        job_queue.remove(job.job_id)
+        job.workspace.cleanup()
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    return job_file_response(request, job.job_id)
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    badWords: Optional[str] = Form(default=None),  # JSON string of bad words
+    processOption: Literal['blur', 'beep_video', 'beep_audio'] = Form(...),
+    profile: bool = Form(default=False)
+):
+    """Queue a file for processing and return its job id immediately"""
+    job = await submit_job(file, badWords, processOption, profile)
+    return job_queue.status(job)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll the status and progress of a job"""
+    return job_queue.status(get_job_or_404(job_id))
+
+@app.api_route("/jobs/{job_id}/result", methods=["GET", "HEAD"])
+async def get_job_result(job_id: str, request: Request, follow: bool = False):
+    """Download the output of a completed job, resumable with Range requests"""
+    return job_file_response(request, job_id, follow)
+
+@app.get("/jobs/{job_id}/profile")
+async def get_job_profile(job_id: str, request: Request, format: Literal['folded', 'pstats'] = 'folded'):
+    """Download a profiled job's stage stacks (flame graph input) or cProfile dump"""
+    # Pinned like result downloads so the reaper keeps the workspace while the file streams
+    job = job_queue.acquire(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    release = functools.partial(job_queue.release, job)
+    try:
+        if job.profile_path is None:
+            raise HTTPException(status_code=404, detail="Job was not profiled")
+        path = job.profile_path + PROFILE_FORMATS[format]
+        if not os.path.exists(path):
+            raise HTTPException(status_code=409, detail=f"Job is {job_queue.status(job)['status']}")
+        return file_response(request, path, "text/plain" if format == "folded" else "application/octet-stream",
+                             os.path.basename(path), release)
+    except BaseException:
+        release()
+        raise
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job, or discard a finished job's result"""
+    job = get_job_or_404(job_id)
+    if job_queue.cancel(job_id):
+        return job_queue.status(job)
+    if job.downloads:
+        raise HTTPException(status_code=409, detail="Result is being downloaded")
+    job_queue.remove(job_id)
+    await run_in_threadpool(job.workspace.cleanup)
+    return {**job_queue.status(job), "discarded": True}
+
+def get_upload_or_404(upload_id: str) -> UploadSession:
+    session = upload_store.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    return session
+
+def upload_status(session: UploadSession) -> dict:
+    """Upload progress plus the status of the job processing it, if any."""
+    status = session.status()
+    job = job_queue.get(session.job_id) if session.job_id else None
+    if job is not None:
+        status["job"] = job_queue.status(job)
+        started_at = job_queue.started_at(job)
+        if started_at and session.first_chunk_at:
+            # How long after the first byte arrived processing got going
+            status["time_to_processing_seconds"] = round(started_at - session.first_chunk_at, 3)
+    return status
+
+@app.post("/uploads", status_code=201)
+async def create_upload(
+    filename: str = Form(...),
+    size: int = Form(...),
+    chunkSize: Optional[int] = Form(default=None),
+    contentType: Optional[str] = Form(default=None)
+):
+    """Start a resumable chunked upload"""
+    try:
+        session = await run_in_threadpool(upload_store.create, filename, size, chunkSize, contentType)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DiskQuotaError as e:
+        raise HTTPException(status_code=507, detail=str(e))
+    logger.info(f"Upload {session.upload_id} created for {filename} ({size} bytes)")
+    return session.status()
+
+@app.put("/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(upload_id: str, index: int, request: Request,
+                       x_chunk_sha256: Optional[str] = Header(default=None)):
+    """Store one chunk of an upload, verified against its X-Chunk-SHA256 header"""
+    session = get_upload_or_404(upload_id)
+    data = await request.body()
+    try:
+        start = time.perf_counter()
+        await run_in_threadpool(session.write_chunk, index, data, x_chunk_sha256)
+        metrics.observe("streamshield_upload_seconds", time.perf_counter() - start, kind="chunk")
+        metrics.inc("streamshield_upload_bytes_total", len(data), kind="chunk")
+    except ChecksumMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"upload_id": upload_id, "index": index, "contiguous_bytes": session.contiguous_bytes(),
+            "missing_chunks": len(session.missing_chunks())}
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Report received and missing chunks so a client can resume"""
+    return upload_status(get_upload_or_404(upload_id))
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, sha256: Optional[str] = Form(default=None)):
+    """Finish an upload, optionally verifying the SHA-256 of the whole file"""
+    session = get_upload_or_404(upload_id)
+    try:
+        await run_in_threadpool(session.finish, sha256)
+    except ChecksumMismatchError as e:
+        if session.job_id and not job_queue.cancel(session.job_id):
+            # The early-started job already finished on corrupt data: never serve its result
+            job_queue.invalidate(session.job_id, f"Input rejected: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return upload_status(session)
+
+@app.post("/uploads/{upload_id}/process", status_code=202)
+async def process_upload(
+    upload_id: str,
+    badWords: Optional[str] = Form(default=None),  # JSON string of bad words
+    processOption: Literal['blur', 'beep_video', 'beep_audio'] = Form(...),
+    profile: bool = Form(default=False)
+):
+    """Queue an upload for processing, before it completes if the format allows"""
+    session = get_upload_or_404(upload_id)
+    if session.job_id:
+        raise HTTPException(status_code=409, detail=f"Upload is already queued as job {session.job_id}")
+    bad_words = parse_bad_words(badWords)
+    if not session.complete:
+        if not session.missing_chunks():
+            await run_in_threadpool(session.finish)
+        elif not session.streamable:
+            raise HTTPException(status_code=409, detail="Upload is incomplete and its format "
+                                                        "(only WAV or fragmented MP4) cannot be processed early")
+    job = enqueue_job(session.upload_id, session.input_path, session.output_path, session.workspace,
+                      processOption, bad_words, session.filename, session.content_type, profile)
+    session.job_id = job.job_id
+    # From here on the workspace belongs to the job
+    job.future.add_done_callback(lambda _: upload_store.remove(session.upload_id))
+    logger.info(f"Upload {upload_id} queued for {processOption} (complete: {session.complete})")
+    return upload_status(session)
+
+@app.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Abandon an upload that has not been queued for processing"""
+    session = get_upload_or_404(upload_id)
+    if session.job_id:
+        raise HTTPException(status_code=409, detail=f"Upload is queued as job {session.job_id}")
+    upload_store.remove(upload_id)
+    await run_in_threadpool(session.workspace.cleanup)
+    return {"upload_id": upload_id, "status": "aborted"}
+
+class BatchRequest(BaseModel):
+    """Manifest of files and directories under STREAMSHIELD_BATCH_ROOT to process as one batch."""
+    inputs: List[str]
+    output_dir: str
+    processOption: Literal['blur', 'beep_video', 'beep_audio']
+    badWords: Optional[List[str]] = None
+    order: Literal['largest', 'smallest', 'manifest'] = 'largest'
+    recursive: bool = True
+    journal: Optional[str] = None
+
+def batch_path(path: str) -> str:
+    """Resolve a manifest path against the batch root, refusing anything outside it."""
+    root = os.path.realpath(config.BATCH_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise HTTPException(status_code=403, detail=f"Path is outside the batch root: {path}")
+    return resolved
+
+def get_batch_or_404(batch_id: str) -> Batch:
+    batch = batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+@app.post("/batches", status_code=202)
+async def create_batch(manifest: BatchRequest):
+    """Process server-side files on the batch workers, resuming from the batch journal"""
+    if not config.BATCH_ROOT:
+        raise HTTPException(status_code=403, detail="Batch processing is disabled (set STREAMSHIELD_BATCH_ROOT)")
+    inputs = [batch_path(path) for path in manifest.inputs]
+    output_dir = batch_path(manifest.output_dir)
+    journal_path = batch_path(manifest.journal) if manifest.journal else os.path.join(output_dir, JOURNAL_NAME)
+    if any(batch.journal.path == journal_path and batch.finished_at is None for batch in batches.values()):
+        raise HTTPException(status_code=409, detail="A batch with this journal is already running")
+    try:
+        items = await run_in_threadpool(collect, inputs, output_dir, manifest.recursive)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not items:
+        raise HTTPException(status_code=400, detail="No media files found in the manifest")
+
+    batch = Batch(items, manifest.processOption, BatchJournal(journal_path), manifest.badWords, manifest.order)
+    batches[batch.batch_id] = batch
+    batch.start(batch_runner)
+    logger.info(f"Batch {batch.batch_id} started with {len(items)} files")
+    return batch.status()
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Poll a batch's progress, and its aggregated throughput once it has ended"""
+    return get_batch_or_404(batch_id).status()
+
+@app.delete("/batches/{batch_id}")
+async def cancel_batch(batch_id: str):
+    """Stop a batch after the files in progress; submitting it again resumes it"""
+    batch = get_batch_or_404(batch_id)
+    batch.cancel()
+    return batch.status()
 
 @app.post("/virtual-camera/start")
 async def start_virtual_camera():
@@ -135,6 +473,28 @@ async def stop_virtual_camera():
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
+@app.get("/virtual-camera/status")
+async def virtual_camera_status():
+    """Report latency, dropped frames and achieved fps of the virtual camera"""
+    return virtual_camera_service.status()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Report result cache hits, misses and size"""
+    return await run_in_threadpool(result_cache.stats)
+
+@app.get("/models")
+async def models_report():
+    """Report model load times and memory usage of each job worker, and of this process (virtual camera)"""
+    workers = await run_in_threadpool(job_queue.model_reports)
+    return {"workers": {str(pid): report for pid, report in sorted(workers.items())},
+            "api": model_registry.report()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Job, stage, upload and throughput metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Global exception handler caught: {exc}")
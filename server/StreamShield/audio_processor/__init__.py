@@ -1,13 +1,27 @@
-from .audio_process import (
-    load_bad_words,
-    extract_audio,
-    transcribe_audio,
-    censor_audio,
-)
-
-_all_ = [
-    "load_bad_words",
-    "extract_audio",
-    "transcribe_audio",
-    "censor_audio",
-]
\ No newline at end of file
+import importlib
+
+# Public names and the submodule defining each, imported on first use so the
+# pure helpers (matcher, censor, resample) load without Vosk
+_EXPORTS = {
+    "load_bad_words": "audio_process",
+    "extract_audio": "audio_process",
+    "transcribe_audio": "audio_process",
+    "StreamTranscriber": "audio_process",
+    "find_bad_words": "audio_process",
+    "word_intervals": "audio_process",
+    "censor_audio": "audio_process",
+    "censor_samples": "censor",
+    "transcribe_workers": "parallel_transcribe",
+    "StreamResampler": "resample",
+    "BadWordMatcher": "matcher",
+    "compile_matcher": "matcher",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
@@ -1,67 +1,139 @@
+import functools
+import logging
 import wave
 import json
 import os
-import subprocess
-from vosk import Model, KaldiRecognizer
-from pydub import AudioSegment
-from pydub.generators import Sine
+from vosk import KaldiRecognizer
+import numpy as np
+from .. import config, growing_file
+from ..model_registry import model_registry
+from .censor import censor_samples
+from .matcher import BadWordMatcher, compile_matcher
+from .parallel_transcribe import transcribe_audio_parallel, transcribe_workers
+
+logger = logging.getLogger(__name__)
 
 def load_bad_words(filepath):
     """Loads bad words from a file."""
     try:
-        with open(filepath, "r") as f:
-            return set(word.strip().lower() for word in f.readlines())
+        stat = os.stat(filepath)
+        return set(_read_bad_words(os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size))
     except Exception as e:
-        print(f"Error loading bad words file: {e}")
-        exit(1)
+        logger.error(f"Error loading bad words file: {e}")
+        raise
+
+@functools.lru_cache(maxsize=16)
+def _read_bad_words(filepath, mtime_ns, size):
+    # mtime and size are part of the cache key so edited files are re-read
+    with open(filepath, "r") as f:
+        return frozenset(word.strip().lower() for word in f.readlines())
 
-def extract_audio(input_file):
-    """Extracts audio from MP4 and converts it to WAV (16kHz mono)."""
-    temp_wav = "temp_audio.wav"
+def extract_audio(input_file, workspace):
+    """Extracts audio from MP4 and converts it to WAV (16kHz mono) inside the job workspace."""
+    temp_wav = workspace.file("audio_16k.wav")
 
-    if input_file.endswith(".wav"):
+    if input_file.endswith(".wav") and _is_recognizer_wav(input_file):
         return input_file  # No need to convert WAV
 
-    print(f"Extracting and converting {input_file} audio to WAV format...")
-    subprocess.run(["ffmpeg", "-i", input_file, "-ac", "1", "-ar", "16000", "-vn", temp_wav, "-y"], check=True)
+    logger.info(f"Extracting and converting {input_file} audio to WAV format...")
+    # Inputs still being uploaded are streamed to ffmpeg as they grow
+    input_args, streaming = growing_file.input_args(input_file)
+    growing_file.run(["ffmpeg"] + input_args + ["-ac", "1", "-ar", "16000", "-vn", temp_wav, "-y"],
+                     input_file, streaming)
     return temp_wav
 
-def transcribe_audio(audio_file, model_path):
-    """Transcribes audio using Vosk."""
-    model = Model(model_path)
-    recognizer = KaldiRecognizer(model, 16000)
-    recognizer.SetWords(True)
-    transcription_data = []
+def _is_recognizer_wav(path):
+    """True for a complete 16 kHz mono 16-bit WAV that Vosk can read directly."""
+    if growing_file.is_partial(path):
+        return False
+    try:
+        with wave.open(path, "rb") as wf:
+            return wf.getframerate() == 16000 and wf.getnchannels() == 1 and wf.getsampwidth() == 2
+    except (wave.Error, EOFError, OSError):
+        return False
+
+def transcribe_audio(audio_file, model_path, workers=None, progress_callback=None):
+    """Transcribes audio using Vosk.
+
+    With more than one worker, long files are split at quiet points and
+    recognised in parallel by transcribe_audio_parallel. ``progress_callback``
+    gets the fraction transcribed so far and may raise to stop early.
+    """
+    workers = transcribe_workers(workers)
+    if workers > 1 and _duration_seconds(audio_file) > 2 * config.TRANSCRIBE_CHUNK_SECONDS:
+        return transcribe_audio_parallel(audio_file, model_path, workers,
+                                         chunk_seconds=config.TRANSCRIBE_CHUNK_SECONDS,
+                                         overlap_seconds=config.TRANSCRIBE_OVERLAP_SECONDS,
+                                         progress_callback=progress_callback)
+
+    transcriber = StreamTranscriber(model_path)
     try:
         with wave.open(audio_file, "rb") as wf:
+            total = max(1, wf.getnframes())
             while True:
                 data = wf.readframes(4000)
                 if len(data) == 0:
                     break
-                if recognizer.AcceptWaveform(data):
-                    result = json.loads(recognizer.Result())
-                    transcription_data.extend(result.get("result", []))
-        final_result = json.loads(recognizer.FinalResult())
-        transcription_data.extend(final_result.get("result", []))
-        print("Transcription data : " , transcription_data)
+                transcriber.feed(data)
+                if progress_callback:
+                    progress_callback(min(1.0, wf.tell() / total))
+        transcription_data = transcriber.finish()
+        logger.debug(f"Transcription data: {transcription_data}")
     except Exception as e:
-        print(f"Error during transcription: {e}")
-        exit(1)
-
+        logger.error(f"Error during transcription: {e}")
+        raise
 
     return transcription_data
 
-def censor_audio(audio, transcription_data, bad_words):
-    """Applies beep sound over detected bad words."""
-    censored_transcript = []
-    for word in transcription_data:
-        word_text = word["word"].lower()
-        if word_text in bad_words:
-            start_time = int(word["start"] * 1000)
-            end_time = int(word["end"] * 1000)
-            word_duration = end_time - start_time
-            beep = Sine(1000).to_audio_segment(duration=word_duration).apply_gain(-5)
-            audio = audio[:start_time] + beep + audio[end_time:]
-            censored_transcript.append(f"[{word['start']:.2f}s - {word['end']:.2f}s] {word['word']}")
-    return audio, censored_transcript
+class StreamTranscriber:
+    """Vosk recognizer fed 16 kHz mono 16-bit PCM block by block, e.g. while the input is still decoding."""
+
+    def __init__(self, model_path):
+        self.recognizer = KaldiRecognizer(model_registry.vosk(model_path), 16000)
+        self.recognizer.SetWords(True)
+        self.words = []
+
+    def feed(self, data):
+        if data and self.recognizer.AcceptWaveform(data):
+            self.words.extend(json.loads(self.recognizer.Result()).get("result", []))
+
+    def finish(self):
+        """Flush the recognizer and return every recognised word."""
+        self.words.extend(json.loads(self.recognizer.FinalResult()).get("result", []))
+        return self.words
+
+def _duration_seconds(audio_file):
+    with wave.open(audio_file, "rb") as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+def find_bad_words(transcription_data, bad_words):
+    """Returns the transcribed words and phrases that are in the bad words list.
+
+    ``bad_words`` is a compiled BadWordMatcher or any iterable of words and
+    phrases, which is compiled (and cached) on the fly.
+    """
+    if not isinstance(bad_words, BadWordMatcher):
+        bad_words = compile_matcher(bad_words, config.MATCH_MIN_CONFIDENCE)
+    return bad_words.match_words(transcription_data)
+
+def word_intervals(words, frame_rate):
+    """Converts word timings to (start, end) sample frame intervals."""
+    return [(int(word["start"] * frame_rate), int(word["end"] * frame_rate)) for word in words]
+
+def censor_audio(audio, transcription_data, bad_words, mode='beep', fade_ms=0):
+    """Applies beep sound over detected bad words.
+
+    All flagged words are written into a single copy of the sample buffer,
+    so the cost is linear in the audio length regardless of the hit count.
+    """
+    flagged = find_bad_words(transcription_data, bad_words)
+    censored_transcript = [f"[{word['start']:.2f}s - {word['end']:.2f}s] {word['word']}" for word in flagged]
+    intervals = word_intervals(flagged, audio.frame_rate)
+
+    if not intervals:
+        return audio, censored_transcript
 
+    samples = np.array(audio.get_array_of_samples()).reshape(-1, audio.channels)
+    censor_samples(samples, audio.frame_rate, intervals, mode=mode,
+                   fade_samples=int(fade_ms * audio.frame_rate / 1000))
+    return audio._spawn(samples.tobytes()), censored_transcript
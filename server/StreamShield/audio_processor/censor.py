@@ -0,0 +1,87 @@
+import functools
+from typing import List, Literal, Tuple
+
+import numpy as np
+
+CensorMode = Literal['beep', 'mute', 'duck']
+
+# Beep used since the original implementation: 1 kHz sine at -5 dBFS
+BEEP_FREQUENCY = 1000
+BEEP_GAIN_DB = -5.0
+# Attenuation applied to the original audio in 'duck' mode
+DUCK_GAIN_DB = -25.0
+
+
+@functools.lru_cache(maxsize=8)
+def beep_waveform(frame_rate: int) -> np.ndarray:
+    """One second of the beep tone as float32 in [-1, 1].
+
+    One second always holds a whole number of 1 kHz cycles, so the waveform
+    can be tiled without a phase jump.
+    """
+    t = np.arange(frame_rate, dtype=np.float64) / frame_rate
+    waveform = (np.sin(2 * np.pi * BEEP_FREQUENCY * t) * 10 ** (BEEP_GAIN_DB / 20)).astype(np.float32)
+    waveform.setflags(write=False)
+    return waveform
+
+
+def merge_intervals(intervals: List[Tuple[int, int]], gap: int = 0) -> List[Tuple[int, int]]:
+    """Sort and merge intervals that overlap or are at most ``gap`` samples apart."""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def censor_samples(
+        samples: np.ndarray,
+        frame_rate: int,
+        intervals: List[Tuple[int, int]],
+        mode: CensorMode = 'beep',
+        fade_samples: int = 0,
+        merge_gap: int = 0) -> None:
+    """Censor ``intervals`` (in frames) of an integer sample buffer in place.
+
+    ``samples`` has shape (frames,) or (frames, channels). Intervals are
+    merged first so every sample is written at most once; with
+    ``fade_samples`` > 0 the replacement is cross-faded in and out at each
+    interval edge instead of switching hard.
+    """
+    if samples.ndim == 1:
+        samples = samples[:, np.newaxis]
+    full_scale = float(np.iinfo(samples.dtype).max)
+    total = samples.shape[0]
+    beep = beep_waveform(frame_rate)
+
+    for start, end in merge_intervals(intervals, merge_gap):
+        start, end = max(0, start), min(total, end)
+        length = end - start
+        if length <= 0:
+            continue
+        original = samples[start:end].astype(np.float32)
+
+        if mode == 'beep':
+            reps = -(-length // len(beep))
+            tone = (np.tile(beep, reps)[:length] if reps > 1 else beep[:length]) * full_scale
+            replacement = np.repeat(tone[:, np.newaxis], samples.shape[1], axis=1)
+        elif mode == 'mute':
+            replacement = np.zeros_like(original)
+        elif mode == 'duck':
+            replacement = original * 10 ** (DUCK_GAIN_DB / 20)
+        else:
+            raise ValueError(f"Unknown censor mode {mode!r}")
+
+        if fade_samples > 0:
+            fade = min(fade_samples, length // 2)
+            if fade > 0:
+                ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)[:, np.newaxis]
+                replacement[:fade] = original[:fade] * (1 - ramp) + replacement[:fade] * ramp
+                replacement[-fade:] = original[-fade:] * ramp + replacement[-fade:] * (1 - ramp)
+
+        info = np.iinfo(samples.dtype)
+        samples[start:end] = np.clip(replacement, info.min, info.max).astype(samples.dtype)
@@ -0,0 +1,158 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from .. import config
+
+# Common character substitutions used to dodge word filters
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+                       "@": "a", "$": "s", "!": "i", "+": "t"})
+_LEET_SYMBOLS = re.compile(r"[@$!+]")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# Vosk spells numbers out; list entries such as "2 girls 1 cup" use digits
+_NUMBERS = {"zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+            "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10"}
+
+# Bumped whenever matching semantics change, so cached outputs are not reused
+MATCHER_VERSION = 2
+
+
+def normalize_token(token: str) -> str:
+    """Lower-case and drop punctuation; list entries are otherwise kept exactly as written."""
+    return _NON_WORD.sub("", token.lower())
+
+
+def _singulars(token: str) -> List[str]:
+    if token.endswith("s") and token[:-1].endswith("'"):
+        return [token[:-2]]
+    forms = []
+    if len(token) > 4 and token.endswith("ies"):
+        forms.append(token[:-3] + "y")
+    if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        forms.append(token[:-2])
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        forms.append(token[:-1])
+    return forms
+
+
+def token_variants(token: str) -> List[str]:
+    """Spellings of a transcript word to look up in the list.
+
+    The word itself, its leetspeak reading, spelled-out numbers as digits and
+    singular/possessive-free forms of each. Only transcript words are
+    expanded: list entries match exactly, so "sucks" in the list does not
+    flag "suck".
+    """
+    lowered = token.lower().strip("'")
+    # "$hit" reads as "shit", not as "hit" with the symbol dropped
+    forms = [] if _LEET_SYMBOLS.search(lowered) else [lowered]
+    forms.append(lowered.translate(_LEET))
+    if lowered in _NUMBERS:
+        forms.append(_NUMBERS[lowered])
+    forms += [singular for form in list(forms) for singular in _singulars(form)]
+    variants = []
+    for form in forms:
+        form = normalize_token(form)
+        if form and form not in variants:
+            variants.append(form)
+    return variants
+
+
+def tokenize(phrase: str) -> List[str]:
+    """Normalized tokens of a bad word or phrase."""
+    return [token for token in (normalize_token(part) for part in phrase.split()) if token]
+
+
+class BadWordMatcher:
+    """Token trie over the exact list entries, matched against the Vosk word stream.
+
+    Matches single words and multi-word phrases (e.g. "alabama hot pocket")
+    in one pass over the transcript regardless of the number of terms. Each
+    transcript word is tried in all of its token_variants, so several partial
+    phrase matches can be in progress at once.
+    """
+
+    def __init__(self, phrases: Iterable[str], min_conf: float = 0.0):
+        self.min_conf = min_conf
+        self.content_hash = None  # Set by compile_matcher for result cache keys
+        self._goto: List[Dict[str, int]] = [{}]
+        self._length: List[int] = [0]  # tokens of the phrase ending at each node, 0 if none
+        self.size = 0
+        for phrase in phrases:
+            tokens = tokenize(phrase)
+            if tokens:
+                self._add(tokens)
+                self.size += 1
+
+    def _add(self, tokens: List[str]) -> None:
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._length.append(0)
+            node = nxt
+        self._length[node] = len(tokens)
+
+    def find_spans(self, words: List[dict]) -> List[Tuple[int, int]]:
+        """(first, last) word indices of every match, in order of their end."""
+        spans = []
+        active: List[int] = []
+        for index, word in enumerate(words):
+            variants = token_variants(word["word"])
+            reached = []
+            # Every word may also start a new match from the root
+            for node in active + [0]:
+                for variant in variants:
+                    nxt = self._goto[node].get(variant)
+                    if nxt is not None and nxt not in reached:
+                        reached.append(nxt)
+            active = reached
+            ends = sorted({self._length[node] for node in reached if self._length[node]}, reverse=True)
+            for length in ends:
+                first = index - length + 1
+                if self.min_conf and min(w.get("conf", 1.0) for w in words[first:index + 1]) < self.min_conf:
+                    continue
+                spans.append((first, index))
+        return spans
+
+    def match_words(self, words: List[dict]) -> List[dict]:
+        """Flagged words, with each phrase match collapsed into a single entry."""
+        matches = []
+        for first, last in self.find_spans(words):
+            span = words[first:last + 1]
+            matches.append({
+                "word": " ".join(w["word"] for w in span),
+                "start": span[0]["start"],
+                "end": span[-1]["end"],
+                "conf": min(w.get("conf", 1.0) for w in span),
+            })
+        matches.sort(key=lambda m: m["start"])
+        return matches
+
+
+_cache: "OrderedDict[Tuple[str, float], BadWordMatcher]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compile_matcher(words: Iterable[str], min_conf: float = 0.0) -> BadWordMatcher:
+    """Compiled matcher for a word list, cached by content hash (LRU)."""
+    terms = sorted({word.strip().lower() for word in words if word and word.strip()})
+    content = "\n".join([f"matcher-v{MATCHER_VERSION}"] + terms)
+    key = (hashlib.sha256(content.encode()).hexdigest(), min_conf)
+    with _cache_lock:
+        matcher = _cache.get(key)
+        if matcher is not None:
+            _cache.move_to_end(key)
+            return matcher
+    matcher = BadWordMatcher(terms, min_conf)
+    matcher.content_hash = key[0]
+    with _cache_lock:
+        _cache[key] = matcher
+        while len(_cache) > config.MATCHER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return matcher
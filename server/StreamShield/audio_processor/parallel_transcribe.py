@@ -0,0 +1,198 @@
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import threading
+import wave
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from vosk import KaldiRecognizer
+
+from .. import config
+from ..model_registry import model_registry
+from ..worker_setup import cpu_share
+
+# Length of the windows compared when looking for the quietest cut point
+_SILENCE_WINDOW_SECONDS = 0.1
+
+# At most one chunk pool per process, keyed by (model path, size)
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key: Optional[Tuple[str, int]] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(model_path: str) -> None:
+    """Process pool initializer: load the Vosk model once per worker."""
+    model_registry.vosk(model_path)
+
+
+def transcribe_workers(workers: Optional[int] = None) -> int:
+    """Chunk processes to use: TRANSCRIBE_WORKERS, capped at the calling process's CPU share.
+
+    Inside a job worker that is its thread share, so chunk pools of all job
+    workers together do not oversubscribe the cores.
+    """
+    workers = config.TRANSCRIBE_WORKERS if workers is None else workers
+    return max(1, min(workers, cpu_share()))
+
+
+def _get_pool(model_path: str, workers: int) -> ProcessPoolExecutor:
+    """The process's warm chunk pool, replacing it when the model or size changes."""
+    global _pool, _pool_key
+    key = (os.path.abspath(model_path), workers)
+    with _pool_lock:
+        if _pool is not None and _pool_key != key:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(key[0],))
+            _pool_key = key
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the chunk pool, if any; runs when the owning process exits."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool, _pool_key = None, None
+
+
+# Job workers leave through multiprocessing's exit handlers rather than atexit
+multiprocessing.util.Finalize(None, shutdown_pool, exitpriority=10)
+
+
+def _recognize_chunk(audio_file: str, model_path: str, start_frame: int, end_frame: int) -> List[dict]:
+    """Transcribe one span of the WAV, returning words with absolute timestamps."""
+    recognizer = KaldiRecognizer(model_registry.vosk(model_path), 16000)
+    recognizer.SetWords(True)
+    words = []
+    with wave.open(audio_file, "rb") as wf:
+        frame_rate = wf.getframerate()
+        wf.setpos(start_frame)
+        remaining = end_frame - start_frame
+        while remaining > 0:
+            data = wf.readframes(min(4000, remaining))
+            if len(data) == 0:
+                break
+            remaining -= len(data) // (wf.getsampwidth() * wf.getnchannels())
+            if recognizer.AcceptWaveform(data):
+                words.extend(json.loads(recognizer.Result()).get("result", []))
+    words.extend(json.loads(recognizer.FinalResult()).get("result", []))
+
+    offset = start_frame / frame_rate
+    for word in words:
+        word["start"] += offset
+        word["end"] += offset
+    return words
+
+
+def _quietest_frame(wf, center: int, search: int, window: int, total: int) -> int:
+    """Frame index of the lowest-energy window within ``search`` frames of ``center``."""
+    lo, hi = max(0, center - search), min(total, center + search)
+    if hi - lo <= window:
+        return center
+    wf.setpos(lo)
+    samples = np.frombuffer(wf.readframes(hi - lo), dtype=np.int16).astype(np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(samples * samples)))
+    energy = cumulative[window:] - cumulative[:-window]
+    best = int(np.argmin(energy))
+    return lo + best + window // 2
+
+
+def plan_chunks(audio_file: str, chunk_seconds: float, search_seconds: float) -> List[int]:
+    """Cut points (in frames) splitting the WAV into roughly ``chunk_seconds`` chunks.
+
+    Each nominal boundary is moved to the quietest spot within
+    ``search_seconds`` so cuts land in pauses between words where possible.
+    """
+    with wave.open(audio_file, "rb") as wf:
+        frame_rate = wf.getframerate()
+        total = wf.getnframes()
+        chunk = int(chunk_seconds * frame_rate)
+        search = int(search_seconds * frame_rate)
+        window = max(1, int(_SILENCE_WINDOW_SECONDS * frame_rate))
+        cuts = [0]
+        for center in range(chunk, total - chunk // 2, chunk):
+            cut = _quietest_frame(wf, center, search, window, total)
+            if cut > cuts[-1]:
+                cuts.append(cut)
+        cuts.append(total)
+    return cuts
+
+
+def stitch_words(chunk_words: List[List[dict]], cut_times: List[float]) -> List[dict]:
+    """Merge per-chunk words, keeping each word only from the chunk owning its midpoint.
+
+    Chunks are recognised with overlap, so a word near a cut can be returned
+    by both neighbours; ownership by midpoint plus a final check for
+    near-identical neighbours removes the duplicates.
+    """
+    stitched = []
+    for index, words in enumerate(chunk_words):
+        lo, hi = cut_times[index], cut_times[index + 1]
+        last = index == len(chunk_words) - 1
+        for word in words:
+            mid = (word["start"] + word["end"]) / 2
+            if lo <= mid < hi or (last and mid >= lo):
+                stitched.append(word)
+    stitched.sort(key=lambda w: w["start"])
+
+    deduped = []
+    for word in stitched:
+        if deduped and deduped[-1]["word"] == word["word"] and abs(deduped[-1]["start"] - word["start"]) < 0.15:
+            continue
+        deduped.append(word)
+    return deduped
+
+
+def transcribe_audio_parallel(
+        audio_file: str,
+        model_path: str,
+        workers: int,
+        chunk_seconds: float = 30.0,
+        overlap_seconds: float = 1.0,
+        search_seconds: float = 2.0,
+        progress_callback: Optional[Callable[[float], None]] = None) -> List[dict]:
+    """Transcribe a 16 kHz mono WAV by recognising chunks in a process pool.
+
+    Chunks are cut at quiet points, padded by ``overlap_seconds`` on each
+    side, recognised independently and stitched back with their absolute
+    timestamps. The pool is capped by transcribe_workers(); with a single
+    process the chunks are recognised in the calling process instead.
+    ``progress_callback`` gets the fraction of chunks done at least every
+    half second; if it raises, chunks not yet started are cancelled.
+    """
+    cuts = plan_chunks(audio_file, chunk_seconds, search_seconds)
+    with wave.open(audio_file, "rb") as wf:
+        frame_rate = wf.getframerate()
+    overlap = int(overlap_seconds * frame_rate)
+    total = cuts[-1]
+
+    spans = [(max(0, start - overlap), min(total, end + overlap)) for start, end in zip(cuts[:-1], cuts[1:])]
+    workers = transcribe_workers(workers)
+    if workers > 1:
+        pool = _get_pool(model_path, workers)
+        futures = [pool.submit(_recognize_chunk, audio_file, model_path, start, end) for start, end in spans]
+        try:
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                if progress_callback:
+                    progress_callback(1 - len(pending) / len(futures))
+            chunk_words = [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    else:
+        chunk_words = []
+        for start, end in spans:
+            chunk_words.append(_recognize_chunk(audio_file, model_path, start, end))
+            if progress_callback:
+                progress_callback(len(chunk_words) / len(spans))
+    return stitch_words(chunk_words, [cut / frame_rate for cut in cuts])
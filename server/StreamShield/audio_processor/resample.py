@@ -0,0 +1,67 @@
+import numpy as np
+
+# Length of the anti-aliasing filter, in input samples (odd, so the delay is whole)
+_TAPS = 63
+
+
+def _lowpass(cutoff: float, taps: int) -> np.ndarray:
+    """Hamming-windowed sinc low-pass with ``cutoff`` in cycles per sample and unit gain."""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+class StreamResampler:
+    """Resample blocks of int16 PCM to mono ``out_rate`` audio, carrying state across blocks.
+
+    Channels are averaged, a windowed-sinc low-pass removes what would alias
+    when downsampling, and output samples are interpolated at the exact rate
+    ratio, so the concatenated output does not depend on the block sizes.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int = 16000, taps: int = _TAPS):
+        self.in_rate, self.out_rate = in_rate, out_rate
+        self.step = in_rate / out_rate
+        self._filter = _lowpass(0.45 * out_rate / in_rate, taps) if in_rate > out_rate else None
+        self._history = np.zeros(taps - 1 if self._filter is not None else 0, np.float32)
+        # Filtered samples still to drop so the output is not delayed by the filter
+        self._delay = (taps - 1) // 2 if self._filter is not None else 0
+        self._pending = np.zeros(0, np.float32)
+        self._position = 0.0
+
+    def process(self, block: np.ndarray) -> bytes:
+        """Resample a (frames,) or (frames, channels) block to mono int16 bytes."""
+        mono = block.astype(np.float32)
+        if mono.ndim == 2:
+            mono = mono.mean(axis=1)
+        return self._resample(mono)
+
+    def flush(self) -> bytes:
+        """Emit the samples still held back by the filter at the end of the stream."""
+        if self._filter is None:
+            return b""
+        return self._resample(np.zeros(len(self._filter) // 2, np.float32))
+
+    def _resample(self, samples: np.ndarray) -> bytes:
+        if not len(samples):
+            return b""
+        if self._filter is not None:
+            samples = np.concatenate((self._history, samples))
+            self._history = samples[len(samples) - len(self._history):]
+            samples = np.convolve(samples, self._filter, mode="valid").astype(np.float32)
+            if self._delay:
+                drop = min(self._delay, len(samples))
+                samples, self._delay = samples[drop:], self._delay - drop
+
+        buffer = np.concatenate((self._pending, samples))
+        count = max(0, int(np.ceil((len(buffer) - 1 - self._position) / self.step)))
+        positions = self._position + np.arange(count) * self.step
+        positions = positions[positions < len(buffer) - 1]
+        index = positions.astype(np.int64)
+        fraction = (positions - index).astype(np.float32)
+        output = buffer[index] * (1 - fraction) + buffer[index + 1] * fraction
+
+        next_position = self._position + len(positions) * self.step
+        consumed = min(int(next_position), len(buffer))
+        self._pending, self._position = buffer[consumed:], next_position - consumed
+        return np.clip(np.round(output), -32768, 32767).astype(np.int16).tobytes()
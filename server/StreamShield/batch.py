@@ -0,0 +1,443 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Literal, Optional, Tuple
+
+from . import config
+from .media_processor import MediaProcessor, ProcessOption
+from .metrics import metrics
+from .model_registry import model_registry
+from .worker_setup import PRELOAD_ENV, configure_worker, cpu_sets, limit_thread_env, threads_per_worker
+
+logger = logging.getLogger(__name__)
+
+BatchOrder = Literal['largest', 'smallest', 'manifest']
+
+MEDIA_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.wav', '.mp3', '.m4a', '.aac', '.flac', '.ogg', '.opus'}
+
+# Journal written into the output directory unless another path is given
+JOURNAL_NAME = ".streamshield-batch.jsonl"
+
+metrics.counter("streamshield_batch_files_total", "Batch items finished, by outcome")
+
+# MediaProcessor of this worker process, reused for every item with the same word list
+_processor: Optional[MediaProcessor] = None
+_processor_key = None
+
+
+def _init_worker(model_path: str, vosk_model_path: str, threads: int,
+                 worker_cpus: List[Optional[set]], slots, nice: int) -> None:
+    """Process pool initializer of a batch pool: lower its priority, pin the worker and warm up the models."""
+    try:
+        slot = slots.get(timeout=5)
+    except Exception:
+        slot = None
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError as e:
+            logger.error(f"Error lowering batch worker priority: {e}")
+    configure_worker(threads, worker_cpus[slot] if slot is not None else None)
+    try:
+        model_registry.warmup(model_path, vosk_model_path)
+    except Exception as e:
+        # Models are loaded lazily on first use if warmup fails
+        logger.error(f"Error warming up worker models: {e}")
+
+
+def _processor_for(model_path: str, badwords_path: str, bad_words: Optional[List[str]]) -> MediaProcessor:
+    global _processor, _processor_key
+    key = (model_path, badwords_path, tuple(bad_words) if bad_words is not None else None)
+    if _processor is None or _processor_key != key:
+        _processor = MediaProcessor(model_path, badwords_path, bad_words=bad_words)
+        _processor_key = key
+    return _processor
+
+
+def _settings_hash(model_path: str, badwords_path: str, bad_words: Optional[List[str]],
+                   process_option: ProcessOption) -> str:
+    """Worker entry point: the settings hash of this worker's processor (see MediaProcessor.settings_hash)."""
+    return _processor_for(model_path, badwords_path, bad_words).settings_hash(process_option)
+
+
+def _process_item(model_path: str, badwords_path: str, bad_words: Optional[List[str]],
+                  input_path: str, output_path: str, process_option: ProcessOption) -> dict:
+    """Worker entry point: process one batch item and return its run statistics.
+
+    The output is written under a temporary name and renamed when complete,
+    so an interrupted batch never leaves a truncated file at ``output_path``.
+    """
+    processor = _processor_for(model_path, badwords_path, bad_words)
+    directory = os.path.dirname(output_path)
+    os.makedirs(directory or ".", exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(output_path))
+    # Keeps the extension, which selects the output container
+    partial = os.path.join(directory, f".{stem}.partial{ext}")
+    try:
+        processor.process_media(input_path, partial, process_option)
+        os.replace(partial, output_path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return processor.stats
+
+
+@dataclass
+class BatchItem:
+    input_path: str
+    output_path: str
+    size: int = 0
+
+
+def collect(inputs: Iterable[str], output_dir: str, recursive: bool = True) -> List[BatchItem]:
+    """Batch items for files and directories of media, mirroring directory layouts under ``output_dir``.
+
+    Hidden files and anything already inside ``output_dir`` are left out.
+    """
+    output_dir = os.path.abspath(output_dir)
+    items: List[BatchItem] = []
+    for path in inputs:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(name for name in dirnames if recursive
+                                     and os.path.join(dirpath, name) != output_dir)
+                for filename in sorted(filenames):
+                    if os.path.splitext(filename.lower())[1] in MEDIA_EXTENSIONS and not filename.startswith("."):
+                        source = os.path.join(dirpath, filename)
+                        items.append(BatchItem(source, os.path.join(output_dir, os.path.relpath(source, path))))
+        elif os.path.isfile(path):
+            items.append(BatchItem(path, os.path.join(output_dir, os.path.basename(path))))
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+
+    seen: Dict[str, str] = {}
+    unique = []
+    for item in items:
+        item.output_path = os.path.abspath(item.output_path)
+        if item.output_path == item.input_path:
+            raise ValueError(f"Output would overwrite its input: {item.input_path}")
+        if item.output_path in seen:
+            if seen[item.output_path] == item.input_path:
+                continue
+            raise ValueError(f"{item.input_path} and {seen[item.output_path]} map to the same output")
+        seen[item.output_path] = item.input_path
+        item.size = os.path.getsize(item.input_path)
+        unique.append(item)
+    return unique
+
+
+def schedule(items: List[BatchItem], order: BatchOrder = 'largest') -> List[BatchItem]:
+    """Order items for submission.
+
+    Largest first keeps every worker busy until the end of the batch instead
+    of leaving one long file running alone at the tail.
+    """
+    if order == 'manifest':
+        return list(items)
+    return sorted(items, key=lambda item: item.size, reverse=order == 'largest')
+
+
+class BatchJournal:
+    """Append-only JSONL record of finished items, so an interrupted batch resumes where it stopped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def entries(self) -> List[dict]:
+        """Every readable entry; a line cut short by a crash is ignored."""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def completed(self) -> Dict[str, dict]:
+        """Latest successful entry per input path."""
+        return {entry["input"]: entry for entry in self.entries() if entry.get("status") == "done"}
+
+    def record(self, entry: dict) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "ab+") as f:
+                end = f.seek(0, os.SEEK_END)
+                if end:
+                    # Start on a fresh line if the last write was interrupted
+                    f.seek(end - 1)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                f.write(json.dumps(entry).encode() + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def split_done(items: List[BatchItem], process_option: ProcessOption, journal: Optional[BatchJournal],
+               settings: Optional[str] = None) -> Tuple[List[dict], List[BatchItem]]:
+    """Journal entries of items already done whose output still exists, and the rest.
+
+    An entry only counts if it was made with the same option and, when
+    ``settings`` is given, the same settings hash (word list, models,
+    detection and encoder settings); anything else is processed again.
+    """
+    completed = journal.completed() if journal else {}
+    entries, pending = [], []
+    for item in items:
+        previous = completed.get(item.input_path)
+        if (previous and previous.get("option") == process_option
+                and (settings is None or previous.get("settings") == settings)
+                and os.path.exists(item.output_path)):
+            entries.append({**previous, "resumed": True})
+        else:
+            pending.append(item)
+    return entries, pending
+
+
+def summarize(entries: List[dict], wall_seconds: float, resumed: int = 0, pending: int = 0) -> dict:
+    """Aggregated throughput of finished items.
+
+    ``entries`` are journal entries; items finished by an earlier run of the
+    batch count towards the totals but not towards this run's rates.
+    """
+    done = [entry for entry in entries if entry["status"] == "done"]
+    this_run = [entry for entry in done if not entry.get("resumed")]
+    stage_seconds: Dict[str, float] = {}
+    counters: Dict[str, float] = {}
+    for entry in done:
+        timings = entry.get("stats", {}).get("timings", {})
+        for stage, timing in timings.get("stages", {}).items():
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + timing["seconds"]
+        for name, value in timings.get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + value
+
+    input_bytes = sum(entry["size"] for entry in this_run)
+    summary = {
+        "files": len(entries) + pending,
+        "completed": len(done),
+        "failed": sum(1 for entry in entries if entry["status"] == "failed"),
+        "resumed": resumed,
+        "pending": pending,
+        "cached": sum(1 for entry in done if entry.get("stats", {}).get("cached")),
+        "input_bytes": sum(entry["size"] for entry in done),
+        "output_bytes": int(counters.get("bytes_written", 0)),
+        "wall_seconds": round(wall_seconds, 2),
+        "files_per_second": round(len(this_run) / wall_seconds, 4) if wall_seconds else 0.0,
+        "input_mb_per_second": round(input_bytes / 1e6 / wall_seconds, 3) if wall_seconds else 0.0,
+        "worker_seconds": round(sum(entry["seconds"] for entry in this_run), 2),
+        "stage_seconds": {stage: round(seconds, 3) for stage, seconds in sorted(stage_seconds.items())},
+        "counters": counters,
+    }
+    if counters.get("frames") and stage_seconds.get("video"):
+        summary["frames_per_second"] = round(counters["frames"] / stage_seconds["video"], 2)
+    if counters.get("audio_seconds") and stage_seconds.get("transcribe"):
+        summary["audio_realtime_factor"] = round(stage_seconds["transcribe"] / counters["audio_seconds"], 4)
+    return summary
+
+
+class BatchRunner:
+    """Runs batches of media files through a pool of workers that each keep one warm MediaProcessor.
+
+    The pool is started on first use with the job queue's thread and
+    affinity settings. Its workers run at ``nice``, so next to the API's job
+    workers the batch only gets the CPU time interactive jobs leave over.
+    """
+
+    def __init__(self, model_path: str, vosk_model_path: str, badwords_path: str,
+                 workers: Optional[int] = None, nice: int = 0):
+        self.model_path = model_path
+        self.vosk_model_path = vosk_model_path
+        self.badwords_path = badwords_path
+        self.workers = workers or config.JOB_WORKERS
+        self.nice = nice
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._start()
+
+    def _start(self) -> None:
+        threads = threads_per_worker(self.workers)
+        limit_thread_env(threads)
+        ctx = multiprocessing.get_context(config.WORKER_START_METHOD)
+        if config.WORKER_START_METHOD == "forkserver":
+            os.environ[PRELOAD_ENV] = os.pathsep.join([self.model_path, self.vosk_model_path])
+            ctx.set_forkserver_preload([f"{__package__}.worker_preload"])
+        slots = ctx.Queue()
+        for slot in range(self.workers):
+            slots.put(slot)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.model_path, self.vosk_model_path, threads, cpu_sets(self.workers), slots, self.nice),
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def settings_hash(self, process_option: ProcessOption, bad_words: Optional[List[str]] = None) -> str:
+        """Settings hash recorded with every journal entry, computed by a worker so models stay out of this process."""
+        self.start()
+        return self._executor.submit(_settings_hash, self.model_path, self.badwords_path, bad_words,
+                                     process_option).result()
+
+    def active(self) -> int:
+        """Items queued or running across all batches."""
+        with self._lock:
+            return self._active
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._active += delta
+
+    def run(
+            self,
+            items: List[BatchItem],
+            process_option: ProcessOption,
+            journal: Optional[BatchJournal] = None,
+            bad_words: Optional[List[str]] = None,
+            order: BatchOrder = 'largest',
+            on_item: Optional[Callable[[dict], None]] = None,
+            stop: Optional[threading.Event] = None) -> dict:
+        """Process ``items`` and return the aggregated summary.
+
+        Items already recorded as done in ``journal`` with the same settings
+        hash and whose output still exists are skipped. At most one item more
+        than there are workers is in flight, so setting ``stop`` ends the
+        batch after the running items and other batches on the same runner
+        get their turn.
+        """
+        started = time.perf_counter()
+        settings = self.settings_hash(process_option, bad_words)
+        entries, pending = split_done(items, process_option, journal, settings)
+        resumed = len(entries)
+        queue = iter(schedule(pending, order))
+        in_flight = {}
+        remaining = len(pending)
+
+        try:
+            while True:
+                while not (stop and stop.is_set()) and len(in_flight) <= self.workers:
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    future = self._executor.submit(_process_item, self.model_path, self.badwords_path, bad_words,
+                                                   item.input_path, item.output_path, process_option)
+                    in_flight[future] = (item, time.perf_counter())
+                    self._track(1)
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item, submitted = in_flight.pop(future)
+                    self._track(-1)
+                    remaining -= 1
+                    entry = {"input": item.input_path, "output": item.output_path, "option": process_option,
+                             "settings": settings, "size": item.size,
+                             "seconds": round(time.perf_counter() - submitted, 3), "finished_at": time.time()}
+                    error = future.exception()
+                    if error is None:
+                        entry.update(status="done", stats=future.result())
+                    else:
+                        entry.update(status="failed", error=str(error))
+                        logger.error(f"Error processing {item.input_path}: {error}")
+                    metrics.inc("streamshield_batch_files_total", option=process_option, status=entry["status"])
+                    if journal:
+                        journal.record(entry)
+                    entries.append(entry)
+                    if on_item:
+                        on_item(entry)
+        finally:
+            # Stop counting the items of a batch that failed mid-way
+            self._track(-len(in_flight))
+        return summarize(entries, time.perf_counter() - started, resumed, remaining)
+
+
+class Batch:
+    """Bookkeeping for a batch running in the background on a BatchRunner."""
+
+    def __init__(self, items: List[BatchItem], process_option: ProcessOption, journal: BatchJournal,
+                 bad_words: Optional[List[str]] = None, order: BatchOrder = 'largest'):
+        self.batch_id = uuid.uuid4().hex
+        self.items = items
+        self.process_option = process_option
+        self.journal = journal
+        self.bad_words = bad_words
+        self.order = order
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.finished = 0
+        self.failed = 0
+        self.summary: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, runner: BatchRunner) -> None:
+        self._thread = threading.Thread(target=self._run, args=(runner,), name=f"batch-{self.batch_id[:8]}",
+                                        daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> bool:
+        """Stop scheduling new items; returns False if the batch already ended."""
+        if self.finished_at is not None:
+            return False
+        self.stop.set()
+        return True
+
+    def status(self) -> dict:
+        if self.finished_at is None:
+            state = "stopping" if self.stop.is_set() else "running"
+        elif self.error:
+            state = "failed"
+        else:
+            state = "cancelled" if self.summary and self.summary["pending"] else "completed"
+        status = {
+            "batch_id": self.batch_id,
+            "status": state,
+            "process_option": self.process_option,
+            "files": len(self.items),
+            "finished": self.finished,
+            "failed": self.failed,
+            "journal": self.journal.path,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+        }
+        if self.summary:
+            status["summary"] = self.summary
+        if self.error:
+            status["error"] = self.error
+        return status
+
+    def _on_item(self, entry: dict) -> None:
+        self.finished += 1
+        if entry["status"] == "failed":
+            self.failed += 1
+
+    def _run(self, runner: BatchRunner) -> None:
+        try:
+            self.summary = runner.run(self.items, self.process_option, self.journal, self.bad_words, self.order,
+                                      on_item=self._on_item, stop=self.stop)
+        except Exception as e:
+            logger.error(f"Error running batch {self.batch_id}: {e}")
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
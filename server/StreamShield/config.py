@@ -0,0 +1,143 @@
+import os
+import tempfile
+
+# Tunables are read from the environment so deployments can size them per host.
+
+# Number of worker processes running MediaProcessor jobs
+JOB_WORKERS = int(os.environ.get("STREAMSHIELD_JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+
+# Jobs allowed to wait for a free worker before submissions are rejected with 429
+JOB_QUEUE_DEPTH = int(os.environ.get("STREAMSHIELD_JOB_QUEUE_DEPTH", 8))
+
+# Frames sent to YOLO per model call in process_video
+VIDEO_BATCH_SIZE = int(os.environ.get("STREAMSHIELD_VIDEO_BATCH_SIZE", 8))
+
+# Frames buffered between the decode, inference and encode stages (0 = serial)
+VIDEO_QUEUE_DEPTH = int(os.environ.get("STREAMSHIELD_VIDEO_QUEUE_DEPTH", 32))
+
+# Run YOLO every Nth frame and track boxes in between (1 = detect every frame).
+# Opt-in: larger intervals cut inference time roughly N-fold, but a region that
+# appears between keyframes can stay unblurred for up to N-1 frames unless the
+# frame difference below forces an earlier detection
+KEYFRAME_INTERVAL = int(os.environ.get("STREAMSHIELD_KEYFRAME_INTERVAL", 1))
+
+# Mean frame difference (0-1) against the last keyframe that forces a new detection
+KEYFRAME_DIFF_THRESHOLD = float(os.environ.get("STREAMSHIELD_KEYFRAME_DIFF_THRESHOLD", 0.04))
+
+# Fraction of a tracked box's size added on each side as a safety margin
+TRACK_BOX_MARGIN = float(os.environ.get("STREAMSHIELD_TRACK_BOX_MARGIN", 0.1))
+
+# Region obfuscation: gaussian, downscale, box, pixelate or fill
+BLUR_METHOD = os.environ.get("STREAMSHIELD_BLUR_METHOD", "gaussian")
+
+# Processes used to transcribe one long file in parallel chunks (1 = serial),
+# capped inside a job worker at its thread share of the cores
+TRANSCRIBE_WORKERS = int(os.environ.get("STREAMSHIELD_TRANSCRIBE_WORKERS", 1))
+
+# Nominal chunk length and overlap for parallel transcription, in seconds
+TRANSCRIBE_CHUNK_SECONDS = float(os.environ.get("STREAMSHIELD_TRANSCRIBE_CHUNK_SECONDS", 30))
+TRANSCRIBE_OVERLAP_SECONDS = float(os.environ.get("STREAMSHIELD_TRANSCRIBE_OVERLAP_SECONDS", 1.0))
+
+# Output encoder for processed video (libx264 gives H.264 instead of OpenCV's mp4v)
+VIDEO_CODEC = os.environ.get("STREAMSHIELD_VIDEO_CODEC", "libx264")
+VIDEO_PRESET = os.environ.get("STREAMSHIELD_VIDEO_PRESET", "veryfast")
+VIDEO_CRF = int(os.environ.get("STREAMSHIELD_VIDEO_CRF", 23))
+AUDIO_BITRATE = os.environ.get("STREAMSHIELD_AUDIO_BITRATE", "192k")
+
+# Root for per-job scratch directories; point it at tmpfs (e.g. /dev/shm) for speed
+SCRATCH_DIR = os.environ.get("STREAMSHIELD_SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "streamshield"))
+
+# Maximum bytes a single job workspace may hold (0 = unlimited)
+WORKSPACE_QUOTA_BYTES = int(os.environ.get("STREAMSHIELD_WORKSPACE_QUOTA_BYTES", 20 * 1024 ** 3))
+
+# Free space that must remain on a workspace's filesystem
+SCRATCH_MIN_FREE_BYTES = int(os.environ.get("STREAMSHIELD_SCRATCH_MIN_FREE_BYTES", 1024 ** 3))
+
+# Compiled bad-word matchers kept in memory, keyed by word list content hash
+MATCHER_CACHE_SIZE = int(os.environ.get("STREAMSHIELD_MATCHER_CACHE_SIZE", 32))
+
+# Minimum Vosk word confidence for a match to be censored (0 = censor every match)
+MATCH_MIN_CONFIDENCE = float(os.environ.get("STREAMSHIELD_MATCH_MIN_CONFIDENCE", 0.0))
+
+# Content-addressed cache of detections, transcripts and outputs (set to 0 to disable)
+CACHE_ENABLED = os.environ.get("STREAMSHIELD_CACHE_ENABLED", "1") not in ("0", "false", "no")
+CACHE_DIR = os.environ.get("STREAMSHIELD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "streamshield-cache"))
+CACHE_MAX_BYTES = int(os.environ.get("STREAMSHIELD_CACHE_MAX_BYTES", 10 * 1024 ** 3))
+
+# Chunk size for resumable uploads, and how long a partial upload may stop growing
+UPLOAD_CHUNK_BYTES = int(os.environ.get("STREAMSHIELD_UPLOAD_CHUNK_BYTES", 8 * 1024 ** 2))
+UPLOAD_STALL_TIMEOUT = float(os.environ.get("STREAMSHIELD_UPLOAD_STALL_TIMEOUT", 600))
+
+# How long finished outputs are kept for (re)download after their last access
+RESULT_TTL_SECONDS = float(os.environ.get("STREAMSHIELD_RESULT_TTL_SECONDS", 3600))
+
+# Unfinished uploads with no new chunks for this long are discarded
+UPLOAD_TTL_SECONDS = float(os.environ.get("STREAMSHIELD_UPLOAD_TTL_SECONDS", 24 * 3600))
+
+# Seconds between sweeps for expired results and uploads
+REAP_INTERVAL_SECONDS = float(os.environ.get("STREAMSHIELD_REAP_INTERVAL_SECONDS", 60))
+
+# Write MP4/MOV outputs as fragmented MP4 so they can be played while still encoding
+FRAGMENTED_MP4 = os.environ.get("STREAMSHIELD_FRAGMENTED_MP4", "0") not in ("0", "false", "no")
+
+# Virtual camera: width frames are downscaled to for detection, and the slowest
+# allowed detection interval when the output falls behind the target fps
+VCAM_INFER_WIDTH = int(os.environ.get("STREAMSHIELD_VCAM_INFER_WIDTH", 640))
+VCAM_MAX_INFER_INTERVAL = float(os.environ.get("STREAMSHIELD_VCAM_MAX_INFER_INTERVAL", 0.5))
+
+# How job workers start: "spawn" loads models in every worker; "forkserver" loads
+# and warms them once in a fork server so workers share the weights copy-on-write
+WORKER_START_METHOD = os.environ.get("STREAMSHIELD_WORKER_START_METHOD", "spawn")
+
+# Intra-op threads for torch/OpenCV in each job worker (0 = cores / workers)
+WORKER_THREADS = int(os.environ.get("STREAMSHIELD_WORKER_THREADS", 0))
+
+# Pin job workers to cores: "" (off), "auto" (split the allowed cores evenly)
+# or explicit per-worker sets such as "0-3;4-7"
+WORKER_CPU_AFFINITY = os.environ.get("STREAMSHIELD_WORKER_CPU_AFFINITY", "")
+
+# YOLO inference backend: "torch", "onnx" (ONNX Runtime) or "openvino". Exported
+# models are built on first use; if the runtime or export fails, torch is used
+DETECT_BACKEND = os.environ.get("STREAMSHIELD_DETECT_BACKEND", "torch")
+
+# Quantize exported models to int8. ONNX uses dynamic weight quantization;
+# OpenVINO calibrates on DETECT_INT8_DATA (an Ultralytics dataset YAML of
+# reference frames), or Ultralytics' default dataset if unset
+DETECT_INT8 = os.environ.get("STREAMSHIELD_DETECT_INT8", "0") not in ("0", "false", "no")
+DETECT_INT8_DATA = os.environ.get("STREAMSHIELD_DETECT_INT8_DATA", "")
+
+# Square detector input size in pixels (0 = the model's default, usually 640)
+DETECT_IMGSZ = int(os.environ.get("STREAMSHIELD_DETECT_IMGSZ", 0))
+
+# YOLO handles per model and process; threads check one out per inference
+# call and wait when all are busy (each handle holds its own copy of the weights)
+DETECT_HANDLES = int(os.environ.get("STREAMSHIELD_DETECT_HANDLES", 2))
+
+# Where exported models are kept, keyed by weights hash and export settings
+DETECT_EXPORT_DIR = os.environ.get("STREAMSHIELD_DETECT_EXPORT_DIR",
+                                   os.path.join(tempfile.gettempdir(), "streamshield-models"))
+
+# Skip detection on frames with no changed tiles (per-tile difference hashes);
+# a tile has changed when more than GATE_HASH_THRESHOLD of its 64 hash bits differ.
+# Opt-in: static screen recordings skip most inference, but a change too small
+# to flip the threshold (e.g. text typed into a field) reuses the previous boxes
+# until a larger change; GATE_HASH_THRESHOLD=0 skips only near-identical frames
+GATE_ENABLED = os.environ.get("STREAMSHIELD_GATE_ENABLED", "0") not in ("0", "false", "no")
+GATE_TILE_SIZE = int(os.environ.get("STREAMSHIELD_GATE_TILE_SIZE", 64))
+GATE_HASH_THRESHOLD = int(os.environ.get("STREAMSHIELD_GATE_HASH_THRESHOLD", 3))
+
+# Run the detector on the changed tiles only, instead of the whole frame
+GATE_REGION_DETECT = os.environ.get("STREAMSHIELD_GATE_REGION_DETECT", "0") not in ("0", "false", "no")
+
+# Profile every job with cProfile (individual jobs can ask for it with profile=true)
+PROFILE_JOBS = os.environ.get("STREAMSHIELD_PROFILE_JOBS", "0") not in ("0", "false", "no")
+
+# Directory that batch manifests submitted over the API may read from and write
+# to; batches are rejected while it is unset
+BATCH_ROOT = os.environ.get("STREAMSHIELD_BATCH_ROOT", "")
+
+# API batches run on their own worker pool, so they never take job queue slots
+# or delay interactive jobs; its workers run at this nice value so interactive
+# job workers win when both want the same cores
+BATCH_WORKERS = int(os.environ.get("STREAMSHIELD_BATCH_WORKERS", max(1, JOB_WORKERS // 2)))
+BATCH_NICE = int(os.environ.get("STREAMSHIELD_BATCH_NICE", 10))
@@ -0,0 +1,358 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import List, Optional
+
+import numpy as np
+
+from . import config, growing_file
+
+# Formats that accept the mov/mp4 muxer's fragmentation flags
+_FRAGMENTABLE_EXTENSIONS = {".mp4", ".mov", ".m4a"}
+
+# ffmpeg encoders for audio codecs whose native encoder is missing or experimental
+_AUDIO_ENCODERS = {"mp3": "libmp3lame", "vorbis": "libvorbis", "opus": "libopus"}
+_LOSSLESS_AUDIO = ("pcm_", "flac", "alac", "wavpack")
+
+
+@dataclass
+class EncoderSettings:
+    """Output encoder options for the single-pass ffmpeg pipeline."""
+    video_codec: str = config.VIDEO_CODEC
+    preset: str = config.VIDEO_PRESET
+    crf: int = config.VIDEO_CRF
+    pix_fmt: str = "yuv420p"
+    audio_codec: str = "aac"
+    audio_bitrate: str = config.AUDIO_BITRATE
+    fragmented: bool = config.FRAGMENTED_MP4
+    extra_args: List[str] = field(default_factory=list)
+
+    def video_args(self) -> List[str]:
+        args = ["-c:v", self.video_codec, "-pix_fmt", self.pix_fmt]
+        if self.video_codec in ("libx264", "libx265"):
+            args += ["-preset", self.preset, "-crf", str(self.crf)]
+        return args
+
+    def audio_args(self) -> List[str]:
+        return ["-c:a", self.audio_codec, "-b:a", self.audio_bitrate]
+
+    def muxer_args(self, output_path: str) -> List[str]:
+        """Fragmentation flags (when enabled and supported by the container) plus extra_args."""
+        args = []
+        if self.fragmented and os.path.splitext(output_path.lower())[1] in _FRAGMENTABLE_EXTENSIONS:
+            # Self-contained fragments from the start, so a partial file is playable
+            args += ["-movflags", "frag_keyframe+empty_moov+default_base_moof"]
+        return args + self.extra_args
+
+
+@dataclass
+class MediaInfo:
+    """Stream properties reported by ffprobe."""
+    width: int = 0
+    height: int = 0
+    frame_rate: str = "30"  # Exact rational, e.g. "30000/1001"
+    frame_count: int = 0
+    duration: float = 0.0
+    has_video: bool = False
+    has_audio: bool = False
+    sample_rate: int = 0
+    channels: int = 0
+    audio_codec: str = ""
+    audio_bit_rate: int = 0
+
+    @property
+    def fps(self) -> float:
+        return float(Fraction(self.frame_rate))
+
+
+def probe(path: str) -> MediaInfo:
+    """Read stream properties with ffprobe."""
+    input_args, streaming = growing_file.input_args(path)
+    result = growing_file.run(
+        ["ffprobe", "-v", "error", "-print_format", "json", "-show_streams", "-show_format"] + input_args,
+        path, streaming, capture_output=True)
+    data = json.loads(result.stdout)
+    info = MediaInfo(duration=float(data.get("format", {}).get("duration", 0) or 0))
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "video" and not info.has_video:
+            info.has_video = True
+            info.width, info.height = int(stream["width"]), int(stream["height"])
+            rotation = int(stream.get("tags", {}).get("rotate", 0))
+            for side_data in stream.get("side_data_list", []):
+                rotation = int(side_data.get("rotation", rotation))
+            if abs(rotation) % 180 == 90:
+                # ffmpeg auto-rotates on decode, so frames come out transposed
+                info.width, info.height = info.height, info.width
+            rate = stream.get("avg_frame_rate") or stream.get("r_frame_rate") or "30"
+            info.frame_rate = rate if rate != "0/0" else "30"
+            info.frame_count = int(stream.get("nb_frames", 0) or 0) or int(info.duration * info.fps)
+        elif stream.get("codec_type") == "audio" and not info.has_audio:
+            info.has_audio = True
+            info.sample_rate = int(stream.get("sample_rate", 0))
+            info.channels = int(stream.get("channels", 0))
+            info.audio_codec = stream.get("codec_name", "")
+            info.audio_bit_rate = int(stream.get("bit_rate", 0) or 0)
+    return info
+
+
+def _drain(stream, sink: List[bytes]) -> None:
+    """Collect a subprocess pipe so ffmpeg never blocks on a full stderr."""
+    for line in iter(stream.readline, b""):
+        sink.append(line)
+        del sink[:-50]
+    stream.close()
+
+
+def _check(proc: subprocess.Popen, stderr: List[bytes], what: str) -> None:
+    if proc.returncode != 0:
+        message = b"".join(stderr).decode(errors="replace").strip()
+        raise RuntimeError(f"ffmpeg {what} failed ({proc.returncode}): {message}")
+
+
+class FFmpegFrameReader:
+    """Decode video frames as BGR arrays through an ffmpeg pipe.
+
+    Mirrors the parts of cv2.VideoCapture used by process_stream. Inputs
+    that are still being uploaded are decoded as they grow.
+    """
+
+    def __init__(self, input_path: str, info: MediaInfo):
+        self.width, self.height = info.width, info.height
+        self._frame_bytes = self.width * self.height * 3
+        self._stderr: List[bytes] = []
+        input_args, streaming = growing_file.input_args(input_path)
+        self._proc = subprocess.Popen(
+            ["ffmpeg", "-v", "error", "-nostdin"] + input_args +
+            ["-map", "0:v:0", "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"],
+            stdin=subprocess.PIPE if streaming else None,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=self._frame_bytes)
+        self._feeder = growing_file.start_feeder(input_path, self._proc) if streaming else None
+        self._stderr_thread = threading.Thread(target=_drain, args=(self._proc.stderr, self._stderr), daemon=True)
+        self._stderr_thread.start()
+        self._eof = False
+
+    def isOpened(self) -> bool:
+        return not self._eof
+
+    def read(self):
+        # A fresh bytearray per frame keeps frames writable and independent
+        buffer = bytearray(self._frame_bytes)
+        view = memoryview(buffer)
+        filled = 0
+        while filled < self._frame_bytes:
+            count = self._proc.stdout.readinto(view[filled:])
+            if not count:
+                self._eof = True
+                if self._feeder:
+                    self._feeder.check()
+                return False, None
+            filled += count
+        return True, np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def release(self) -> None:
+        self._proc.stdout.close()
+        self._proc.wait()
+        self._stderr_thread.join()
+        if self._feeder:
+            self._feeder.check()
+        if self._eof:
+            _check(self._proc, self._stderr, "decode")
+
+
+class FFmpegMuxer:
+    """Single ffmpeg process encoding piped frames and muxing the audio.
+
+    Video comes either from ``write`` calls (raw BGR frames) or is
+    stream-copied from ``copy_video_from``; audio is stream-copied from
+    ``copy_audio_from``, streamed from a raw PCM file through ``write_audio``,
+    or absent.
+    Mirrors the parts of cv2.VideoWriter used by process_stream.
+    """
+
+    def __init__(
+            self,
+            output_path: str,
+            info: MediaInfo,
+            settings: Optional[EncoderSettings] = None,
+            copy_video_from: Optional[str] = None,
+            copy_audio_from: Optional[str] = None,
+            pcm_audio: bool = False):
+        settings = settings or EncoderSettings()
+        cmd = ["ffmpeg", "-y", "-v", "error", "-nostdin"]
+        maps: List[str] = []
+        codecs: List[str] = []
+        pass_fds: List[int] = []
+        self._feeders: List[growing_file.Feeder] = []
+        self._audio_fd = None
+        inputs = 0
+
+        def source(path: str) -> List[str]:
+            # Partial uploads are streamed through an extra pipe as they grow
+            if not growing_file.is_partial(path):
+                return ["-i", path]
+            read_fd, feeder = growing_file.pipe_input(path)
+            pass_fds.append(read_fd)
+            self._feeders.append(feeder)
+            return ["-i", f"pipe:{read_fd}"]
+
+        if copy_video_from:
+            cmd += source(copy_video_from)
+            maps += ["-map", f"{inputs}:v:0"]
+            codecs += ["-c:v", "copy"]
+        else:
+            cmd += ["-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{info.width}x{info.height}",
+                    "-r", info.frame_rate, "-i", "pipe:0"]
+            maps += ["-map", f"{inputs}:v:0"]
+            codecs += settings.video_args()
+        inputs += 1
+
+        if pcm_audio:
+            read_fd, self._audio_fd = os.pipe()
+            pass_fds.append(read_fd)
+            cmd += ["-f", "s16le", "-ar", str(info.sample_rate), "-ac", str(info.channels),
+                    "-i", f"pipe:{read_fd}"]
+            maps += ["-map", f"{inputs}:a:0"]
+            codecs += settings.audio_args()
+            inputs += 1
+        elif copy_audio_from:
+            if copy_audio_from != copy_video_from:
+                cmd += source(copy_audio_from)
+                maps += ["-map", f"{inputs}:a?"]
+                inputs += 1
+            else:
+                maps += ["-map", "0:a?"]
+            codecs += ["-c:a", "copy"]
+
+        cmd += maps + codecs + settings.muxer_args(output_path) + [output_path]
+        self._stderr: List[bytes] = []
+        self._proc = subprocess.Popen(
+            cmd, stdin=None if copy_video_from else subprocess.PIPE,
+            stderr=subprocess.PIPE, pass_fds=pass_fds)
+        for fd in pass_fds:
+            os.close(fd)
+        for feeder in self._feeders:
+            feeder.attach(self._proc)
+        self._stderr_thread = threading.Thread(target=_drain, args=(self._proc.stderr, self._stderr), daemon=True)
+        self._stderr_thread.start()
+        self._audio_thread: Optional[threading.Thread] = None
+        self._audio_error: List[Exception] = []
+
+    def write(self, frame: np.ndarray) -> None:
+        self._proc.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+
+    def write_audio(self, pcm_path: str, block_bytes: int = 1 << 20) -> None:
+        """Stream a raw int16 interleaved PCM file to ffmpeg from a background thread, a block at a time."""
+        def feed():
+            try:
+                with open(pcm_path, "rb") as pcm, os.fdopen(self._audio_fd, "wb") as pipe:
+                    shutil.copyfileobj(pcm, pipe, block_bytes)
+            except Exception as e:
+                self._audio_error.append(e)
+
+        self._audio_thread = threading.Thread(target=feed, name="ffmpeg-audio", daemon=True)
+        self._audio_thread.start()
+
+    def release(self) -> None:
+        if self._proc.stdin:
+            self._proc.stdin.close()
+        if self._audio_thread:
+            self._audio_thread.join()
+        elif self._audio_fd is not None:
+            os.close(self._audio_fd)
+        self._proc.wait()
+        self._stderr_thread.join()
+        for feeder in self._feeders:
+            feeder.check()
+        _check(self._proc, self._stderr, "encode")
+        if self._audio_error:
+            raise self._audio_error[0]
+
+    def abort(self) -> None:
+        """Stop ffmpeg without finalising the output."""
+        self._proc.kill()
+        self._proc.wait()
+        if self._audio_thread is None and self._audio_fd is not None:
+            os.close(self._audio_fd)
+
+
+class FFmpegAudioReader:
+    """Decode the first audio stream to int16 PCM blocks of shape (frames, channels).
+
+    Blocks are read from an ffmpeg pipe one at a time, so memory stays flat
+    however long the input is. Inputs that are still being uploaded are
+    decoded as they grow.
+    """
+
+    def __init__(self, input_path: str, info: MediaInfo, block_frames: int = 65536):
+        self.channels = info.channels
+        self._block_bytes = block_frames * info.channels * 2
+        self._stderr: List[bytes] = []
+        input_args, streaming = growing_file.input_args(input_path)
+        self._proc = subprocess.Popen(
+            ["ffmpeg", "-v", "error", "-nostdin"] + input_args +
+            ["-map", "0:a:0", "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(info.sample_rate),
+             "-ac", str(info.channels), "pipe:1"],
+            stdin=subprocess.PIPE if streaming else None,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._feeder = growing_file.start_feeder(input_path, self._proc) if streaming else None
+        self._stderr_thread = threading.Thread(target=_drain, args=(self._proc.stderr, self._stderr), daemon=True)
+        self._stderr_thread.start()
+        self._eof = False
+
+    def __iter__(self):
+        frame_bytes = self.channels * 2
+        while True:
+            data = self._proc.stdout.read(self._block_bytes)
+            if not data:
+                self._eof = True
+                if self._feeder:
+                    self._feeder.check()
+                return
+            usable = len(data) - len(data) % frame_bytes
+            yield np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, self.channels)
+
+    def release(self) -> None:
+        self._proc.stdout.close()
+        self._proc.wait()
+        self._stderr_thread.join()
+        if self._feeder:
+            self._feeder.check()
+        if self._eof:
+            _check(self._proc, self._stderr, "decode")
+
+
+def audio_encoder_args(info: MediaInfo) -> List[str]:
+    """Encoder options reproducing the input's audio codec and bit rate."""
+    if not info.audio_codec:
+        return []
+    args = ["-c:a", _AUDIO_ENCODERS.get(info.audio_codec, info.audio_codec)]
+    if info.audio_bit_rate and not info.audio_codec.startswith(_LOSSLESS_AUDIO):
+        args += ["-b:a", str(info.audio_bit_rate)]
+    return args
+
+
+def encode_pcm(pcm_path: str, info: MediaInfo, output_path: str, metadata_from: Optional[str] = None) -> None:
+    """Encode a raw int16 PCM file with the input's codec; the container follows ``output_path``.
+
+    Tags are copied from ``metadata_from``, usually the original input.
+    """
+    cmd = ["ffmpeg", "-y", "-v", "error", "-nostdin",
+           "-f", "s16le", "-ar", str(info.sample_rate), "-ac", str(info.channels), "-i", pcm_path]
+    if metadata_from:
+        cmd += ["-i", metadata_from, "-map_metadata", "1"]
+    cmd += ["-map", "0:a"] + audio_encoder_args(info) + [output_path]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg encode failed ({result.returncode}): "
+                           f"{result.stderr.decode(errors='replace').strip()}")
+
+
+def stream_copy(input_path: str, output_path: str) -> None:
+    """Remux without re-encoding when nothing needs to change."""
+    input_args, streaming = growing_file.input_args(input_path)
+    growing_file.run(["ffmpeg", "-y", "-v", "error", "-nostdin"] + input_args +
+                     ["-map", "0", "-c", "copy", output_path], input_path, streaming)
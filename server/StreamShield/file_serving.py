@@ -0,0 +1,155 @@
+import hashlib
+import os
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+_CHUNK = 1024 * 1024
+
+
+def etag_for(path: str) -> str:
+    """Strong ETag for a finished output; outputs never change once written."""
+    stat = os.stat(path)
+    digest = hashlib.sha1(f"{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single-range ``Range`` header, or None to send everything.
+
+    Multi-range requests are answered with the whole file, which RFC 9110
+    allows. Raises HTTPException(416) for ranges outside the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            # Suffix range: the final N bytes
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+class _FileRange:
+    """Iterator over a byte range of an already open file.
+
+    Closing (explicitly, at the end, or when the response is dropped before
+    the body was sent) runs ``on_close`` exactly once.
+    """
+
+    def __init__(self, f, start: int, end: int, on_close: Optional[Callable[[], None]]):
+        self._file = f
+        self._file.seek(start)
+        self._remaining = end - start + 1
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self) -> "_FileRange":
+        return self
+
+    def __next__(self) -> bytes:
+        chunk = self._file.read(min(_CHUNK, self._remaining)) if self._remaining > 0 else b""
+        if not chunk:
+            self.close()
+            raise StopIteration
+        self._remaining -= len(chunk)
+        return chunk
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._file.close()
+        if self._on_close:
+            self._on_close()
+
+    __del__ = close
+
+
+def file_response(request: Request, path: str, media_type: Optional[str], filename: str,
+                  on_close: Optional[Callable[[], None]] = None) -> Response:
+    """Serve a file with ETag validation and single-range (resumable) requests.
+
+    The file is opened up front, so deleting it mid-download does not cut the
+    response short. ``on_close`` runs once the body has been sent or the
+    client went away; the caller handles it if this raises.
+    """
+    size = os.path.getsize(path)
+    etag = etag_for(path)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        if on_close:
+            on_close()
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A stale If-Range means the client's partial copy is of another file
+    if if_range is None or if_range == etag:
+        byte_range = parse_range(request.headers.get("range"), size)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    if request.method == "HEAD":
+        if on_close:
+            on_close()
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(_FileRange(open(path, "rb"), start, end, on_close), status_code=status_code,
+                             headers=headers, media_type=media_type)
+
+
+def _follow_file(path: str, is_done: Callable[[], bool], on_close: Optional[Callable[[], None]],
+                 poll: float = 0.25) -> Iterator[bytes]:
+    offset = 0
+    try:
+        while not os.path.exists(path):
+            if is_done():
+                return
+            time.sleep(poll)
+        with open(path, "rb") as f:
+            while True:
+                # Check before reading so the final bytes are not missed
+                done = is_done()
+                f.seek(offset)
+                chunk = f.read(_CHUNK)
+                if chunk:
+                    offset += len(chunk)
+                    yield chunk
+                elif done:
+                    return
+                else:
+                    time.sleep(poll)
+    finally:
+        if on_close:
+            on_close()
+
+
+def follow_response(path: str, is_done: Callable[[], bool], media_type: Optional[str], filename: str,
+                    on_close: Optional[Callable[[], None]] = None) -> StreamingResponse:
+    """Stream an output that is still being written (fragmented MP4) until its job finishes."""
+    return StreamingResponse(
+        _follow_file(path, is_done, on_close), media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}", "Cache-Control": "no-store"})
@@ -0,0 +1,183 @@
+import os
+import subprocess
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from . import config
+
+# A file with this companion marker is still being uploaded. The marker holds
+# the number of bytes from the start of the file that are already complete.
+PARTIAL_SUFFIX = ".partial"
+
+_FEED_CHUNK = 1024 * 1024
+
+
+class UploadStalledError(Exception):
+    """Raised when a partial input stops growing for longer than the stall timeout."""
+
+
+def mark_partial(path: str, contiguous_bytes: int) -> None:
+    tmp = path + PARTIAL_SUFFIX + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(str(contiguous_bytes))
+    os.replace(tmp, path + PARTIAL_SUFFIX)
+
+
+def mark_complete(path: str) -> None:
+    try:
+        os.remove(path + PARTIAL_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+def is_partial(path: str) -> bool:
+    return os.path.exists(path + PARTIAL_SUFFIX)
+
+
+def available_bytes(path: str) -> Optional[int]:
+    """Bytes of ``path`` that can be read, or None once the file is complete."""
+    try:
+        with open(path + PARTIAL_SUFFIX) as f:
+            return int(f.read() or 0)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return 0
+
+
+def wait_until_complete(path: str, poll: float = 0.25) -> None:
+    """Block until ``path`` is fully uploaded, failing if it stops growing."""
+    last, last_change = None, time.monotonic()
+    while True:
+        available = available_bytes(path)
+        if available is None:
+            return
+        if available != last:
+            last, last_change = available, time.monotonic()
+        elif time.monotonic() - last_change > config.UPLOAD_STALL_TIMEOUT:
+            raise UploadStalledError(f"Upload of {path} stalled at {available} bytes")
+        time.sleep(poll)
+
+
+class Feeder:
+    """Copies a growing file into a pipe on a background thread, closing the pipe at the end.
+
+    If the upload stops growing for longer than the stall timeout, ``error``
+    is set to an UploadStalledError and the attached consumer process is
+    killed, so it cannot finish successfully on a truncated input. Consumers
+    call check() once they are done with the pipe.
+    """
+
+    def __init__(self, path: str, pipe, consumer: Optional[subprocess.Popen] = None):
+        self.path = path
+        self.error: Optional[UploadStalledError] = None
+        self._pipe = pipe
+        self._consumer = consumer
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._feed, name="input-feeder", daemon=True)
+        self.thread.start()
+
+    def attach(self, consumer: subprocess.Popen) -> None:
+        """Set the process reading the pipe, for pipes created before it was started."""
+        with self._lock:
+            self._consumer = consumer
+            stalled = self.error is not None
+        if stalled:
+            consumer.kill()
+
+    def check(self) -> None:
+        """Raise the UploadStalledError if the upload stalled."""
+        if self.error is not None:
+            raise self.error
+
+    def _stalled(self, offset: int) -> None:
+        with self._lock:
+            self.error = UploadStalledError(f"Upload of {self.path} stalled at {offset} bytes")
+            consumer = self._consumer
+        if consumer is not None:
+            consumer.kill()
+
+    def _feed(self) -> None:
+        offset, last_change = 0, time.monotonic()
+        try:
+            # Unbuffered: a read-ahead buffer would hold stale bytes of unwritten regions
+            with open(self.path, "rb", buffering=0) as f:
+                while True:
+                    available = available_bytes(self.path)
+                    limit = os.path.getsize(self.path) if available is None else available
+                    if offset < limit:
+                        data = os.pread(f.fileno(), min(_FEED_CHUNK, limit - offset), offset)
+                        self._pipe.write(data)
+                        # Flushed so the consumer is not kept waiting while the upload catches up
+                        self._pipe.flush()
+                        offset += len(data)
+                        last_change = time.monotonic()
+                    elif available is None:
+                        break
+                    elif time.monotonic() - last_change > config.UPLOAD_STALL_TIMEOUT:
+                        self._stalled(offset)
+                        break
+                    else:
+                        time.sleep(0.1)
+        except (BrokenPipeError, ValueError):
+            # The consumer only needed a prefix (e.g. ffprobe) and closed its end
+            pass
+        finally:
+            try:
+                self._pipe.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+
+def input_args(path: str) -> Tuple[List[str], bool]:
+    """ffmpeg input arguments for ``path``; partial files are streamed via stdin."""
+    if is_partial(path):
+        return ["-i", "pipe:0"], True
+    return ["-i", path], False
+
+
+def start_feeder(path: str, proc: subprocess.Popen) -> Feeder:
+    """Stream a growing file into a subprocess's stdin."""
+    return Feeder(path, proc.stdin, proc)
+
+
+def pipe_input(path: str) -> Tuple[int, Feeder]:
+    """Readable fd streaming a growing file, for use as an extra ffmpeg input via pass_fds.
+
+    Attach the ffmpeg process to the returned Feeder once it is started.
+    """
+    read_fd, write_fd = os.pipe()
+    return read_fd, Feeder(path, os.fdopen(write_fd, "wb"))
+
+
+def _read_all(stream, outputs: dict, name: str) -> None:
+    outputs[name] = stream.read()
+    stream.close()
+
+
+def run(cmd: List[str], path: str, streaming: bool, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run(check=True) that feeds ``path`` on stdin when ``streaming``."""
+    if not streaming:
+        return subprocess.run(cmd, check=True, **kwargs)
+    capture = kwargs.pop("capture_output", False)
+    if capture:
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        kwargs.setdefault("stderr", subprocess.PIPE)
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, **kwargs)
+    # Not joined: a consumer that stops early leaves the feeder waiting for data
+    feeder = start_feeder(path, proc)
+    # communicate() would close stdin under the feeder, so read the outputs directly
+    outputs = {}
+    readers = [threading.Thread(target=_read_all, args=(stream, outputs, name), daemon=True)
+               for name, stream in (("stdout", proc.stdout), ("stderr", proc.stderr)) if stream]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    proc.wait()
+    feeder.check()
+    stdout, stderr = outputs.get("stdout"), outputs.get("stderr")
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
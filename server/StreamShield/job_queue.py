@@ -0,0 +1,418 @@
+import cProfile
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Set
+
+from . import config
+from .media_processor import MediaProcessor, ProcessOption
+from .metrics import metrics
+from .model_registry import model_registry
+from .worker_setup import PRELOAD_ENV, configure_worker, cpu_sets, limit_thread_env, threads_per_worker
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobCancelledError(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+# Profile files written next to a job's output, by format
+PROFILE_FORMATS = {"pstats": ".prof", "folded": ".folded"}
+
+metrics.counter("streamshield_jobs_total", "Finished jobs by process option and outcome")
+metrics.histogram("streamshield_job_queue_wait_seconds", "Time from submission until a worker picked the job up")
+metrics.histogram("streamshield_job_duration_seconds", "Time a worker spent on a job")
+metrics.histogram("streamshield_stage_seconds", "Time per pipeline stage and job, including nested stages")
+metrics.histogram("streamshield_video_frames_per_second", "Frames blurred per second of the video stage",
+                  buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 240))
+metrics.histogram("streamshield_audio_realtime_factor", "Transcription time divided by audio duration",
+                  buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5))
+metrics.counter("streamshield_video_frames_total", "Video frames processed")
+metrics.counter("streamshield_audio_seconds_total", "Seconds of audio transcribed")
+metrics.counter("streamshield_output_bytes_total", "Bytes of job output written")
+
+# Shared state handed to every worker process by _init_worker
+_progress = None
+_cancelled = None
+_started = None
+_model_reports = None
+
+
+def _init_worker(progress, cancelled, started, model_reports, model_path: str, vosk_model_path: str,
+                 threads: int, worker_cpus: List[Optional[Set[int]]], slots) -> None:
+    """Process pool initializer: keep the shared dicts, pin the worker and warm up the models."""
+    global _progress, _cancelled, _started, _model_reports
+    _progress = progress
+    _cancelled = cancelled
+    _started = started
+    _model_reports = model_reports
+    try:
+        slot = slots.get(timeout=5)
+    except queue.Empty:
+        slot = None
+    configure_worker(threads, worker_cpus[slot] if slot is not None else None)
+    try:
+        model_registry.warmup(model_path, vosk_model_path)
+    except Exception as e:
+        # Models are loaded lazily on first use if warmup fails
+        logger.error(f"Error warming up worker models: {e}")
+    _publish_model_report()
+
+
+def _publish_model_report() -> None:
+    """Share this worker's model registry report with the API process."""
+    try:
+        _model_reports[os.getpid()] = model_registry.report()
+    except Exception:
+        # Manager already shut down
+        pass
+
+
+def _noop() -> None:
+    pass
+
+
+def _make_progress_callback(job_id: str) -> Callable[[float], None]:
+    """Progress callback that publishes progress and honours cancellation."""
+    last = {"fraction": -1.0, "time": 0.0}
+
+    def report(fraction: float) -> None:
+        now = time.monotonic()
+        # Each update is an IPC round trip, so only publish meaningful changes
+        if fraction < 1.0 and fraction - last["fraction"] < 0.01 and now - last["time"] < 0.5:
+            return
+        last["fraction"], last["time"] = fraction, now
+        if job_id in _cancelled:
+            raise JobCancelledError(f"Job {job_id} was cancelled")
+        _progress[job_id] = fraction
+
+    return report
+
+
+def _run_job(job_id: str, model_path: str, badwords_path: str, bad_words: Optional[List[str]],
+             input_path: str, output_path: str, process_option: ProcessOption,
+             profile_path: Optional[str] = None) -> dict:
+    """Worker entry point: process one media file and return its run statistics.
+
+    With ``profile_path`` the job runs under cProfile, and the pstats dump
+    and the stage spans as collapsed stacks are written next to it.
+    """
+    if job_id in _cancelled:
+        raise JobCancelledError(f"Job {job_id} was cancelled")
+    _started[job_id] = time.time()
+    _progress[job_id] = 0.0
+    processor = MediaProcessor(model_path, badwords_path, bad_words=bad_words)
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        processor.process_media(input_path, output_path, process_option,
+                                progress_callback=_make_progress_callback(job_id))
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path + PROFILE_FORMATS["pstats"])
+            with open(profile_path + PROFILE_FORMATS["folded"], "w") as f:
+                f.write(processor.spans.collapsed())
+        # Models that failed to warm up are loaded (or fall back) during the job
+        _publish_model_report()
+    return processor.stats
+
+
+class Job:
+    """Bookkeeping for a submitted media processing job."""
+
+    def __init__(self, job_id: str, input_path: str, output_path: str,
+                 process_option: ProcessOption):
+        self.job_id = job_id
+        self.input_path = input_path
+        self.output_path = output_path
+        self.process_option = process_option
+        self.content_type: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.workspace = None
+        self.future: Optional[Future] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+        self.last_access: Optional[float] = None
+        self.downloads = 0  # Responses currently streaming the output
+        self.profile_path: Optional[str] = None  # Base path of the profile files, if profiled
+        self.error: Optional[str] = None  # Set by JobQueue.invalidate() when a finished result must not be used
+
+
+class JobQueue:
+    """Bounded process pool running MediaProcessor jobs off the event loop."""
+
+    def __init__(self, model_path: str, vosk_model_path: str, workers: int, max_queue_depth: int):
+        self.model_path = model_path
+        self.vosk_model_path = vosk_model_path
+        self.workers = workers
+        self.max_queue_depth = max_queue_depth
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._manager = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()  # Never held while taking _lock
+        self._progress = None
+        self._cancelled = None
+        self._started = None
+        self._model_reports = None
+
+    def start(self) -> None:
+        """Start the shared-state manager and the worker pool."""
+        # Never fork this process directly: it already holds torch/OpenMP threads.
+        # spawn loads the models in every worker; forkserver loads them once in a
+        # clean server process that workers are forked from, sharing the weights.
+        self._manager = multiprocessing.get_context("spawn").Manager()
+        self._progress = self._manager.dict()
+        self._cancelled = self._manager.dict()
+        self._started = self._manager.dict()
+        self._model_reports = self._manager.dict()
+        limit_thread_env(threads_per_worker(self.workers))
+        if config.WORKER_START_METHOD == "forkserver":
+            os.environ[PRELOAD_ENV] = os.pathsep.join([self.model_path, self.vosk_model_path])
+            multiprocessing.get_context("forkserver").set_forkserver_preload([f"{__package__}.worker_preload"])
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        slots = self._manager.Queue()
+        for slot in range(self.workers):
+            slots.put(slot)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(config.WORKER_START_METHOD),
+            initializer=_init_worker,
+            initargs=(self._progress, self._cancelled, self._started, self._model_reports,
+                      self.model_path, self.vosk_model_path,
+                      threads_per_worker(self.workers), cpu_sets(self.workers), slots),
+        )
+        # Workers are spawned on demand; start them all now so every one warms
+        # its models before the first job instead of during it
+        for _ in range(self.workers):
+            executor.submit(_noop)
+        return executor
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+        """Swap a pool broken by a dead worker (OOM kill, segfault) for a fresh one.
+
+        Every job queued or running on the broken pool has already failed with
+        BrokenProcessPool; later jobs go to the new pool.
+        """
+        with self._executor_lock:
+            if self._executor is broken:
+                logger.error("A job worker died; restarting the worker pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                try:
+                    # The old workers are gone, their reports with them
+                    self._model_reports.clear()
+                    self._executor = self._new_executor()
+                except Exception as e:
+                    # Manager already shut down
+                    logger.error(f"Error restarting the worker pool: {e}")
+                    self._executor = None
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Cancel pending jobs and stop the workers."""
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        if self._manager:
+            self._manager.shutdown()
+            self._manager = None
+
+    def submit(self, input_path: str, output_path: str, process_option: ProcessOption,
+               badwords_path: str, bad_words: Optional[List[str]] = None,
+               job_id: Optional[str] = None, profile: bool = False) -> Job:
+        """Queue a job, raising QueueFullError when the queue is at capacity.
+
+        ``profile`` (or STREAMSHIELD_PROFILE_JOBS) writes a cProfile dump and
+        flame graph stacks next to the output, see PROFILE_FORMATS.
+        """
+        if self._executor is None:
+            raise RuntimeError("Job queue is not running")
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if not job.future.done())
+            if active >= self.workers + self.max_queue_depth:
+                raise QueueFullError(f"Job queue is full ({active} active jobs)")
+            job = Job(job_id or uuid.uuid4().hex, input_path, output_path, process_option)
+            if profile or config.PROFILE_JOBS:
+                job.profile_path = os.path.join(os.path.dirname(output_path), f"profile_{job.job_id}")
+            args = (_run_job, job.job_id, self.model_path, badwords_path, bad_words,
+                    input_path, output_path, process_option, job.profile_path)
+            executor = self._executor
+            try:
+                job.future = executor.submit(*args)
+            except BrokenProcessPool:
+                executor = self._replace_executor(executor)
+                if executor is None:
+                    raise RuntimeError("Job queue is not running")
+                job.future = executor.submit(*args)
+            self._jobs[job.job_id] = job
+        job.future.add_done_callback(lambda _: self._on_done(job, executor))
+        return job
+
+    def model_reports(self) -> Dict[int, dict]:
+        """Model registry report of every worker process, by pid."""
+        try:
+            return dict(self._model_reports) if self._model_reports is not None else {}
+        except Exception:
+            # Manager already shut down
+            return {}
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self) -> int:
+        """Jobs queued or running."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def remove(self, job_id: str) -> Optional[Job]:
+        """Forget a finished job."""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def acquire(self, job_id: str) -> Optional[Job]:
+        """Look up a job and pin it against reaping until release()."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.downloads += 1
+                job.last_access = time.time()
+            return job
+
+    def release(self, job: Job) -> None:
+        with self._lock:
+            job.downloads -= 1
+            job.last_access = time.time()
+
+    def reap(self, ttl: float) -> List[Job]:
+        """Forget and return finished jobs idle for ``ttl`` seconds and not being downloaded."""
+        now = time.time()
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.future.done() and job.downloads == 0
+                and now - max(job.finished_at or now, job.last_access or 0) > ttl
+            ]
+            for job in expired:
+                del self._jobs[job.job_id]
+        return expired
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False if it already finished."""
+        job = self.get(job_id)
+        if job is None or job.future.done():
+            return False
+        job.cancel_requested = True
+        if not job.future.cancel():
+            # Already running: the worker stops at its next progress report
+            self._cancelled[job_id] = True
+        return True
+
+    def invalidate(self, job_id: str, reason: str) -> bool:
+        """Mark a finished job as failed, e.g. when its input turned out to be corrupt."""
+        job = self.get(job_id)
+        if job is None or not job.future.done():
+            return False
+        job.error = reason
+        return True
+
+    def status(self, job: Job) -> dict:
+        """JSON-serialisable status of a job."""
+        progress = self._progress.get(job.job_id) if self._progress is not None else None
+        if job.error is not None:
+            state = "failed"
+        elif job.future.cancelled():
+            state = "cancelled"
+        elif job.future.done():
+            error = job.future.exception()
+            if error is None:
+                state, progress = "completed", 1.0
+            elif isinstance(error, JobCancelledError):
+                state = "cancelled"
+            else:
+                state = "failed"
+        elif progress is not None:
+            state = "running"
+        else:
+            state = "queued"
+
+        status = {
+            "job_id": job.job_id,
+            "status": state,
+            "progress": round(progress or 0.0, 4),
+            "process_option": job.process_option,
+            "submitted_at": job.submitted_at,
+            "started_at": self.started_at(job),
+            "finished_at": job.finished_at,
+        }
+        if state == "failed":
+            status["error"] = job.error or str(job.future.exception())
+        elif state == "completed" and job.future.result():
+            status["stats"] = job.future.result()
+        return status
+
+    def started_at(self, job: Job) -> Optional[float]:
+        """When a worker picked the job up, or None while it is queued."""
+        if job.started_at is None and self._started is not None:
+            try:
+                job.started_at = self._started.get(job.job_id)
+            except Exception:
+                pass
+        return job.started_at
+
+    def _on_done(self, job: Job, executor: ProcessPoolExecutor) -> None:
+        job.finished_at = time.time()
+        if not job.future.cancelled() and isinstance(job.future.exception(), BrokenProcessPool):
+            job.error = "The worker process died while the job was queued or running"
+            self._replace_executor(executor)
+        self.started_at(job)
+        try:
+            if self._progress is not None:
+                self._started.pop(job.job_id, None)
+                self._progress.pop(job.job_id, None)
+                self._cancelled.pop(job.job_id, None)
+        except Exception:
+            # Manager already shut down
+            pass
+        self._record_metrics(job)
+
+    def _record_metrics(self, job: Job) -> None:
+        """Fold a finished job's timings into the process-wide metrics."""
+        state = self.status(job)["status"]
+        metrics.inc("streamshield_jobs_total", option=job.process_option, status=state)
+        if job.started_at is None:
+            return
+        metrics.observe("streamshield_job_queue_wait_seconds", job.started_at - job.submitted_at)
+        metrics.observe("streamshield_job_duration_seconds", job.finished_at - job.started_at,
+                        option=job.process_option)
+        if state != "completed":
+            return
+        timings = job.future.result().get("timings", {})
+        for stage, stage_timing in timings.get("stages", {}).items():
+            metrics.observe("streamshield_stage_seconds", stage_timing["seconds"], stage=stage)
+        if "frames_per_second" in timings:
+            metrics.observe("streamshield_video_frames_per_second", timings["frames_per_second"])
+        if "audio_realtime_factor" in timings:
+            metrics.observe("streamshield_audio_realtime_factor", timings["audio_realtime_factor"])
+        counters = timings.get("counters", {})
+        metrics.inc("streamshield_video_frames_total", counters.get("frames", 0))
+        metrics.inc("streamshield_audio_seconds_total", counters.get("audio_seconds", 0))
+        metrics.inc("streamshield_output_bytes_total", counters.get("bytes_written", 0))
@@ -1,30 +1,149 @@
+import logging
 import os
-from typing import Literal, Optional
-from pydub import AudioSegment
+import shutil
+import wave
+from dataclasses import asdict
+from typing import Callable, Iterable, List, Literal, Optional
+import numpy as np
 
-from .video_processor import process_video, VideoBlurProcessor
-from .audio_processor import load_bad_words, extract_audio, transcribe_audio, censor_audio
-from .merge import merge_audio_video
+from . import config
+from .growing_file import is_partial, wait_until_complete
+from .metrics import Spans, count, span
+from .ffmpeg_pipeline import (EncoderSettings, FFmpegAudioReader, FFmpegFrameReader, FFmpegMuxer, MediaInfo,
+                              encode_pcm, probe, stream_copy)
+from .result_cache import make_key, result_cache
+from .video_processor import (process_stream, VideoBlurProcessor, TemporalBlurProcessor,
+                              GatedBlurProcessor, RecordingProcessor, ReplayProcessor)
+from .workspace import Workspace
+from .audio_processor import (load_bad_words, transcribe_audio, transcribe_workers,
+                              StreamTranscriber, StreamResampler, find_bad_words, word_intervals,
+                              censor_samples, compile_matcher)
 
 ProcessOption = Literal['blur', 'beep_video', 'beep_audio']
 
+logger = logging.getLogger(__name__)
+
+
+def _stage_progress(progress_callback: Optional[Callable[[float], None]], start: float,
+                    end: float) -> Optional[Callable[[float], None]]:
+    """Map a stage's own progress onto [start, end] of the job's.
+
+    With start == end the stage reports no progress but still calls back,
+    so job cancellation (raised from the callback) is seen during it.
+    """
+    if progress_callback is None:
+        return None
+    return lambda fraction: progress_callback(start + (end - start) * fraction)
+
+
 class MediaProcessor:
-    def __init__(self, model_path: str, badwords_path: str):
+    def __init__(
+            self,
+            model_path: str,
+            badwords_path: str,
+            encoder_settings: Optional[EncoderSettings] = None,
+            bad_words: Optional[Iterable[str]] = None):
         self.model_path = model_path
         self.badwords_path = badwords_path
-        self.blur_processor = VideoBlurProcessor(model_path)
-        self.bad_words = load_bad_words(badwords_path)
+        self.detector = VideoBlurProcessor(model_path, blur_method=config.BLUR_METHOD)
+        self.blur_processor = self.detector
+        self.gate = None
+        if config.GATE_ENABLED:
+            # Screen recordings are mostly static: reuse boxes while no tile changes
+            self.gate = self.blur_processor = GatedBlurProcessor(
+                self.detector,
+                tile_size=config.GATE_TILE_SIZE,
+                threshold=config.GATE_HASH_THRESHOLD,
+                region_detect=config.GATE_REGION_DETECT,
+            )
+        if config.KEYFRAME_INTERVAL > 1:
+            self.blur_processor = TemporalBlurProcessor(
+                self.blur_processor,
+                keyframe_interval=config.KEYFRAME_INTERVAL,
+                diff_threshold=config.KEYFRAME_DIFF_THRESHOLD,
+                box_margin=config.TRACK_BOX_MARGIN,
+            )
+        # A custom word list replaces the file; compiled matchers are cached by content
+        words = bad_words if bad_words is not None else load_bad_words(badwords_path)
+        self.bad_words = compile_matcher(words, config.MATCH_MIN_CONFIDENCE)
         self.vosk_model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vosk-model-small-en-in-0.4")
+        self.encoder_settings = encoder_settings or EncoderSettings()
+        self.cache = result_cache if config.CACHE_ENABLED else None
+        # Per-run statistics and stage timings of the last process_media call
+        self.stats: dict = {}
+        self.spans = Spans()
+
+    def process_media(
+            self,
+            input_path: str,
+            output_path: str,
+            process_option: ProcessOption,
+            progress_callback: Optional[Callable[[float], None]] = None,
+            workspace: Optional[Workspace] = None) -> None:
+        """Process media file based on the selected option.
 
-    def process_media(self, input_path: str, output_path: str, process_option: ProcessOption) -> None:
-        """Process media file based on the selected option."""
-        
+        Intermediate files go to ``workspace``; without one a private
+        workspace is created and removed when processing ends. ``input_path``
+        may still be uploading (see growing_file), in which case each stage
+        reads it as it grows and the result cache is bypassed.
+        """
+        if workspace is None:
+            with Workspace(prefix="media-") as workspace:
+                return self.process_media(input_path, output_path, process_option, progress_callback, workspace)
+
+        self.stats = {}
+        self.spans = Spans()
+        try:
+            with self.spans.activate():
+                self._process(input_path, output_path, process_option, progress_callback, workspace)
+        finally:
+            if self.cache:
+                self.cache.flush()
+        self.stats["timings"] = self._timings(output_path)
+
+    def _process(
+            self,
+            input_path: str,
+            output_path: str,
+            process_option: ProcessOption,
+            progress_callback: Optional[Callable[[float], None]],
+            workspace: Workspace) -> None:
         is_video = self._is_video_file(input_path)
-        
+
+        output_key = None
+        if self._cache_for(input_path):
+            with span("cache_lookup"):
+                output_key = self._output_key(input_path, output_path, process_option)
+                hit = self.cache.get_file("outputs", output_key, output_path)
+            if hit:
+                self.stats["cached"] = True
+                if progress_callback:
+                    progress_callback(1.0)
+                return
+
         if is_video:
-            self._process_video_file(input_path, output_path, process_option)
+            self._process_video_file(input_path, output_path, process_option, workspace, progress_callback)
         else:
-            self._process_audio_file(input_path, output_path, process_option)
+            self._process_audio_file(input_path, output_path, process_option, workspace, progress_callback)
+
+        if output_key:
+            with span("cache_store"):
+                self.cache.put_file("outputs", output_key, output_path)
+
+        if progress_callback:
+            progress_callback(1.0)
+
+    def _timings(self, output_path: str) -> dict:
+        """Stage timings of the last run plus the throughput figures derived from them."""
+        timings = self.spans.report()
+        stages, counters = timings["stages"], timings["counters"]
+        if os.path.exists(output_path):
+            counters["bytes_written"] = os.path.getsize(output_path)
+        if counters.get("frames") and stages.get("video", {}).get("seconds"):
+            timings["frames_per_second"] = round(counters["frames"] / stages["video"]["seconds"], 2)
+        if counters.get("audio_seconds") and "transcribe" in stages:
+            timings["audio_realtime_factor"] = round(stages["transcribe"]["seconds"] / counters["audio_seconds"], 4)
+        return timings
 
     def _is_video_file(self, file_path: str) -> bool:
         """Check if the file is a video file based on extension."""
@@ -32,52 +151,300 @@ class MediaProcessor:
         _, ext = os.path.splitext(file_path.lower())
         return ext in video_extensions
 
-    def _process_video_file(self, input_path: str, output_path: str, process_option: ProcessOption) -> None:
-        """Process video file with the specified option."""
-        temp_video = "temp_processed_video.mp4"
-        temp_audio = "temp_processed_audio.wav"
-        extracted_audio = extract_audio(input_path)
-        
+    def _process_video_file(
+            self,
+            input_path: str,
+            output_path: str,
+            process_option: ProcessOption,
+            workspace: Workspace,
+            progress_callback: Optional[Callable[[float], None]] = None) -> None:
+        """Process video file with the specified option.
+
+        Frames are decoded through an ffmpeg pipe, blurred, and piped together
+        with the censored PCM, streamed from its workspace spool, into a single
+        ffmpeg encode/mux process. Streams that are not modified are copied
+        instead of re-encoded.
+        """
+        with span("probe"):
+            info = probe(input_path)
+        blur = process_option in ('blur', 'beep_audio') and info.has_video
+        censored = None
+        if process_option in ('beep_video', 'beep_audio') and info.has_audio:
+            # Frames report the progress of blurred videos; the audio stage only checks for cancellation
+            censored = self._censored_pcm(input_path, info, workspace,
+                                          _stage_progress(progress_callback, 0.0, 0.0 if blur else 0.9))
+
+        if not blur and censored is None:
+            # Nothing to change: remux without decoding
+            with span("stream_copy"):
+                stream_copy(input_path, output_path)
+            return
+
         try:
-            if process_option == 'blur':
-                # Only blur the video, keep original audio
-                process_video(input_path, temp_video, self.blur_processor)
-                merge_audio_video(temp_video, extracted_audio, output_path)
-            
-            elif process_option == 'beep_video':
-                # Keep original video, only beep the audio
-                audio = AudioSegment.from_wav(extracted_audio)
-                transcription_data = transcribe_audio(extracted_audio, self.vosk_model_path)
-                censored_audio, _ = censor_audio(audio, transcription_data, self.bad_words)
-                censored_audio.export(temp_audio, format="wav")
-                merge_audio_video(input_path, temp_audio, output_path)
-            
-            elif process_option == 'beep_audio':
-                # Apply both video blur and audio beep
-                process_video(input_path, temp_video, self.blur_processor)
-                audio = AudioSegment.from_wav(extracted_audio)
-                transcription_data = transcribe_audio(extracted_audio, self.vosk_model_path)
-                censored_audio, _ = censor_audio(audio, transcription_data, self.bad_words)
-                censored_audio.export(temp_audio, format="wav")
-                merge_audio_video(temp_video, temp_audio, output_path)
+            muxer = FFmpegMuxer(
+                output_path, info, self.encoder_settings,
+                copy_video_from=None if blur else input_path,
+                copy_audio_from=input_path if censored is None else None,
+                pcm_audio=censored is not None,
+            )
+            try:
+                if censored is not None:
+                    muxer.write_audio(censored)
+                if blur:
+                    processor, detections_key = self._video_processor_for(input_path)
+                    reader = FFmpegFrameReader(input_path, info)
+                    try:
+                        with span("video"):
+                            process_stream(reader, muxer, processor, info.frame_count, progress_callback)
+                    finally:
+                        reader.release()
+                    self.stats["video"] = self._video_stats(processor)
+            except BaseException:
+                muxer.abort()
+                raise
+            with span("mux"):
+                muxer.release()
+        finally:
+            self._cleanup_temp_files([censored])
+        if blur and isinstance(processor, RecordingProcessor):
+            self.cache.put_json("detections", detections_key, processor.boxes)
+
+    def _cache_for(self, input_path: str):
+        """The result cache, unless the input is still growing and cannot be hashed yet."""
+        if self.cache and not is_partial(input_path):
+            return self.cache
+        return None
+
+    def _video_processor_for(self, input_path: str):
+        """Replay cached detections for this video if present, otherwise record them."""
+        if not self._cache_for(input_path):
+            return self.blur_processor, None
+        key = make_key(self.cache.file_hash(input_path), self.cache.model_fingerprint(self.model_path),
+                       self._detection_settings())
+        boxes = self.cache.get_json("detections", key)
+        if boxes is not None:
+            return ReplayProcessor(self.blur_processor, boxes), key
+        return RecordingProcessor(self.blur_processor), key
+
+    def _video_stats(self, processor) -> dict:
+        """How much of the video the detector actually had to look at."""
+        if isinstance(processor, ReplayProcessor):
+            return {"replayed": True}
+        stats = {}
+        if isinstance(self.blur_processor, TemporalBlurProcessor):
+            stats["frames"] = self.blur_processor.frames
+            stats["detection_ratio"] = round(self.blur_processor.detection_ratio, 4)
+        if self.gate:
+            stats["gating"] = self.gate.report()
+        return stats
+
+    def _detection_settings(self) -> dict:
+        """Everything besides the input and model that changes which boxes get blurred."""
+        detector = self.detector
+        settings = {
+            "classes": list(detector.blur_classes),
+            "confidence": detector.confidence_threshold,
+            "detector": [detector.active_backend, detector.imgsz, detector.int8],
+        }
+        if isinstance(self.blur_processor, TemporalBlurProcessor):
+            settings["tracking"] = [self.blur_processor.keyframe_interval, self.blur_processor.diff_threshold,
+                                    self.blur_processor.box_margin]
+        if self.gate:
+            settings["gating"] = [self.gate.tile_size, self.gate.threshold, self.gate.region_detect]
+        return settings
 
+    def settings_hash(self, process_option: ProcessOption) -> str:
+        """Hash of every setting besides the input that affects the output: models, word list, detection, encoding."""
+        detector = self.detector
+        return make_key(
+            process_option,
+            result_cache.model_fingerprint(self.model_path),
+            result_cache.model_fingerprint(self.vosk_model_path),
+            self._detection_settings(),
+            [detector.blur_method, list(detector.blur_kernel), detector.blur_sigma],
+            self.bad_words.content_hash,
+            self.bad_words.min_conf,
+            asdict(self.encoder_settings),
+        )
+
+    def _output_key(self, input_path: str, output_path: str, process_option: ProcessOption) -> str:
+        """Cache key covering every setting that affects the final output, including its container."""
+        return make_key(
+            self.cache.file_hash(input_path),
+            os.path.splitext(output_path)[1].lower(),
+            self.settings_hash(process_option),
+        )
+
+    def _transcript_key(self, input_path: str) -> str:
+        return make_key(self.cache.file_hash(input_path), self.cache.model_fingerprint(self.vosk_model_path))
+
+    def _cached_transcript(self, input_path: str) -> Optional[List[dict]]:
+        """Vosk transcript of the input from the cache, or None."""
+        if not self._cache_for(input_path):
+            return None
+        return self.cache.get_json("transcripts", self._transcript_key(input_path))
+
+    def _transcribe(self, input_path: str, wav_path: str,
+                    progress_callback: Optional[Callable[[float], None]] = None) -> List[dict]:
+        """Transcribe ``wav_path`` and cache the words under the original input's hash."""
+        with span("transcribe"):
+            transcription_data = transcribe_audio(wav_path, self.vosk_model_path, progress_callback=progress_callback)
+        # 16 kHz mono 16-bit PCM after a 44-byte WAV header
+        count("audio_seconds", max(0, os.path.getsize(wav_path) - 44) / 32000)
+        self._store_transcript(input_path, transcription_data)
+        return transcription_data
+
+    def _store_transcript(self, input_path: str, transcription_data: List[dict]) -> None:
+        if self._cache_for(input_path):
+            self.cache.put_json("transcripts", self._transcript_key(input_path), transcription_data)
+
+    def _censored_pcm(self, input_path: str, info: MediaInfo, workspace: Workspace,
+                      progress_callback: Optional[Callable[[float], None]] = None) -> Optional[str]:
+        """Spool the censored audio track to a raw PCM file in the workspace and return its path.
+
+        The track is decoded once: each PCM block is spooled at its original
+        rate and, resampled to 16 kHz mono, fed to the recognizer unless the
+        transcript is cached. Flagged words are censored through a memory map,
+        so memory use does not grow with the input length. Returns None, with
+        nothing left behind, if no word matched.
+        """
+        transcription_data = self._cached_transcript(input_path)
+        if transcription_data is not None:
+            with span("match"):
+                flagged = find_bad_words(transcription_data, self.bad_words)
+            if not flagged:
+                return None
+
+        pcm_path = workspace.file("audio.pcm")
+        workspace.reserve(int(info.duration * info.sample_rate * info.channels * 2))
+        try:
+            if transcription_data is None:
+                transcription_data = self._spool_audio(input_path, info, pcm_path, workspace, transcribe=True,
+                                                       progress_callback=progress_callback)
+                with span("match"):
+                    flagged = find_bad_words(transcription_data, self.bad_words)
+                if not flagged:
+                    self._cleanup_temp_files([pcm_path])
+                    return None
+            else:
+                self._spool_audio(input_path, info, pcm_path, workspace, transcribe=False,
+                                  progress_callback=progress_callback)
+
+            with span("censor"):
+                # Memory-mapped, so only the pages around flagged words are loaded
+                samples = np.memmap(pcm_path, dtype=np.int16, mode="r+").reshape(-1, info.channels)
+                censor_samples(samples, info.sample_rate, word_intervals(flagged, info.sample_rate))
+                samples.flush()
+                del samples
+        except BaseException:
+            self._cleanup_temp_files([pcm_path])
+            raise
+        return pcm_path
+
+    def _process_audio_file(
+            self,
+            input_path: str,
+            output_path: str,
+            process_option: ProcessOption,
+            workspace: Workspace,
+            progress_callback: Optional[Callable[[float], None]] = None) -> None:
+        """Process audio file with the specified option.
+
+        The censored track is spooled by _censored_pcm and encoded with the
+        input's codec; inputs that need no change are copied untouched.
+        """
+        with span("probe"):
+            info = probe(input_path)
+        if process_option not in ('beep_audio', 'beep_video') or not info.has_audio:
+            self._copy_input(input_path, output_path)
+            return
+
+        pcm_path = self._censored_pcm(input_path, info, workspace, _stage_progress(progress_callback, 0.0, 0.9))
+        if pcm_path is None:
+            self._copy_input(input_path, output_path)
+            return
+        try:
+            with span("encode_audio"):
+                encode_pcm(pcm_path, info, output_path, metadata_from=input_path)
         finally:
-            # Clean up temporary files
-            self._cleanup_temp_files([temp_video, temp_audio, extracted_audio])
-
-    def _process_audio_file(self, input_path: str, output_path: str, process_option: ProcessOption) -> None:
-        """Process audio file with the specified option."""
-        if process_option in ['beep_audio', 'beep_video']:
-            audio = AudioSegment.from_file(input_path)
-            wav_path = "temp_audio.wav"
-            audio.export(wav_path, format="wav", parameters=["-ac", "1", "-ar", "16000"])
-            transcription_data = transcribe_audio(wav_path, self.vosk_model_path)
-            censored_audio, _ = censor_audio(audio, transcription_data, self.bad_words)
-            censored_audio.export(output_path, format="wav")
-        else:
-            # For 'blur' option on audio file, just copy the file
-            audio = AudioSegment.from_file(input_path)
-            audio.export(output_path, format="wav")
+            self._cleanup_temp_files([pcm_path])
+
+    def _spool_audio(
+            self,
+            input_path: str,
+            info: MediaInfo,
+            pcm_path: str,
+            workspace: Workspace,
+            transcribe: bool,
+            progress_callback: Optional[Callable[[float], None]] = None) -> Optional[List[dict]]:
+        """Decode the input into a raw PCM file, transcribing it on the way when ``transcribe`` is set.
+
+        Serial transcription runs block by block during the decode. For
+        parallel transcription the 16 kHz audio is written to a WAV first,
+        and the decode and the transcription each report half the progress.
+        Returns the transcript, or None without ``transcribe``.
+        """
+        parallel = (transcribe and transcribe_workers() > 1
+                    and info.duration > 2 * config.TRANSCRIBE_CHUNK_SECONDS)
+        resampler = StreamResampler(info.sample_rate) if transcribe else None
+        transcriber = StreamTranscriber(self.vosk_model_path) if transcribe and not parallel else None
+        wav_path = workspace.file("audio_16k.wav") if parallel else None
+        wav = None
+        if wav_path:
+            wav = wave.open(wav_path, "wb")
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+
+        decode_progress = _stage_progress(progress_callback, 0.0, 0.5) if parallel else progress_callback
+        expected = max(1, int(info.duration * info.sample_rate))
+        frames = 0
+        reader = FFmpegAudioReader(input_path, info)
+        try:
+            with span("decode_audio"), open(pcm_path, "wb") as spool:
+                for block in reader:
+                    spool.write(memoryview(block).cast("B"))
+                    frames += len(block)
+                    if decode_progress:
+                        decode_progress(min(1.0, frames / expected))
+                    if resampler is None:
+                        continue
+                    with span("resample"):
+                        pcm16k = resampler.process(block)
+                    if wav:
+                        wav.writeframes(pcm16k)
+                    else:
+                        with span("transcribe"):
+                            transcriber.feed(pcm16k)
+                if resampler is not None:
+                    if wav:
+                        wav.writeframes(resampler.flush())
+                    else:
+                        transcriber.feed(resampler.flush())
+        finally:
+            reader.release()
+            if wav:
+                wav.close()
+
+        if not transcribe:
+            return None
+        if parallel:
+            try:
+                return self._transcribe(input_path, wav_path, _stage_progress(progress_callback, 0.5, 1.0))
+            finally:
+                self._cleanup_temp_files([wav_path])
+        with span("transcribe"):
+            transcription_data = transcriber.finish()
+        count("audio_seconds", frames / info.sample_rate)
+        self._store_transcript(input_path, transcription_data)
+        return transcription_data
+
+    def _copy_input(self, input_path: str, output_path: str) -> None:
+        """Pass the input through byte for byte once it is fully uploaded."""
+        with span("wait_upload"):
+            wait_until_complete(input_path)
+        with span("stream_copy"):
+            shutil.copyfile(input_path, output_path)
 
     def _cleanup_temp_files(self, file_paths: list[str]) -> None:
         """Clean up temporary files if they exist."""
@@ -86,4 +453,4 @@ class MediaProcessor:
                 try:
                     os.remove(file_path)
                 except Exception as e:
-                    print(f"Error removing temporary file {file_path}: {e}")
+                    logger.error(f"Error removing temporary file {file_path}: {e}")
@@ -0,0 +1,185 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Default histogram buckets, in seconds
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+_local = threading.local()
+
+
+class Spans:
+    """Timing spans and counters recorded while one job runs.
+
+    Spans nest per thread. Each stage keeps its inclusive time, and each
+    stack path (``thread;stage;substage``) keeps its self time, so the
+    collapsed stacks sum to the time actually spent and load directly into
+    flame graph tools (flamegraph.pl, speedscope).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.stage_calls: Dict[str, int] = defaultdict(int)
+        self.self_seconds: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def activate(self) -> Iterator["Spans"]:
+        """Record spans from the calling thread into this collector."""
+        previous = getattr(_local, "spans", None), getattr(_local, "stack", None)
+        _local.spans, _local.stack = self, []
+        try:
+            yield self
+        finally:
+            _local.spans, _local.stack = previous
+
+    def report(self) -> dict:
+        """JSON-serialisable stage totals and counters."""
+        with self._lock:
+            return {
+                "wall_seconds": round(time.perf_counter() - self._started, 4),
+                "stages": {stage: {"seconds": round(seconds, 4), "calls": self.stage_calls[stage]}
+                           for stage, seconds in self.stage_seconds.items()},
+                "counters": dict(self.counters),
+            }
+
+    def collapsed(self) -> str:
+        """Self time per stack in the collapsed-stack format, in microseconds."""
+        with self._lock:
+            return "".join(f"{path} {int(seconds * 1e6)}\n" for path, seconds in sorted(self.self_seconds.items()))
+
+    def _record(self, stage: str, path: str, elapsed: float, own: float) -> None:
+        with self._lock:
+            self.stage_seconds[stage] += elapsed
+            self.stage_calls[stage] += 1
+            self.self_seconds[path] += own
+
+
+def current() -> Optional[Spans]:
+    """The collector active on the calling thread, if any."""
+    return getattr(_local, "spans", None)
+
+
+@contextmanager
+def bind(spans: Optional[Spans]) -> Iterator[None]:
+    """Activate ``spans`` on a helper thread (no-op for None)."""
+    if spans is None:
+        yield
+        return
+    with spans.activate():
+        yield
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a stage into the calling thread's collector; free when none is active."""
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        yield
+        return
+    stack = _local.stack
+    stack.append([stage, 0.0])
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _, children = stack.pop()
+        path = ";".join([threading.current_thread().name] + [name for name, _ in stack] + [stage])
+        spans._record(stage, path, elapsed, elapsed - children)
+        if stack:
+            stack[-1][1] += elapsed
+
+
+def count(name: str, value: float = 1) -> None:
+    """Add to a counter of the calling thread's collector."""
+    spans = getattr(_local, "spans", None)
+    if spans is not None:
+        with spans._lock:
+            spans.counters[name] += value
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[tuple, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[tuple, List]] = defaultdict(dict)
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._help[name] = ("counter", help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = TIME_BUCKETS) -> None:
+        self._help[name] = ("histogram", help_text)
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """A gauge whose value is read when the metrics are rendered."""
+        self._help[name] = ("gauge", help_text)
+        self._gauges[name] = read
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        buckets = self._buckets[name]
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                # Per-bucket counts (cumulated when rendered), then sum and count
+                series = self._histograms[name][key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for labels, value in sorted(self._counters[name].items()):
+                        lines.append(f"{name}{_labels(labels)} {value:g}")
+                elif kind == "histogram":
+                    buckets = self._buckets[name]
+                    for labels, (counts, total, observations) in sorted(self._histograms[name].items()):
+                        cumulative = 0
+                        for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                            cumulative += bucket_count
+                            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                            lines.append(f"{name}_bucket{_labels(labels, le)} {cumulative}")
+                        lines.append(f"{name}_sum{_labels(labels)} {total:g}")
+                        lines.append(f"{name}_count{_labels(labels)} {observations}")
+                else:
+                    try:
+                        lines.append(f"{name} {float(self._gauges[name]()):g}")
+                    except Exception:
+                        # A gauge that cannot be read is left out rather than failing the scrape
+                        lines.pop()
+                        lines.pop()
+        return "\n".join(lines) + "\n"
+
+
+# Create singleton instance
+metrics = MetricsRegistry()
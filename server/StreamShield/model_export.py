@@ -0,0 +1,109 @@
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+from typing import Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+# Written next to a finished export; holds the path YOLO should load
+_MARKER = "exported.txt"
+
+
+def _fingerprint(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4 * 1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()[:16]
+
+
+def _require_runtime(backend: str) -> None:
+    """Fail before exporting if the runtime for ``backend`` is not installed."""
+    if backend == "onnx":
+        import onnxruntime  # noqa: F401
+    elif backend == "openvino":
+        import openvino  # noqa: F401
+
+
+def _quantize_onnx(path: str) -> str:
+    """Dynamic int8 weight quantization of an exported ONNX model."""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized = path[:-len(".onnx")] + "_int8.onnx"
+    quantize_dynamic(path, quantized, weight_type=QuantType.QUInt8)
+    # Ultralytics reads class names, stride and imgsz from the model metadata
+    model = onnx.load(quantized)
+    if not model.metadata_props:
+        model.metadata_props.extend(onnx.load(path).metadata_props)
+        onnx.save(model, quantized)
+    return quantized
+
+
+def _export(model_path: str, target_dir: str, backend: str, imgsz: int, int8: bool) -> str:
+    from ultralytics import YOLO
+
+    # Ultralytics writes exports next to the weights, so export from a copy in target_dir
+    source = os.path.join(target_dir, os.path.basename(model_path))
+    shutil.copyfile(model_path, source)
+    kwargs = {"format": backend}
+    if imgsz:
+        kwargs["imgsz"] = imgsz
+    if backend == "onnx":
+        # Dynamic axes let process_video send whole batches through one session
+        kwargs["dynamic"] = True
+    elif int8:
+        kwargs["int8"] = True
+        if config.DETECT_INT8_DATA:
+            kwargs["data"] = config.DETECT_INT8_DATA
+    try:
+        exported = str(YOLO(source).export(**kwargs))
+        if backend == "onnx" and int8:
+            exported = _quantize_onnx(exported)
+    finally:
+        os.remove(source)
+    return exported
+
+
+def export_model(model_path: str, backend: str, imgsz: int = 0, int8: bool = False) -> str:
+    """Export ``model_path`` for ``backend`` once and return the path YOLO should load.
+
+    Exports are kept under DETECT_EXPORT_DIR, keyed by the weights' content
+    hash and the export settings, so retrained weights get a fresh export.
+    """
+    name = f"{_fingerprint(model_path)}-{backend}-{imgsz or 'default'}{'-int8' if int8 else ''}"
+    target_dir = os.path.join(config.DETECT_EXPORT_DIR, name)
+    os.makedirs(target_dir, exist_ok=True)
+    marker = os.path.join(target_dir, _MARKER)
+    with open(os.path.join(target_dir, ".lock"), "w") as lock:
+        # Job workers start together; the first one exports and the rest wait for it
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(marker):
+            with open(marker) as f:
+                exported = os.path.join(target_dir, f.read().strip())
+            if os.path.exists(exported):
+                return exported
+        exported = _export(model_path, target_dir, backend, imgsz, int8)
+        with open(marker, "w") as f:
+            f.write(os.path.relpath(exported, target_dir))
+    return exported
+
+
+def resolve(model_path: str, backend: str, imgsz: int = 0, int8: bool = False) -> Tuple[str, str]:
+    """(path to load, backend actually used), falling back to the PyTorch weights."""
+    if backend == "torch":
+        return model_path, "torch"
+    try:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown detection backend {backend!r}, expected one of {list(BACKENDS)}")
+        _require_runtime(backend)
+        return export_model(model_path, backend, imgsz, int8), backend
+    except Exception as e:
+        logger.warning(f"Error preparing {backend} model, falling back to torch: {e}")
+        return model_path, "torch"
@@ -0,0 +1,226 @@
+import logging
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from ultralytics import YOLO
+from vosk import Model, KaldiRecognizer
+
+from . import config
+from .model_export import resolve
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # Fall back to peak RSS where /proc is unavailable (ru_maxrss is KB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _shared_mb() -> float:
+    """Resident pages shared with other processes (e.g. copy-on-write model weights), in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[2])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+
+class _HandlePool:
+    """A bounded set of interchangeable handles that threads check out one at a time."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.created = 0
+        self._idle: List = []
+        self._available = threading.Condition()
+
+    def acquire(self, create):
+        """Take an idle handle, create one while under ``size``, or wait for one to be released."""
+        with self._available:
+            while not self._idle and self.created >= self.size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self.created += 1
+        try:
+            return create()
+        except BaseException:
+            with self._available:
+                self.created -= 1
+                self._available.notify()
+            raise
+
+    def release(self, handle) -> None:
+        with self._available:
+            self._idle.append(handle)
+            self._available.notify()
+
+
+class ModelRegistry:
+    """Process-wide cache of YOLO and Vosk models.
+
+    Each model file is loaded once per process. Vosk models are safe to share
+    between threads, so a single instance is handed out. Ultralytics predictors
+    keep per-call state, so YOLO handles are checked out of a pool of at most
+    DETECT_HANDLES per model and returned after each call; threads beyond that
+    wait for a free handle instead of loading another copy of the weights.
+
+    YOLO handles run on the inference backend given by DETECT_BACKEND,
+    DETECT_IMGSZ and DETECT_INT8 unless overridden per call. A backend is
+    resolved (and the model exported) once per process; if that fails, or
+    the exported model cannot run a first inference, the handle falls back
+    to the PyTorch weights.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple, _HandlePool] = {}
+        self._vosk_models: Dict[str, Model] = {}
+        self._vosk_locks: Dict[str, threading.Lock] = {}
+        self._yolo_handles: Dict[str, int] = {}
+        self._stats: Dict[str, dict] = {}
+        self._export_lock = threading.Lock()
+        self._resolved: Dict[Tuple, Tuple[str, str]] = {}
+
+    @contextmanager
+    def yolo(self, model_path: str, backend: Optional[str] = None, imgsz: Optional[int] = None,
+             int8: Optional[bool] = None) -> Iterator[YOLO]:
+        """Check out a YOLO handle for ``model_path`` on the given backend for the duration of the block."""
+        spec = self._spec(model_path, backend, imgsz, int8)
+        with self._lock:
+            pool = self._pools.get(spec)
+            if pool is None:
+                pool = self._pools[spec] = _HandlePool(config.DETECT_HANDLES)
+        model = pool.acquire(lambda: self._load_yolo(spec))
+        try:
+            yield model
+        finally:
+            pool.release(model)
+
+    def _load_yolo(self, spec: Tuple) -> YOLO:
+        load_path = self._resolve(spec)[0]
+        try:
+            model = self._timed_load(f"yolo:{load_path}", lambda: YOLO(load_path, task="detect"))
+            if load_path != spec[0]:
+                # ONNX Runtime and OpenVINO sessions are only built on the first predict
+                predict_args = {"imgsz": spec[2]} if spec[2] else {}
+                model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False, **predict_args)
+        except Exception as e:
+            if load_path == spec[0]:
+                raise
+            logger.warning(f"Error loading {load_path}, falling back to torch: {e}")
+            load_path = spec[0]
+            with self._lock:
+                self._resolved[spec] = load_path, "torch"
+            model = self._timed_load(f"yolo:{load_path}", lambda: YOLO(load_path, task="detect"))
+        with self._lock:
+            self._yolo_handles[load_path] = self._yolo_handles.get(load_path, 0) + 1
+        return model
+
+    def yolo_backend(self, model_path: str, backend: Optional[str] = None, imgsz: Optional[int] = None,
+                     int8: Optional[bool] = None) -> str:
+        """The backend YOLO handles for these settings actually run on."""
+        return self._resolve(self._spec(model_path, backend, imgsz, int8))[1]
+
+    def vosk(self, model_path: str) -> Model:
+        """Return the shared Vosk model for ``model_path``."""
+        model_path = os.path.abspath(model_path)
+        model = self._vosk_models.get(model_path)
+        if model is not None:
+            return model
+        with self._lock:
+            load_lock = self._vosk_locks.setdefault(model_path, threading.Lock())
+        # Loads take seconds, so they get a lock per model instead of blocking YOLO checkouts and report()
+        with load_lock:
+            model = self._vosk_models.get(model_path)
+            if model is None:
+                model = self._timed_load(f"vosk:{model_path}", lambda: Model(model_path))
+                with self._lock:
+                    self._vosk_models[model_path] = model
+        return model
+
+    def warmup(self, yolo_path: Optional[str] = None, vosk_path: Optional[str] = None) -> dict:
+        """Load the given models and run one dummy inference through each."""
+        if yolo_path:
+            spec = self._spec(yolo_path, None, None, None)
+            start = time.perf_counter()
+            predict_args = {"imgsz": spec[2]} if spec[2] else {}
+            with self.yolo(*spec) as model:
+                model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False, **predict_args)
+            self._record_warmup(f"yolo:{self._resolve(spec)[0]}", time.perf_counter() - start)
+        if vosk_path:
+            start = time.perf_counter()
+            recognizer = KaldiRecognizer(self.vosk(vosk_path), 16000)
+            recognizer.AcceptWaveform(bytes(16000 * 2))  # one second of silence
+            recognizer.FinalResult()
+            self._record_warmup(f"vosk:{os.path.abspath(vosk_path)}", time.perf_counter() - start)
+        return self.report()
+
+    def report(self) -> dict:
+        """Load times, warmup times and memory deltas for every loaded model."""
+        with self._lock:
+            models = {key: dict(stats) for key, stats in self._stats.items()}
+            for path, count in self._yolo_handles.items():
+                models[f"yolo:{path}"]["handles"] = count
+            detectors = [{"model": path, "requested": backend, "backend": resolved[1], "imgsz": imgsz, "int8": int8}
+                         for (path, backend, imgsz, int8), resolved in self._resolved.items()]
+        return {"models": models, "detectors": detectors,
+                "rss_mb": round(_rss_mb(), 1), "shared_mb": round(_shared_mb(), 1)}
+
+    @staticmethod
+    def _spec(model_path: str, backend: Optional[str], imgsz: Optional[int], int8: Optional[bool]) -> Tuple:
+        return (os.path.abspath(model_path),
+                config.DETECT_BACKEND if backend is None else backend,
+                config.DETECT_IMGSZ if imgsz is None else imgsz,
+                config.DETECT_INT8 if int8 is None else int8)
+
+    def _resolve(self, spec: Tuple) -> Tuple[str, str]:
+        """(path to load, actual backend) for a spec, exporting the model on first use."""
+        resolved = self._resolved.get(spec)
+        if resolved is not None:
+            return resolved
+        # Exports can take minutes, so they get their own lock instead of blocking Vosk loads
+        with self._export_lock:
+            resolved = self._resolved.get(spec)
+            if resolved is None:
+                resolved = resolve(*spec)
+                with self._lock:
+                    self._resolved[spec] = resolved
+        return resolved
+
+    def _timed_load(self, key: str, loader):
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        model = loader()
+        elapsed = time.perf_counter() - start
+        rss_delta = _rss_mb() - rss_before
+        logger.info(f"Loaded {key} in {elapsed:.2f}s ({rss_delta:+.1f} MB)")
+        with self._lock:
+            self._update_stats(key, elapsed, rss_delta)
+        return model
+
+    def _update_stats(self, key: str, elapsed: float, rss_delta: float) -> None:
+        stats = self._stats.setdefault(key, {"loads": 0, "load_seconds": 0.0, "rss_delta_mb": 0.0})
+        stats["loads"] += 1
+        stats["load_seconds"] = round(stats["load_seconds"] + elapsed, 3)
+        stats["rss_delta_mb"] = round(stats["rss_delta_mb"] + rss_delta, 1)
+
+    def _record_warmup(self, key: str, elapsed: float) -> None:
+        with self._lock:
+            self._stats.setdefault(key, {})["warmup_seconds"] = round(elapsed, 3)
+
+
+# Create singleton instance
+model_registry = ModelRegistry()
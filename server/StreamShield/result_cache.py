@@ -0,0 +1,284 @@
+import glob
+import hashlib
+import json
+import multiprocessing.util
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from . import config
+
+_HASH_CHUNK = 4 * 1024 * 1024
+
+# File hashes remembered per process, least recently used dropped first
+_HASH_MEMO_SIZE = 1024
+
+# Counters are written to the per-process stats file at most this often
+_STATS_FLUSH_SECONDS = 5.0
+
+# Counters of exited processes, folded together by stats()
+_RETIRED_STATS = "retired.json"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def make_key(*parts: Any) -> str:
+    """Stable cache key for a sequence of JSON-serialisable parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    """Disk-backed, content-addressed cache shared by every worker process.
+
+    Entries live under ``root/<kind>/<key[:2]>/<key>`` and are written
+    atomically. The modification time doubles as the last-use time, so the
+    least recently used entries are evicted first once the cache grows past
+    ``max_bytes``. Each process tracks the size from its last scan plus what
+    it stored since, and only rescans and evicts when that crosses the limit.
+
+    Hit/miss counters are kept in memory and flushed every few seconds, after
+    each job and at exit to ``root/stats/<pid>.json``, so the API process can
+    aggregate them; stats() folds the files of exited processes into one.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+        self._flushed_at = 0.0
+        self._dirty = False
+        self._stats_lock = threading.Lock()
+        self._hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._size: Optional[int] = None  # Bytes at the last scan plus stores since; None = not scanned
+
+    # -- keys -----------------------------------------------------------------
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of a file, memoised by path, size and mtime."""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._hashes.get(memo_key)
+            if digest is not None:
+                self._hashes.move_to_end(memo_key)
+                return digest
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with self._lock:
+            self._hashes[memo_key] = digest
+            while len(self._hashes) > _HASH_MEMO_SIZE:
+                self._hashes.popitem(last=False)
+        return digest
+
+    def model_fingerprint(self, path: str) -> str:
+        """Content hash of a model file, or a listing hash of a model directory."""
+        if os.path.isdir(path):
+            listing = []
+            for dirpath, _, filenames in sorted(os.walk(path)):
+                for filename in sorted(filenames):
+                    full = os.path.join(dirpath, filename)
+                    listing.append((os.path.relpath(full, path), os.path.getsize(full), os.path.getmtime(full)))
+            return make_key(listing)
+        return self.file_hash(path)
+
+    # -- entries --------------------------------------------------------------
+
+    def get_json(self, kind: str, key: str) -> Optional[Any]:
+        path = self._path(kind, key, ".json")
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self._count(kind, "misses")
+            return None
+        self._touch(path)
+        self._count(kind, "hits")
+        return value
+
+    def put_json(self, kind: str, key: str, value: Any) -> None:
+        def writer(tmp: str) -> None:
+            with open(tmp, "w") as f:
+                json.dump(value, f)
+
+        self._write(kind, key, ".json", writer)
+
+    def get_file(self, kind: str, key: str, dest: str) -> bool:
+        """Copy a cached file to ``dest``; returns False on a miss."""
+        path = self._path(kind, key, ".bin")
+        try:
+            shutil.copyfile(path, dest)
+        except OSError:
+            self._count(kind, "misses")
+            return False
+        self._touch(path)
+        self._count(kind, "hits")
+        return True
+
+    def put_file(self, kind: str, key: str, src: str) -> None:
+        self._write(kind, key, ".bin", lambda tmp: shutil.copyfile(src, tmp))
+
+    # -- maintenance ----------------------------------------------------------
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits; returns bytes freed."""
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.root, "*", "*", "*")):
+            if path.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                freed += size
+                self._count("eviction", "entries")
+            except OSError:
+                pass
+        with self._lock:
+            self._size = total - freed
+        return freed
+
+    def flush(self) -> None:
+        """Write this process's counters to its stats file if they changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._counters)
+            self._dirty = False
+            self._flushed_at = time.monotonic()
+        stats_path = os.path.join(self.root, "stats", f"{os.getpid()}.json")
+        try:
+            os.makedirs(os.path.dirname(stats_path), exist_ok=True)
+            with open(stats_path + ".tmp", "w") as f:
+                json.dump(snapshot, f)
+            os.replace(stats_path + ".tmp", stats_path)
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        """Hit/miss counters summed over every process, plus the cache size."""
+        self.flush()
+        totals: Counter = Counter()
+        stats_dir = os.path.join(self.root, "stats")
+        retired_path = os.path.join(stats_dir, _RETIRED_STATS)
+        with self._stats_lock:
+            retired = Counter(self._read_counters(retired_path))
+            folded = False
+            for path in glob.glob(os.path.join(stats_dir, "*.json")):
+                pid = os.path.basename(path)[:-len(".json")]
+                if not pid.isdigit():
+                    continue
+                counters = self._read_counters(path)
+                if int(pid) != os.getpid() and not _alive(int(pid)):
+                    retired.update(counters)
+                    folded = True
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                else:
+                    totals.update(counters)
+            if folded:
+                try:
+                    with open(retired_path + ".tmp", "w") as f:
+                        json.dump(retired, f)
+                    os.replace(retired_path + ".tmp", retired_path)
+                except OSError:
+                    pass
+        totals.update(retired)
+        size, entries = 0, 0
+        for path in glob.glob(os.path.join(self.root, "*", "*", "*")):
+            try:
+                size += os.path.getsize(path)
+                entries += 1
+            except OSError:
+                pass
+        kinds: Dict[str, Dict[str, int]] = {}
+        for name, count in totals.items():
+            kind, _, counter = name.partition(".")
+            kinds.setdefault(kind, {})[counter] = count
+        for counters in kinds.values():
+            lookups = counters.get("hits", 0) + counters.get("misses", 0)
+            if lookups:
+                counters["hit_ratio"] = round(counters.get("hits", 0) / lookups, 4)
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "kinds": kinds}
+
+    @staticmethod
+    def _read_counters(path: str) -> dict:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _path(self, kind: str, key: str, suffix: str) -> str:
+        return os.path.join(self.root, kind, key[:2], key + suffix)
+
+    def _write(self, kind: str, key: str, suffix: str, writer) -> None:
+        path = self._path(kind, key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            writer(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._count(kind, "stores")
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _touch(self, path: str) -> None:
+        try:
+            os.utime(path, (time.time(), time.time()))
+        except OSError:
+            pass
+
+    def _count(self, kind: str, counter: str) -> None:
+        with self._lock:
+            self._counters[f"{kind}.{counter}"] += 1
+            self._dirty = True
+            due = time.monotonic() - self._flushed_at >= _STATS_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+
+# Create singleton instance
+result_cache = ResultCache(config.CACHE_DIR, config.CACHE_MAX_BYTES)
+
+# Job workers leave through multiprocessing's exit handlers rather than atexit
+multiprocessing.util.Finalize(None, result_cache.flush, exitpriority=10)
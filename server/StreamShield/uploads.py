@@ -0,0 +1,273 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from . import config
+from .growing_file import mark_complete, mark_partial
+from .workspace import Workspace
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "upload.json"
+
+# Formats that can be processed front to back while the rest is still arriving
+STREAMABLE_EXTENSIONS = {".wav", ".mp4", ".mov", ".m4a"}
+
+
+class UploadError(Exception):
+    """Raised for chunks or requests that do not fit the upload session."""
+
+
+class ChecksumMismatchError(UploadError):
+    """Raised when a chunk or the assembled file does not match its SHA-256."""
+
+
+class UploadSession:
+    """A resumable upload written chunk by chunk into a job workspace.
+
+    Chunk ``i`` covers bytes ``[i * chunk_size, (i + 1) * chunk_size)`` of the
+    final file and may arrive in any order or be retried. The contiguous prefix
+    received so far is published through the growing_file marker, so a job can
+    start processing streamable formats before the upload completes. State is
+    saved in the workspace so clients can resume after reconnecting.
+    """
+
+    def __init__(self, upload_id: str, filename: str, total_size: int, chunk_size: int,
+                 workspace: Workspace, content_type: Optional[str] = None):
+        self.upload_id = upload_id
+        self.filename = os.path.basename(filename) or "upload"
+        self.total_size = total_size
+        self.chunk_size = chunk_size
+        self.content_type = content_type
+        self.workspace = workspace
+        self.input_path = workspace.file(f"input_{self.filename}")
+        self.output_path = workspace.file(f"output_{self.filename}")
+        self.received: Dict[int, str] = {}  # chunk index -> sha256
+        self.created_at = time.time()
+        self.first_chunk_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.last_activity_at = time.time()
+        self.job_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, filename: str, total_size: int, chunk_size: Optional[int], root: str,
+               content_type: Optional[str] = None) -> "UploadSession":
+        chunk_size = chunk_size or config.UPLOAD_CHUNK_BYTES
+        if total_size <= 0 or chunk_size <= 0:
+            raise UploadError("size and chunkSize must be positive")
+        upload_id = uuid.uuid4().hex
+        workspace = Workspace(prefix=f"upload-{upload_id}-", root=root)
+        try:
+            workspace.reserve(total_size)
+            session = cls(upload_id, filename, total_size, chunk_size, workspace, content_type)
+            with open(session.input_path, "wb") as f:
+                f.truncate(total_size)
+            mark_partial(session.input_path, 0)
+            session._save()
+        except BaseException:
+            workspace.cleanup()
+            raise
+        return session
+
+    @property
+    def chunk_count(self) -> int:
+        return math.ceil(self.total_size / self.chunk_size)
+
+    @property
+    def complete(self) -> bool:
+        return self.completed_at is not None
+
+    @property
+    def streamable(self) -> bool:
+        """Whether the file can be processed before it is complete.
+
+        WAV is read sequentially; MP4-family files only when fragmented, i.e.
+        the ``moov`` box announces fragments (``mvex``) near the start.
+        """
+        ext = os.path.splitext(self.filename.lower())[1]
+        if ext not in STREAMABLE_EXTENSIONS:
+            return False
+        if ext == ".wav":
+            return True
+        if 0 not in self.received:
+            return False
+        with open(self.input_path, "rb") as f:
+            head = f.read(min(self.chunk_size, 1024 * 1024))
+        return b"moov" in head and b"mvex" in head
+
+    def chunk_length(self, index: int) -> int:
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+    def write_chunk(self, index: int, data: bytes, sha256: Optional[str] = None) -> None:
+        """Verify and store one chunk; re-sending a chunk overwrites it."""
+        if self.complete:
+            raise UploadError("Upload is already complete")
+        if not 0 <= index < self.chunk_count:
+            raise UploadError(f"Chunk index {index} out of range (0-{self.chunk_count - 1})")
+        if len(data) != self.chunk_length(index):
+            raise UploadError(f"Chunk {index} must be {self.chunk_length(index)} bytes, got {len(data)}")
+        digest = hashlib.sha256(data).hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise ChecksumMismatchError(f"Chunk {index} checksum mismatch")
+
+        fd = os.open(self.input_path, os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, index * self.chunk_size)
+        finally:
+            os.close(fd)
+
+        with self._lock:
+            self.received[index] = digest
+            self.last_activity_at = time.time()
+            if self.first_chunk_at is None:
+                self.first_chunk_at = time.time()
+            mark_partial(self.input_path, self.contiguous_bytes())
+            self._save()
+
+    def contiguous_bytes(self) -> int:
+        """Length of the prefix of the file that has been received."""
+        index = 0
+        while index in self.received:
+            index += 1
+        return min(index * self.chunk_size, self.total_size)
+
+    def missing_chunks(self) -> List[int]:
+        return [i for i in range(self.chunk_count) if i not in self.received]
+
+    def finish(self, sha256: Optional[str] = None) -> None:
+        """Mark the upload complete once every chunk is present."""
+        with self._lock:
+            if self.complete:
+                return
+            missing = self.missing_chunks()
+            if missing:
+                raise UploadError(f"{len(missing)} chunks missing, first is {missing[0]}")
+            if sha256 and sha256.lower() != self._file_sha256():
+                raise ChecksumMismatchError("File checksum mismatch")
+            self.completed_at = time.time()
+            mark_complete(self.input_path)
+            self._save()
+
+    def status(self) -> dict:
+        received_bytes = sum(self.chunk_length(i) for i in self.received)
+        status = {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "size": self.total_size,
+            "chunk_size": self.chunk_size,
+            "chunk_count": self.chunk_count,
+            "received_bytes": received_bytes,
+            "contiguous_bytes": self.contiguous_bytes(),
+            "missing_chunks": self.missing_chunks(),
+            "complete": self.complete,
+            "streamable": self.streamable,
+            "job_id": self.job_id,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+        }
+        if self.first_chunk_at is not None:
+            elapsed = (self.completed_at or time.time()) - self.first_chunk_at
+            status["throughput_mb_s"] = round(received_bytes / 1024 ** 2 / elapsed, 3) if elapsed > 0 else None
+        return status
+
+    def _file_sha256(self) -> str:
+        sha = hashlib.sha256()
+        with open(self.input_path, "rb") as f:
+            for chunk in iter(lambda: f.read(4 * 1024 * 1024), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def _save(self) -> None:
+        state = {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "size": self.total_size,
+            "chunk_size": self.chunk_size,
+            "content_type": self.content_type,
+            "received": self.received,
+            "created_at": self.created_at,
+            "first_chunk_at": self.first_chunk_at,
+            "completed_at": self.completed_at,
+        }
+        path = self.workspace.file(STATE_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, workspace_path: str, root: str) -> "UploadSession":
+        """Rebuild a session from the state saved in its workspace."""
+        with open(os.path.join(workspace_path, STATE_FILE)) as f:
+            state = json.load(f)
+        workspace = Workspace(root=root, path=workspace_path)
+        session = cls(state["upload_id"], state["filename"], state["size"], state["chunk_size"],
+                      workspace, state.get("content_type"))
+        session.received = {int(i): digest for i, digest in state["received"].items()}
+        session.created_at = state["created_at"]
+        session.first_chunk_at = state.get("first_chunk_at")
+        session.completed_at = state.get("completed_at")
+        return session
+
+
+class UploadStore:
+    """In-memory index of upload sessions, restored from disk on startup."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self, filename: str, total_size: int, chunk_size: Optional[int] = None,
+               content_type: Optional[str] = None) -> UploadSession:
+        session = UploadSession.create(filename, total_size, chunk_size, self.root, content_type)
+        with self._lock:
+            self._sessions[session.upload_id] = session
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        with self._lock:
+            return self._sessions.get(upload_id)
+
+    def remove(self, upload_id: str) -> Optional[UploadSession]:
+        with self._lock:
+            return self._sessions.pop(upload_id, None)
+
+    def reap(self, ttl: float) -> List[UploadSession]:
+        """Forget and return unqueued uploads that received nothing for ``ttl`` seconds."""
+        now = time.time()
+        with self._lock:
+            expired = [session for session in self._sessions.values()
+                       if session.job_id is None and now - session.last_activity_at > ttl]
+            for session in expired:
+                del self._sessions[session.upload_id]
+        return expired
+
+    def restore(self) -> int:
+        """Reload unfinished uploads left by a previous run; returns how many."""
+        restored = 0
+        if not os.path.isdir(self.root):
+            return restored
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not name.startswith("upload-") or not os.path.exists(os.path.join(path, STATE_FILE)):
+                continue
+            try:
+                session = UploadSession.load(path, self.root)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Error restoring upload {path}: {e}")
+                continue
+            if session.complete:
+                # Its job died with the previous process; nothing can resume it
+                session.workspace.cleanup()
+                continue
+            with self._lock:
+                self._sessions[session.upload_id] = session
+            restored += 1
+        return restored
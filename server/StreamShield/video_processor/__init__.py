@@ -1,4 +1,22 @@
-from .blur_processor import VideoBlurProcessor
-from .video_processor import process_video
+import importlib
 
-_all_ = ["VideoBlurProcessor", "process_video"]
\ No newline at end of file
+# Public names and the submodule defining each, imported on first use so the
+# obfuscation helpers load without the detection model dependencies
+_EXPORTS = {
+    "VideoBlurProcessor": "blur_processor",
+    "TemporalBlurProcessor": "tracker",
+    "GatedBlurProcessor": "gating",
+    "RecordingProcessor": "replay",
+    "ReplayProcessor": "replay",
+    "process_video": "video_processor",
+    "process_stream": "video_processor",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
@@ -1,6 +1,8 @@
-import cv2
-from ultralytics import YOLO
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from .. import config
+from ..metrics import span
+from ..model_registry import model_registry
+from .obfuscation import Box, OBFUSCATORS, clamp_box, merge_boxes
 
 
 class VideoBlurProcessor:
@@ -12,21 +14,73 @@ class VideoBlurProcessor:
             blur_classes: List[int] = [2, 3],  # Default: class IDs for "login form" and "URL bar"
             confidence_threshold: float = 0.7,
             blur_kernel: Tuple[int, int] = (99, 99),
-            blur_sigma: int = 30
+            blur_sigma: int = 30,
+            blur_method: str = "gaussian",  # One of obfuscation.OBFUSCATORS
+            backend: Optional[str] = None,  # torch, onnx or openvino; defaults to config.DETECT_BACKEND
+            imgsz: Optional[int] = None,  # Detector input size; defaults to config.DETECT_IMGSZ
+            int8: Optional[bool] = None  # Quantized export; defaults to config.DETECT_INT8
     ):
-        self.model = YOLO(model_path)
+        if blur_method not in OBFUSCATORS:
+            raise ValueError(f"Unknown blur method {blur_method!r}, expected one of {sorted(OBFUSCATORS)}")
+        self.model_path = model_path
         self.blur_classes = blur_classes
         self.confidence_threshold = confidence_threshold
         self.blur_kernel = blur_kernel
         self.blur_sigma = blur_sigma
+        self.blur_method = blur_method
+        self.backend = config.DETECT_BACKEND if backend is None else backend
+        self.imgsz = config.DETECT_IMGSZ if imgsz is None else imgsz
+        self.int8 = config.DETECT_INT8 if int8 is None else int8
+        self._predict_args = {"imgsz": self.imgsz} if self.imgsz else {}
+
+    @property
+    def active_backend(self) -> str:
+        """The backend detection actually runs on, after any fallback to torch."""
+        return model_registry.yolo_backend(self.model_path, self.backend, self.imgsz, self.int8)
 
     def process_frame(self, frame) -> None:
         """Detect and blur regions in a single frame."""
-        results = self.model(frame)
+        self.apply_boxes(frame, self.detect(frame))
+
+    def process_batch(self, frames: List) -> None:
+        """Detect and blur regions in a batch of frames with a single model call."""
+        for frame, boxes in zip(frames, self.detect_batch(frames)):
+            self.apply_boxes(frame, boxes)
+
+    def detect(self, frame) -> List[Box]:
+        """Return the boxes to blur in a single frame."""
+        with span("infer"):
+            return self._boxes_from_results(self._predict(frame))
+
+    def detect_batch(self, frames: List) -> List[List[Box]]:
+        """Return the boxes to blur for each frame in a batch."""
+        if not frames:
+            return []
+        with span("infer"):
+            results = self._predict(frames)
+            return [self._boxes_from_results([result]) for result in results]
+
+    def _predict(self, source):
+        """Run the detector on a frame or list of frames with a handle from the model registry's pool."""
+        with model_registry.yolo(self.model_path, self.backend, self.imgsz, self.int8) as model:
+            return model(source, **self._predict_args)
+
+    def apply_boxes(self, frame, boxes: List[Box]) -> None:
+        """Blur the given boxes in place, clamped to the frame and merged where one covers the other."""
+        height, width = frame.shape[:2]
+        clamped = [box for box in (clamp_box(box, width, height) for box in boxes) if box]
+        with span("blur"):
+            for box in merge_boxes(clamped):
+                self._apply_blur(frame, box)
+
+    def _boxes_from_results(self, results) -> List[Box]:
+        boxes = []
         for result in results:
             for box in result.boxes:
                 if self._is_valid_detection(box):
-                    self._apply_blur(frame, box)
+                    x1, y1, x2, y2 = map(int, box.xyxy[0])
+                    boxes.append((x1, y1, x2, y2))
+        return boxes
 
     def _is_valid_detection(self, box) -> bool:
         """Check if detection meets confidence and class criteria."""
@@ -34,9 +88,7 @@ class VideoBlurProcessor:
         class_id = int(box.cls[0].item())
         return (confidence > self.confidence_threshold) and (class_id in self.blur_classes)
 
-    def _apply_blur(self, frame, box) -> None:
-        """Apply Gaussian blur to a detected region."""
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        roi = frame[y1:y2, x1:x2]
-        blurred_roi = cv2.GaussianBlur(roi, self.blur_kernel, self.blur_sigma)
-        frame[y1:y2, x1:x2] = blurred_roi
\ No newline at end of file
+    def _apply_blur(self, frame, box: Box) -> None:
+        """Obfuscate a detected region in place with the configured method."""
+        x1, y1, x2, y2 = box
+        OBFUSCATORS[self.blur_method](frame[y1:y2, x1:x2], self.blur_kernel, self.blur_sigma)
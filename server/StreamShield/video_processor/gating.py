@@ -0,0 +1,177 @@
+import cv2
+import numpy as np
+from typing import List, Optional
+from .blur_processor import VideoBlurProcessor, Box
+from ..metrics import span
+
+# Brightness step two neighbouring samples must differ by to set a hash bit,
+# so encoder noise on flat areas does not flip bits between frames
+_GRADIENT_MARGIN = 3
+
+
+def tile_hashes(frame, tile_size: int, hash_size: int = 8) -> np.ndarray:
+    """Difference hash of every tile of a BGR frame, shape (rows, cols, hash_size²).
+
+    The frame is shrunk once so that each tile becomes a (hash_size + 1) x
+    hash_size block, and each bit records whether a sample is brighter than
+    its left neighbour.
+    """
+    height, width = frame.shape[:2]
+    rows, cols = max(1, -(-height // tile_size)), max(1, -(-width // tile_size))
+    small = cv2.resize(frame, (cols * (hash_size + 1), rows * hash_size), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+    blocks = gray.reshape(rows, hash_size, cols, hash_size + 1)
+    bits = (blocks[..., 1:] - blocks[..., :-1]) > _GRADIENT_MARGIN
+    return bits.transpose(0, 2, 1, 3).reshape(rows, cols, -1)
+
+
+def _inside(box: Box, rect: Box) -> bool:
+    return rect[0] <= box[0] and rect[1] <= box[1] and box[2] <= rect[2] and box[3] <= rect[3]
+
+
+class GatedBlurProcessor:
+    """Skip detection on frames whose tiles have not changed since the last detection.
+
+    Each frame is split into ``tile_size`` pixel tiles with a difference hash
+    per tile. A tile has changed when more than ``threshold`` of its bits
+    differ from the last frame that was detected, so slow drift still adds up
+    to a detection. When no tile changed, the previous boxes are reused
+    without running the model.
+
+    With ``region_detect`` only the changed tiles, grown by one tile of
+    context, are cropped and sent to the detector. This falls back to the
+    full frame when they cover more than ``max_region_fraction`` of it, or
+    after ``full_every`` region-only detections so stale boxes cannot linger.
+    Boxes outside the re-detected regions are kept. Exposes the
+    detect/apply_boxes interface of VideoBlurProcessor, so it can sit under
+    TemporalBlurProcessor.
+    """
+
+    def __init__(
+            self,
+            processor: VideoBlurProcessor,
+            tile_size: int = 64,
+            threshold: int = 3,
+            region_detect: bool = False,
+            max_region_fraction: float = 0.5,
+            full_every: int = 10
+    ):
+        self.processor = processor
+        self.tile_size = max(8, tile_size)
+        self.threshold = threshold
+        self.region_detect = region_detect
+        self.max_region_fraction = max_region_fraction
+        self.full_every = max(1, full_every)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the reference frame and counters, e.g. when a new video starts."""
+        self._reference: Optional[np.ndarray] = None
+        self._boxes: List[Box] = []
+        self._since_full = 0
+        self.frames = 0
+        self.skipped = 0
+        self.region_detections = 0
+        self.full_detections = 0
+        self._analysed_pixels = 0
+        self._total_pixels = 0
+
+    def process_frame(self, frame) -> None:
+        self.apply_boxes(frame, self.detect(frame))
+
+    def process_batch(self, frames: List) -> None:
+        for frame, boxes in zip(frames, self.detect_batch(frames)):
+            self.apply_boxes(frame, boxes)
+
+    def apply_boxes(self, frame, boxes: List[Box]) -> None:
+        self.processor.apply_boxes(frame, boxes)
+
+    def detect(self, frame) -> List[Box]:
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames: List) -> List[List[Box]]:
+        """Boxes for each frame, batching the full-frame and region detections that are needed."""
+        with span("gate"):
+            plans = [self._plan(frame) for frame in frames]
+        full_frames = [frame for frame, plan in zip(frames, plans) if plan == "full"]
+        crops = [frame[y1:y2, x1:x2] for frame, plan in zip(frames, plans)
+                 if isinstance(plan, list) for x1, y1, x2, y2 in plan]
+        full_results = iter(self.processor.detect_batch(full_frames))
+        crop_results = iter(self.processor.detect_batch(crops))
+
+        results = []
+        boxes = self._boxes
+        for plan in plans:
+            if plan == "full":
+                boxes = next(full_results)
+            elif isinstance(plan, list):
+                boxes = [box for box in boxes if not any(_inside(box, rect) for rect in plan)]
+                for x1, y1, _, _ in plan:
+                    boxes += [(bx1 + x1, by1 + y1, bx2 + x1, by2 + y1) for bx1, by1, bx2, by2 in next(crop_results)]
+            results.append(list(boxes))
+        self._boxes = boxes
+        return results
+
+    @property
+    def skip_ratio(self) -> float:
+        """Fraction of frames that reused the previous boxes without running the detector."""
+        return self.skipped / self.frames if self.frames else 0.0
+
+    @property
+    def compute_ratio(self) -> float:
+        """Pixels sent to the detector as a fraction of all pixels seen."""
+        return self._analysed_pixels / self._total_pixels if self._total_pixels else 0.0
+
+    def report(self) -> dict:
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "region_detections": self.region_detections,
+            "full_detections": self.full_detections,
+            "skip_ratio": round(self.skip_ratio, 4),
+            "compute_ratio": round(self.compute_ratio, 4),
+        }
+
+    def _plan(self, frame):
+        """Return "skip", "full" or a list of pixel rects to re-detect; updates the reference hashes."""
+        height, width = frame.shape[:2]
+        hashes = tile_hashes(frame, self.tile_size)
+        self.frames += 1
+        self._total_pixels += height * width
+
+        if self._reference is None or self._reference.shape != hashes.shape:
+            return self._full(hashes, height * width)
+        changed = np.count_nonzero(hashes != self._reference, axis=2) > self.threshold
+        if not changed.any():
+            self.skipped += 1
+            return "skip"
+        if not self.region_detect or self._since_full + 1 >= self.full_every:
+            return self._full(hashes, height * width)
+
+        rects = self._changed_rects(changed, width, height)
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in rects)
+        if area > self.max_region_fraction * height * width:
+            return self._full(hashes, height * width)
+        self._reference[changed] = hashes[changed]
+        self._since_full += 1
+        self.region_detections += 1
+        self._analysed_pixels += area
+        return rects
+
+    def _full(self, hashes: np.ndarray, pixels: int) -> str:
+        self._reference = hashes
+        self._since_full = 0
+        self.full_detections += 1
+        self._analysed_pixels += pixels
+        return "full"
+
+    def _changed_rects(self, changed: np.ndarray, width: int, height: int) -> List[Box]:
+        """Pixel rects around each group of changed tiles, with one tile of context."""
+        rows, cols = changed.shape
+        grown = cv2.dilate(changed.astype(np.uint8), np.ones((3, 3), np.uint8))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+        rects = []
+        for left, top, w, h, _ in stats[1:count]:
+            rects.append((int(left * width / cols), int(top * height / rows),
+                          int(np.ceil((left + w) * width / cols)), int(np.ceil((top + h) * height / rows))))
+        return rects
@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Pixel box as (x1, y1, x2, y2)
+Box = Tuple[int, int, int, int]
+
+
+def clamp_box(box: Box, width: int, height: int) -> Optional[Box]:
+    """Clip a box to the frame, returning None if nothing is left."""
+    x1, y1, x2, y2 = box
+    x1, x2 = max(0, min(x1, width)), max(0, min(x2, width))
+    y1, y2 = max(0, min(y1, height)), max(0, min(y2, height))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+def _union_box(a: Box, b: Box) -> Optional[Box]:
+    """The union of two boxes if it is itself a box, else None.
+
+    That is the case when one box contains the other, or when they span the
+    same columns (or rows) and overlap or touch along the other axis.
+    """
+    x1, y1 = min(a[0], b[0]), min(a[1], b[1])
+    x2, y2 = max(a[2], b[2]), max(a[3], b[3])
+    if (x1, y1, x2, y2) in (a, b):
+        return x1, y1, x2, y2
+    if a[0] == b[0] and a[2] == b[2] and a[1] <= b[3] and b[1] <= a[3]:
+        return x1, y1, x2, y2
+    if a[1] == b[1] and a[3] == b[3] and a[0] <= b[2] and b[0] <= a[2]:
+        return x1, y1, x2, y2
+    return None
+
+
+def merge_boxes(boxes: List[Box]) -> List[Box]:
+    """Merge boxes whose union is exactly a box, e.g. duplicates and boxes nested in others.
+
+    Other overlapping boxes are kept apart: their bounding box would also
+    obfuscate pixels that neither box covers.
+    """
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for i, other in enumerate(result):
+                union = _union_box(box, other)
+                if union is not None:
+                    result[i] = union
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
+
+
+def _into(result, roi) -> None:
+    """Copy an OpenCV result into ``roi`` unless it was already written there via dst=."""
+    if result is not roi and not np.may_share_memory(result, roi):
+        roi[:] = result
+
+
+def gaussian(roi, kernel: Tuple[int, int], sigma: float) -> None:
+    """Full-resolution Gaussian blur (the original behaviour)."""
+    _into(cv2.GaussianBlur(roi, kernel, sigma, dst=roi), roi)
+
+
+def downscale(roi, kernel: Tuple[int, int], sigma: float, factor: int = 8) -> None:
+    """Shrink, blur with a proportionally smaller kernel, and scale back up.
+
+    Looks close to the full Gaussian at a fraction of the cost, since the blur
+    runs on 1/factor² of the pixels.
+    """
+    height, width = roi.shape[:2]
+    small_w, small_h = max(1, width // factor), max(1, height // factor)
+    small = cv2.resize(roi, (small_w, small_h), interpolation=cv2.INTER_AREA)
+    small_kernel = tuple(max(1, (k // factor) | 1) for k in kernel)
+    small = cv2.GaussianBlur(small, small_kernel, max(sigma / factor, 0.1))
+    _into(cv2.resize(small, (width, height), dst=roi, interpolation=cv2.INTER_LINEAR), roi)
+
+
+def box_blur(roi, kernel: Tuple[int, int], sigma: float) -> None:
+    """Box blur; uses stack blur where OpenCV provides it (constant time per pixel)."""
+    if hasattr(cv2, "stackBlur"):
+        # In-place use is not documented for stackBlur, so it keeps its own output
+        roi[:] = cv2.stackBlur(roi, kernel)
+    else:
+        _into(cv2.blur(roi, kernel, dst=roi), roi)
+
+
+def pixelate(roi, kernel: Tuple[int, int], sigma: float, block: int = 16) -> None:
+    """Replace the region with coarse blocks."""
+    height, width = roi.shape[:2]
+    small = cv2.resize(roi, (max(1, width // block), max(1, height // block)),
+                       interpolation=cv2.INTER_AREA)
+    _into(cv2.resize(small, (width, height), dst=roi, interpolation=cv2.INTER_NEAREST), roi)
+
+
+def fill(roi, kernel: Tuple[int, int], sigma: float) -> None:
+    """Paint the region solid black."""
+    roi[:] = 0
+
+
+OBFUSCATORS: Dict[str, Callable] = {
+    "gaussian": gaussian,
+    "downscale": downscale,
+    "box": box_blur,
+    "pixelate": pixelate,
+    "fill": fill,
+}
@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import deque
+from typing import Any, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .obfuscation import Box
+
+
+class LatestSlot:
+    """Single-item hand-off between threads where the newest item wins.
+
+    ``put`` never blocks: an item the consumer has not taken yet is replaced
+    and counted as dropped, so a slow consumer always sees the freshest frame
+    instead of a growing backlog.
+    """
+
+    def __init__(self):
+        self._item: Any = None
+        self._has_item = False
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item: Any) -> Optional[Any]:
+        """Offer an item; returns the unconsumed item it replaced, if any."""
+        with self._cond:
+            replaced = None
+            if self._has_item:
+                self.dropped += 1
+                replaced = self._item
+            self._item, self._has_item = item, True
+            self._cond.notify()
+            return replaced
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Take the newest item, waiting up to ``timeout``; None if nothing arrived."""
+        with self._cond:
+            if not self._has_item and not self._cond.wait_for(lambda: self._has_item, timeout):
+                return None
+            item, self._item, self._has_item = self._item, None, False
+            return item
+
+
+class FramePool:
+    """Fixed set of preallocated frame buffers, handed out and returned explicitly."""
+
+    def __init__(self, count: int, shape: Tuple[int, ...], dtype=np.uint8):
+        self.shape = shape
+        self._free = deque(np.empty(shape, dtype) for _ in range(count))
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """A free buffer, or None when every buffer is still in use."""
+        with self._lock:
+            if not self._free:
+                self.exhausted += 1
+                return None
+            return self._free.popleft()
+
+    def release(self, buffer: np.ndarray) -> None:
+        with self._lock:
+            self._free.append(buffer)
+
+
+class FrameConverter:
+    """Turn BGRA screen grabs into pooled output frames plus reduced copies for inference.
+
+    Colour conversion and resizing write into preallocated buffers through
+    ``dst=``, so the steady state allocates nothing per frame. Callers
+    return buffers to ``frames`` and ``smalls`` once they are done with them.
+    """
+
+    def __init__(self, width: int, height: int, infer_width: int, pool_size: int = 3):
+        self.width, self.height = width, height
+        self.scale = downscale_factor(width, infer_width)
+        self.small_size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+        self.frames = FramePool(pool_size, (height, width, 3))
+        self.smalls = FramePool(pool_size, (self.small_size[1], self.small_size[0], 3))
+        self._screen: Optional[np.ndarray] = None  # BGR scratch when the screen size differs
+
+    def convert(self, bgra: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(frame, small) filled from ``bgra``, or None if no buffers are free."""
+        frame = self.frames.acquire()
+        if frame is None:
+            return None
+        small = self.smalls.acquire()
+        if small is None:
+            self.frames.release(frame)
+            return None
+        if bgra.shape[:2] == (self.height, self.width):
+            cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=frame)
+        else:
+            if self._screen is None or self._screen.shape[:2] != bgra.shape[:2]:
+                self._screen = np.empty(bgra.shape[:2] + (3,), np.uint8)
+            cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self._screen)
+            cv2.resize(self._screen, (self.width, self.height), dst=frame)
+        if self.scale < 1.0:
+            cv2.resize(frame, self.small_size, dst=small, interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(small, frame)
+        return frame, small
+
+
+def scale_boxes(boxes: List[Box], scale: float, width: int, height: int) -> List[Box]:
+    """Map boxes found on a frame downscaled by ``scale`` back to full resolution."""
+    if scale == 1.0:
+        return list(boxes)
+    inv = 1.0 / scale
+    # Round outwards so the blurred region never shrinks
+    return [(max(0, int(x1 * inv)), max(0, int(y1 * inv)),
+             min(width, int(x2 * inv + 0.999)), min(height, int(y2 * inv + 0.999)))
+            for x1, y1, x2, y2 in boxes]
+
+
+def downscale_factor(width: int, target_width: int) -> float:
+    return min(1.0, target_width / float(width)) if target_width > 0 else 1.0
+
+
+class AdaptiveRate:
+    """Additive-increase/multiplicative-decrease control of the inference interval.
+
+    Inference competes with capture and output for the CPU. When the output
+    falls below the target fps the interval between inferences grows by
+    ``backoff``; while the target is met it shrinks back towards
+    ``min_interval`` in small steps.
+    """
+
+    def __init__(self, target_fps: float, min_interval: float = 0.0, max_interval: float = 1.0,
+                 backoff: float = 1.5, step: float = 0.005, tolerance: float = 0.95):
+        self.target_fps = target_fps
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.step = step
+        self.tolerance = tolerance
+        self.interval = min_interval
+
+    def update(self, achieved_fps: float) -> float:
+        if achieved_fps < self.target_fps * self.tolerance:
+            self.interval = min(self.max_interval, max(self.interval, self.step) * self.backoff)
+        else:
+            self.interval = max(self.min_interval, self.interval - self.step)
+        return self.interval
+
+
+class RateMeter:
+    """Events per second over a sliding window."""
+
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self._times: deque = deque()
+        self._lock = threading.Lock()
+
+    def tick(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._times.append(now)
+            cutoff = now - self.window
+            while self._times and self._times[0] < cutoff:
+                self._times.popleft()
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            recent = [t for t in self._times if t >= now - self.window]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / max(recent[-1] - recent[0], 1e-6)
+
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile, 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
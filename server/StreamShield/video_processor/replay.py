@@ -0,0 +1,50 @@
+from typing import List
+from .blur_processor import Box
+
+
+class RecordingProcessor:
+    """Blur frames with ``processor`` and keep the boxes applied to each frame.
+
+    Works with any processor exposing detect_batch/apply_boxes, so the boxes
+    recorded from a TemporalBlurProcessor are the tracked, padded ones.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.boxes: List[List[Box]] = []
+
+    def reset(self) -> None:
+        if hasattr(self.processor, "reset"):
+            self.processor.reset()
+        self.boxes = []
+
+    def process_frame(self, frame) -> None:
+        self.process_batch([frame])
+
+    def process_batch(self, frames: List) -> None:
+        for frame, boxes in zip(frames, self.processor.detect_batch(frames)):
+            self.processor.apply_boxes(frame, boxes)
+            self.boxes.append(boxes)
+
+
+class ReplayProcessor:
+    """Blur frames with previously recorded boxes instead of running the detector."""
+
+    def __init__(self, processor, boxes: List[List[Box]]):
+        self.processor = processor
+        self.boxes = boxes
+        self._index = 0
+
+    def reset(self) -> None:
+        self._index = 0
+
+    def process_frame(self, frame) -> None:
+        self.process_batch([frame])
+
+    def process_batch(self, frames: List) -> None:
+        for frame in frames:
+            # Frames past the recording (e.g. a decoder difference) get the last known boxes
+            index = min(self._index, len(self.boxes) - 1)
+            if index >= 0:
+                self.processor.apply_boxes(frame, [tuple(box) for box in self.boxes[index]])
+            self._index += 1
@@ -0,0 +1,204 @@
+import cv2
+import numpy as np
+from typing import List, Optional
+from .blur_processor import VideoBlurProcessor, Box
+from ..metrics import span
+
+# Width of the grayscale thumbnails used for frame differencing and optical flow
+_THUMB_WIDTH = 320
+
+
+def box_iou(a: Box, b: Box) -> float:
+    """Intersection over union of two boxes."""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+class _Track:
+    """A box carried between keyframes, in full-frame float coordinates."""
+
+    def __init__(self, box):
+        self.box = np.array(box, dtype=np.float32)
+        self.missed = 0
+
+
+class TemporalBlurProcessor:
+    """Run YOLO on keyframes only and track the boxes in between.
+
+    Detection runs every ``keyframe_interval`` frames, or earlier when the mean
+    absolute difference against the last keyframe exceeds ``diff_threshold``
+    (0-1 scale). Between keyframes boxes follow the median Lucas-Kanade flow of
+    the features inside them, or stay put when there is nothing to track. On
+    keyframes, detections are matched to tracks by IoU and smoothed, and tracks
+    that are not re-detected are held for ``hold_keyframes`` keyframes. Every
+    blurred box is padded by ``box_margin`` of its size so moving content stays
+    covered. Exposes the same process_frame/process_batch interface as
+    VideoBlurProcessor.
+    """
+
+    def __init__(
+            self,
+            processor: VideoBlurProcessor,
+            keyframe_interval: int = 5,
+            diff_threshold: float = 0.04,
+            box_margin: float = 0.1,
+            smoothing: float = 0.6,
+            iou_match: float = 0.3,
+            hold_keyframes: int = 1,
+            use_optical_flow: bool = True
+    ):
+        self.processor = processor
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.diff_threshold = diff_threshold
+        self.box_margin = box_margin
+        self.smoothing = smoothing
+        self.iou_match = iou_match
+        self.hold_keyframes = hold_keyframes
+        self.use_optical_flow = use_optical_flow
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all tracks, e.g. when a new video starts."""
+        self._tracks: List[_Track] = []
+        self._keyframe_thumb: Optional[np.ndarray] = None
+        self._prev_thumb: Optional[np.ndarray] = None
+        self._since_keyframe = 0
+        self.frames = 0
+        self.detections = 0
+        if hasattr(self.processor, "reset"):
+            self.processor.reset()
+
+    def process_frame(self, frame) -> None:
+        """Blur the tracked regions of a single frame in place."""
+        self.processor.apply_boxes(frame, self.update(frame))
+
+    def process_batch(self, frames: List) -> None:
+        """Blur a batch of frames, detecting all of its keyframes with a single model call."""
+        for frame, boxes in zip(frames, self.detect_batch(frames)):
+            self.processor.apply_boxes(frame, boxes)
+
+    def detect_batch(self, frames: List) -> List[List[Box]]:
+        """Tracked boxes for a batch of frames, in order.
+
+        Keyframes are chosen from the frame differences alone, so they are
+        picked for the whole batch first and detected together; tracking then
+        runs through the frames in order.
+        """
+        with span("track"):
+            thumbs = [self._thumbnail(frame) for frame in frames]
+            keyframes = [self._is_keyframe(thumb) for thumb, _ in thumbs]
+            detections = iter(self.processor.detect_batch(
+                [frame for frame, keyframe in zip(frames, keyframes) if keyframe]))
+            return [self._advance(frame, thumb, scale, next(detections) if keyframe else None)
+                    for frame, (thumb, scale), keyframe in zip(frames, thumbs, keyframes)]
+
+    def apply_boxes(self, frame, boxes: List[Box]) -> None:
+        self.processor.apply_boxes(frame, boxes)
+
+    def update(self, frame) -> List[Box]:
+        """Advance the tracker by one frame and return the padded boxes to blur."""
+        return self.detect_batch([frame])[0]
+
+    def _is_keyframe(self, thumb) -> bool:
+        """Count a frame and decide whether it is a keyframe, updating the keyframe reference."""
+        self.frames += 1
+        if not self._needs_detection(thumb):
+            self._since_keyframe += 1
+            return False
+        self._keyframe_thumb = thumb
+        self._since_keyframe = 0
+        self.detections += 1
+        return True
+
+    def _advance(self, frame, thumb, scale: float, detected: Optional[List[Box]]) -> List[Box]:
+        """Match a keyframe's detections, or follow the tracks by optical flow in between."""
+        if detected is not None:
+            self._on_keyframe(detected)
+        elif self.use_optical_flow and self._tracks:
+            self._track_flow(self._prev_thumb, thumb, scale)
+
+        self._prev_thumb = thumb
+        height, width = frame.shape[:2]
+        return [self._pad(track.box, width, height) for track in self._tracks]
+
+    @property
+    def detection_ratio(self) -> float:
+        """Fraction of frames that ran the detector."""
+        return self.detections / self.frames if self.frames else 0.0
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(1.0, _THUMB_WIDTH / float(width))
+        small = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), scale
+
+    def _needs_detection(self, thumb) -> bool:
+        if self._keyframe_thumb is None or self._keyframe_thumb.shape != thumb.shape:
+            return True
+        if self._since_keyframe + 1 >= self.keyframe_interval:
+            return True
+        score = cv2.absdiff(thumb, self._keyframe_thumb).mean() / 255.0
+        return score > self.diff_threshold
+
+    def _on_keyframe(self, boxes: List[Box]) -> None:
+        unmatched = list(self._tracks)
+        tracks = []
+        for box in boxes:
+            best, best_iou = None, self.iou_match
+            for track in unmatched:
+                iou = box_iou(box, tuple(track.box))
+                if iou >= best_iou:
+                    best, best_iou = track, iou
+            if best is None:
+                tracks.append(_Track(box))
+            else:
+                unmatched.remove(best)
+                best.box = self.smoothing * np.array(box, dtype=np.float32) + (1 - self.smoothing) * best.box
+                best.missed = 0
+                tracks.append(best)
+        # Hold lost tracks briefly: a missed detection should not unblur a region
+        for track in unmatched:
+            track.missed += 1
+            if track.missed <= self.hold_keyframes:
+                tracks.append(track)
+        self._tracks = tracks
+
+    def _track_flow(self, prev_thumb, thumb, scale: float) -> None:
+        if prev_thumb is None or prev_thumb.shape != thumb.shape:
+            return
+        for track in self._tracks:
+            x1, y1, x2, y2 = (track.box * scale).astype(int)
+            x1, y1 = max(x1, 0), max(y1, 0)
+            x2, y2 = min(x2, thumb.shape[1]), min(y2, thumb.shape[0])
+            if x2 - x1 < 4 or y2 - y1 < 4:
+                continue
+            mask = np.zeros_like(prev_thumb)
+            mask[y1:y2, x1:x2] = 255
+            points = cv2.goodFeaturesToTrack(prev_thumb, maxCorners=30, qualityLevel=0.01,
+                                             minDistance=3, mask=mask)
+            if points is None:
+                continue  # Flat region: carry the box forward unchanged
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_thumb, thumb, points, None)
+            good = status.reshape(-1) == 1
+            if not good.any():
+                continue
+            dx, dy = np.median((moved[good] - points[good]).reshape(-1, 2), axis=0) / scale
+            track.box += np.array([dx, dy, dx, dy], dtype=np.float32)
+
+    def _pad(self, box, width: int, height: int) -> Box:
+        x1, y1, x2, y2 = box
+        pad_x = (x2 - x1) * self.box_margin
+        pad_y = (y2 - y1) * self.box_margin
+        return (
+            max(0, int(x1 - pad_x)),
+            max(0, int(y1 - pad_y)),
+            min(width, int(np.ceil(x2 + pad_x))),
+            min(height, int(np.ceil(y2 + pad_y))),
+        )
@@ -1,33 +1,188 @@
 import cv2
+import queue
+import threading
 from typing import Optional, Callable
 from .blur_processor import VideoBlurProcessor
+from .. import config
+from ..metrics import bind, count, current, span
+
+# Marks the end of a stream between pipeline stages
+_END = object()
 
 
 def process_video(
         input_path: str,
         output_path: str,
         processor: VideoBlurProcessor,
-        progress_callback: Optional[Callable[[float], None]] = None) -> None:
-    """Process an entire video and save the blurred output."""
+        progress_callback: Optional[Callable[[float], None]] = None,
+        batch_size: Optional[int] = None,
+        queue_depth: Optional[int] = None) -> None:
+    """Process an entire video and save the blurred output.
+
+    With ``queue_depth`` > 0 decoding, batched inference and encoding run as a
+    three-stage pipeline; ``queue_depth`` 0 with ``batch_size`` 1 uses the
+    serial frame-by-frame loop. Frames are written in input order either way.
+    """
     cap = cv2.VideoCapture(input_path)
     frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
 
     # Initialize video writer
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(output_path, fourcc, fps, (frame_width, frame_height))
 
     try:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            processor.process_frame(frame)
-            out.write(frame)
-            if progress_callback:
-                progress_callback(cap.get(cv2.CAP_PROP_POS_FRAMES) / cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        process_stream(cap, out, processor, frame_count, progress_callback, batch_size, queue_depth)
     finally:
         cap.release()
         out.release()
-        cv2.destroyAllWindows()
\ No newline at end of file
+        cv2.destroyAllWindows()
+
+
+def process_stream(
+        cap,
+        out,
+        processor: VideoBlurProcessor,
+        frame_count: float = 0,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        batch_size: Optional[int] = None,
+        queue_depth: Optional[int] = None) -> None:
+    """Blur every frame read from ``cap`` and write it to ``out``.
+
+    ``cap`` and ``out`` only need cv2.VideoCapture's isOpened/read and
+    cv2.VideoWriter's write, so ffmpeg pipes can stand in for OpenCV.
+    """
+    batch_size = max(1, batch_size if batch_size is not None else config.VIDEO_BATCH_SIZE)
+    queue_depth = max(0, queue_depth if queue_depth is not None else config.VIDEO_QUEUE_DEPTH)
+
+    if hasattr(processor, "reset"):
+        # Temporal processors must not carry tracks over from a previous video
+        processor.reset()
+
+    def report(frames_done: int) -> None:
+        if progress_callback and frame_count > 0:
+            progress_callback(min(frames_done / frame_count, 1.0))
+
+    if queue_depth == 0 and batch_size == 1:
+        _process_serial(cap, out, processor, report)
+    else:
+        _process_pipelined(cap, out, processor, report, batch_size, max(queue_depth, 1))
+
+
+def _process_serial(cap, out, processor: VideoBlurProcessor, report: Callable[[int], None]) -> None:
+    """Read, blur and write one frame at a time."""
+    frames_done = 0
+    while cap.isOpened():
+        with span("decode"):
+            ret, frame = cap.read()
+        if not ret:
+            break
+        processor.process_frame(frame)
+        with span("encode"):
+            out.write(frame)
+        frames_done += 1
+        count("frames")
+        report(frames_done)
+
+
+def _process_pipelined(
+        cap,
+        out,
+        processor: VideoBlurProcessor,
+        report: Callable[[int], None],
+        batch_size: int,
+        queue_depth: int) -> None:
+    """Overlap decoding, batched inference and encoding using bounded queues.
+
+    A single decoder feeds frames in order, inference runs on the calling
+    thread so callback exceptions (e.g. job cancellation) propagate normally,
+    and a single encoder writes batches in the order they were produced.
+    """
+    decoded = queue.Queue(maxsize=queue_depth)
+    processed = queue.Queue(maxsize=max(1, queue_depth // batch_size))
+    stop = threading.Event()
+    errors = []
+    # Decode and encode spans go to the job's collector from their own threads
+    spans = current()
+
+    def put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def decode() -> None:
+        try:
+            with bind(spans):
+                while cap.isOpened():
+                    with span("decode"):
+                        ret, frame = cap.read()
+                    if not ret or not put(decoded, frame):
+                        break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(decoded, _END)
+
+    def encode() -> None:
+        try:
+            with bind(spans):
+                while True:
+                    batch = get(processed)
+                    if batch is _END:
+                        break
+                    with span("encode"):
+                        for frame in batch:
+                            out.write(frame)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    decoder = threading.Thread(target=decode, name="video-decode", daemon=True)
+    encoder = threading.Thread(target=encode, name="video-encode", daemon=True)
+    decoder.start()
+    encoder.start()
+
+    frames_done = 0
+    try:
+        finished = False
+        while not finished and not stop.is_set():
+            batch = []
+            while len(batch) < batch_size:
+                frame = get(decoded)
+                if frame is _END:
+                    finished = True
+                    break
+                batch.append(frame)
+            if batch:
+                processor.process_batch(batch)
+                if not put(processed, batch):
+                    break
+                frames_done += len(batch)
+                count("frames", len(batch))
+                report(frames_done)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        # On failure the stop event makes both threads exit without draining
+        if not stop.is_set():
+            put(processed, _END)
+        decoder.join()
+        encoder.join()
+
+    if errors:
+        raise errors[0]
@@ -1,13 +1,20 @@
-import cv2
+import logging
 import threading
 import pyvirtualcam
 import time
 import os
 import numpy as np
-from typing import Optional
+from collections import deque
+from typing import List, Optional
 from mss import mss
-from PIL import Image
+from . import config
 from .video_processor.blur_processor import VideoBlurProcessor
+from .video_processor.tracker import TemporalBlurProcessor
+from .video_processor.gating import GatedBlurProcessor
+from .video_processor.realtime import (AdaptiveRate, FrameConverter, LatestSlot, RateMeter,
+                                       percentile, scale_boxes)
+
+logger = logging.getLogger(__name__)
 
 class VirtualCameraService:
     _instance = None
@@ -23,9 +30,10 @@ class VirtualCameraService:
         if not hasattr(self, 'initialized'):
             self.initialized = True
             self.is_running = False
-            self.processor: Optional[VideoBlurProcessor] = None
+            self.processor: Optional[TemporalBlurProcessor] = None
+            self.gate: Optional[GatedBlurProcessor] = None
             self.virtual_cam: Optional[pyvirtualcam.Camera] = None
-            self.processing_thread: Optional[threading.Thread] = None
+            self.threads: List[threading.Thread] = []
             
             # Default screen capture settings
             self.width = 1920  # Full HD width
@@ -42,8 +50,23 @@ class VirtualCameraService:
             return {"status": "error", "message": "Virtual camera is already running"}
 
         try:
-            # Initialize blur processor
-            self.processor = VideoBlurProcessor(self.model_path)
+            # Initialize blur processor; the screen feed barely changes between
+            # frames, so detect on keyframes and track boxes in between
+            detector = VideoBlurProcessor(self.model_path, blur_method=config.BLUR_METHOD)
+            if config.GATE_ENABLED:
+                # Keyframes on an unchanged screen reuse the previous boxes
+                self.gate = detector = GatedBlurProcessor(
+                    detector,
+                    tile_size=config.GATE_TILE_SIZE,
+                    threshold=config.GATE_HASH_THRESHOLD,
+                    region_detect=config.GATE_REGION_DETECT,
+                )
+            self.processor = TemporalBlurProcessor(
+                detector,
+                keyframe_interval=config.KEYFRAME_INTERVAL,
+                diff_threshold=config.KEYFRAME_DIFF_THRESHOLD,
+                box_margin=config.TRACK_BOX_MARGIN,
+            )
 
             # Initialize virtual camera
             self.virtual_cam = pyvirtualcam.Camera(
@@ -53,10 +76,17 @@ class VirtualCameraService:
                 fmt=pyvirtualcam.PixelFormat.BGR
             )
 
-            # Start processing thread
+            # Capture, inference and output run on their own threads joined by
+            # latest-frame-wins slots, so slow inference never delays the feed
+            self._reset_pipeline()
             self.is_running = True
-            self.processing_thread = threading.Thread(target=self._process_screen, daemon=True)
-            self.processing_thread.start()
+            self.threads = [
+                threading.Thread(target=target, name=f"vcam-{name}", daemon=True)
+                for name, target in (("capture", self._capture_loop), ("infer", self._infer_loop),
+                                     ("output", self._output_loop))
+            ]
+            for thread in self.threads:
+                thread.start()
 
             return {"status": "success", "message": "Virtual camera started successfully"}
         except Exception as e:
@@ -71,47 +101,156 @@ class VirtualCameraService:
         try:
             self.is_running = False
             
-            if self.processing_thread and self.processing_thread.is_alive():
-                self.processing_thread.join(timeout=5.0)  # Wait up to 5 seconds
-                
+            for thread in self.threads:
+                if thread.is_alive():
+                    thread.join(timeout=5.0)  # Wait up to 5 seconds
+
             if self.virtual_cam:
                 self.virtual_cam.close()
-                
+
             self.virtual_cam = None
             self.processor = None
-            self.processing_thread = None
+            self.gate = None
+            self.threads = []
 
             return {"status": "success", "message": "Virtual camera stopped successfully"}
         except Exception as e:
             return {"status": "error", "message": f"Failed to stop virtual camera: {str(e)}"}
 
-    def _process_screen(self):
-        """Capture screen, process frames, and send to virtual camera"""
+    def status(self) -> dict:
+        """Latency, dropped frames and achieved frame rates of the running pipeline"""
+        if not self.is_running:
+            return {"running": False}
+        latencies = list(self._latencies)
+        with self._boxes_lock:
+            boxes_captured_at = self._boxes_captured_at
+        return {
+            "running": True,
+            "target_fps": self.fps,
+            "output_fps": round(self._sent.rate(), 2),
+            "capture_fps": round(self._captured.rate(), 2),
+            "inference_fps": round(self._inferred.rate(), 2),
+            "latency_ms": {
+                "mean": round(1000 * sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                "p50": round(1000 * percentile(latencies, 0.5), 2),
+                "p95": round(1000 * percentile(latencies, 0.95), 2),
+            },
+            "box_age_ms": round(1000 * (time.monotonic() - boxes_captured_at), 2) if boxes_captured_at else None,
+            "inference_ms": round(1000 * self._inference_seconds, 2),
+            "inference_interval_ms": round(1000 * self._rate.interval, 2),
+            "frames_sent": self._frames_sent,
+            "dropped_frames": self._output_slot.dropped,
+            "inference_skipped_frames": self._infer_slot.dropped,
+            "buffer_pool_exhausted": self._converter.frames.exhausted + self._converter.smalls.exhausted,
+            "detection_ratio": round(getattr(self.processor, "detection_ratio", 1.0), 4),
+            "gating": self.gate.report() if self.gate else None,
+        }
+
+    def _reset_pipeline(self) -> None:
+        # Buffers: one being captured, one waiting in the slot, one being used downstream
+        self._converter = FrameConverter(self.width, self.height, config.VCAM_INFER_WIDTH, pool_size=3)
+        self._infer_slot = LatestSlot()
+        self._output_slot = LatestSlot()
+        self._boxes_lock = threading.Lock()
+        self._boxes = []
+        self._boxes_captured_at: Optional[float] = None
+        self._rate = AdaptiveRate(self.fps, max_interval=config.VCAM_MAX_INFER_INTERVAL)
+        self._captured = RateMeter()
+        self._inferred = RateMeter()
+        self._sent = RateMeter()
+        self._latencies = deque(maxlen=300)
+        self._inference_seconds = 0.0
+        self._frames_sent = 0
+
+    def _capture_loop(self):
+        """Grab the screen at the target fps and hand each frame to inference and output"""
+        interval = 1.0 / self.fps
+        converter = self._converter
+        next_at = time.monotonic()
         with mss() as sct:
             # Define the screen region to capture (full screen)
             monitor = sct.monitors[1]  # Primary monitor
-            
+
             while self.is_running:
                 try:
-                    # Capture screen
-                    frame = np.array(sct.grab(monitor))
-                    
-                    # Convert from BGRA to BGR
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                    
-                    # Resize if needed
-                    if frame.shape[:2] != (self.height, self.width):
-                        frame = cv2.resize(frame, (self.width, self.height))
-                    
-                    # Process frame using blur processor
-                    self.processor.process_frame(frame)
-                    
-                    # Send to virtual camera
-                    self.virtual_cam.send(frame)
-                    self.virtual_cam.sleep_until_next_frame()
+                    captured_at = time.monotonic()
+                    shot = sct.grab(monitor)
+                    # View the grab's own buffer instead of copying it with np.array
+                    bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+                    # Inference gets its own reduced copy; output blurs the full frame in place
+                    converted = converter.convert(bgra)
+                    if converted is not None:
+                        frame, small = converted
+                        replaced = self._infer_slot.put((small, converter.scale, captured_at))
+                        if replaced is not None:
+                            converter.smalls.release(replaced[0])
+                        replaced = self._output_slot.put((frame, captured_at))
+                        if replaced is not None:
+                            converter.frames.release(replaced[0])
+                        self._captured.tick(captured_at)
                 except Exception as e:
-                    print(f"Error processing frame: {str(e)}")
-                    time.sleep(1/self.fps)  # Prevent busy-waiting on error
+                    logger.error(f"Error capturing frame: {str(e)}")
+
+                next_at += interval
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_at = time.monotonic()  # Fell behind: skip ahead instead of bursting
+
+    def _infer_loop(self):
+        """Detect on the newest reduced frame and publish full-size boxes"""
+        while self.is_running:
+            item = self._infer_slot.get(timeout=0.1)
+            if item is None:
+                continue
+            small, scale, captured_at = item
+            started = time.monotonic()
+            try:
+                boxes = self.processor.update(small)
+            except Exception as e:
+                logger.error(f"Error processing frame: {str(e)}")
+                time.sleep(1/self.fps)  # Prevent busy-waiting on error
+                continue
+            finally:
+                self._converter.smalls.release(small)
+            boxes = scale_boxes(boxes, scale, self.width, self.height)
+            with self._boxes_lock:
+                self._boxes, self._boxes_captured_at = boxes, captured_at
+            elapsed = time.monotonic() - started
+            ema = self._inference_seconds
+            self._inference_seconds = 0.9 * ema + 0.1 * elapsed if ema else elapsed
+            self._inferred.tick()
+
+            # Back off when the output misses its target so capture and output keep the CPU
+            interval = self._rate.update(self._sent.rate()) if self._frames_sent > self.fps else 0.0
+            if interval > elapsed:
+                time.sleep(interval - elapsed)
+
+    def _output_loop(self):
+        """Blur the newest frame with the latest boxes and send it to the virtual camera"""
+        while self.is_running:
+            item = self._output_slot.get(timeout=0.1)
+            if item is None:
+                continue
+            frame, captured_at = item
+            with self._boxes_lock:
+                boxes, ready = self._boxes, self._boxes_captured_at is not None
+            try:
+                if not ready:
+                    continue  # Never send a frame before the first detection has run
+                # Blur in place and send straight from the pooled buffer
+                self.processor.apply_boxes(frame, boxes)
+                self.virtual_cam.send(frame)
+            except Exception as e:
+                logger.error(f"Error sending frame: {str(e)}")
+                continue
+            finally:
+                self._converter.frames.release(frame)
+            now = time.monotonic()
+            self._sent.tick(now)
+            self._latencies.append(now - captured_at)
+            self._frames_sent += 1
 
 # Create singleton instance
 virtual_camera_service = VirtualCameraService()
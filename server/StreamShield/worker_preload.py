@@ -0,0 +1,4 @@
+"""Imported by the job queue's fork server to load the models before workers fork."""
+from .worker_setup import preload_models
+
+preload_models()
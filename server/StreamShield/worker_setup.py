@@ -0,0 +1,103 @@
+import logging
+import os
+from typing import List, Optional, Set
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Thread pools that size themselves from these at import time
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Set by JobQueue before the fork server starts, read by preload_models()
+PRELOAD_ENV = "STREAMSHIELD_PRELOAD_MODELS"
+
+# Threads this process was given by configure_worker (None outside job workers)
+_cpu_share: Optional[int] = None
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def threads_per_worker(workers: int) -> int:
+    """Configured intra-op threads, or an even share of the cores."""
+    if config.WORKER_THREADS > 0:
+        return config.WORKER_THREADS
+    return max(1, len(available_cpus()) // max(1, workers))
+
+
+def cpu_share() -> int:
+    """Cores this process should keep busy: its job worker thread share, or every available core."""
+    return _cpu_share or len(available_cpus())
+
+
+def _parse_cpu_set(text: str) -> Set[int]:
+    cpus: Set[int] = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def cpu_sets(workers: int, spec: Optional[str] = None) -> List[Optional[Set[int]]]:
+    """Core set for each worker slot from WORKER_CPU_AFFINITY (None = unpinned)."""
+    spec = config.WORKER_CPU_AFFINITY if spec is None else spec
+    if not spec:
+        return [None] * workers
+    if spec == "auto":
+        cpus = available_cpus()
+        share = max(1, len(cpus) // workers)
+        # Contiguous blocks keep a worker's threads on neighbouring cores and caches
+        return [set(cpus[(i * share) % len(cpus):(i * share) % len(cpus) + share]) for i in range(workers)]
+    sets = [_parse_cpu_set(part) for part in spec.split(";") if part.strip()]
+    return [sets[i % len(sets)] for i in range(workers)]
+
+
+def limit_thread_env(threads: int) -> None:
+    """Size OpenMP/BLAS pools in processes started after this call."""
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+
+def configure_worker(threads: int, cpus: Optional[Set[int]]) -> None:
+    """Pin the calling process and size its torch/OpenCV thread pools."""
+    global _cpu_share
+    _cpu_share = threads
+    # Worker processes log like the API process
+    logging.basicConfig(level=logging.INFO)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            logger.error(f"Error setting CPU affinity {sorted(cpus)}: {e}")
+    import cv2
+    import torch
+    cv2.setNumThreads(threads)
+    torch.set_num_threads(threads)
+
+
+def preload_models() -> None:
+    """Load and warm the models in the fork server so forked workers inherit them.
+
+    Warmup runs single-threaded: the fork server must not hold an OpenMP
+    thread pool when it forks. Warming up here also fuses the YOLO layers
+    once, so the fused weights are the pages workers share.
+    """
+    paths = os.environ.get(PRELOAD_ENV)
+    if not paths:
+        return
+    yolo_path, _, vosk_path = paths.partition(os.pathsep)
+    import torch
+    from .model_registry import model_registry
+    torch.set_num_threads(1)
+    try:
+        model_registry.warmup(yolo_path or None, vosk_path or None)
+    except Exception as e:
+        # Workers load the models themselves if this fails
+        logger.error(f"Error preloading models: {e}")
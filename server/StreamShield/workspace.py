@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+from . import config
+
+# Bytes copied between quota checks when streaming into a workspace
+_COPY_CHUNK = 1024 * 1024
+
+
+class DiskQuotaError(Exception):
+    """Raised when a workspace would exceed its quota or the disk is nearly full."""
+
+
+class Workspace:
+    """Private scratch directory for one job, removed when the job is done.
+
+    Every intermediate file of a job lives here, so concurrent jobs never
+    share a path. Usable as a context manager; cleanup is idempotent.
+    """
+
+    def __init__(self, prefix: str = "job-", root: Optional[str] = None, quota_bytes: Optional[int] = None,
+                 path: Optional[str] = None):
+        root = root or config.SCRATCH_DIR
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.quota_bytes = config.WORKSPACE_QUOTA_BYTES if quota_bytes is None else quota_bytes
+        # An existing ``path`` reopens a workspace, e.g. a resumable upload after a restart
+        self.path = path or tempfile.mkdtemp(prefix=prefix, dir=root)
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cleanup()
+
+    def file(self, name: str) -> str:
+        """Path for ``name`` inside the workspace (directory parts are dropped)."""
+        name = os.path.basename(name) or "file"
+        return os.path.join(self.path, name)
+
+    def used_bytes(self) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+
+    def reserve(self, nbytes: int, used: Optional[int] = None) -> None:
+        """Raise DiskQuotaError unless ``nbytes`` more can be written."""
+        used = self.used_bytes() if used is None else used
+        if self.quota_bytes and used + nbytes > self.quota_bytes:
+            raise DiskQuotaError(
+                f"Workspace quota exceeded: {used + nbytes} of {self.quota_bytes} bytes")
+        free = shutil.disk_usage(self.path).free
+        if free - nbytes < config.SCRATCH_MIN_FREE_BYTES:
+            raise DiskQuotaError(f"Not enough free space in {self.root}: {free} bytes left")
+
+    def copy_into(self, fileobj, name: str) -> str:
+        """Stream a file object into the workspace, enforcing the quota as it goes."""
+        path = self.file(name)
+        used = self.used_bytes()
+        with open(path, "wb") as out:
+            while True:
+                chunk = fileobj.read(_COPY_CHUNK)
+                if not chunk:
+                    break
+                self.reserve(len(chunk), used)
+                out.write(chunk)
+                used += len(chunk)
+        return path
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,86 @@
+"""Process folders or lists of media files through one warm StreamShield pipeline.
+
+Files are scheduled largest first on a pool of workers that each keep their
+models and MediaProcessor loaded. Every finished file is appended to a JSONL
+journal (by default in the output directory), so running the same command
+again after a crash or Ctrl-C skips what is already done. Aggregated
+throughput is printed as JSON at the end:
+
+    python batch_cli.py recordings/ --output-dir processed/ --option beep_audio --workers 4
+    python batch_cli.py --manifest nightly.txt --output-dir processed/ --option blur
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from worker_settings import add_worker_arguments, apply_worker_settings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="*", help="Media files and directories to process")
+    parser.add_argument("--manifest", help="File listing inputs, one per line, or a JSON list")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--option", choices=["blur", "beep_video", "beep_audio"], default="blur")
+    parser.add_argument("--bad-words", help="Word list replacing the default one, one word or phrase per line")
+    parser.add_argument("--order", choices=["largest", "smallest", "manifest"], default="largest")
+    parser.add_argument("--journal", help="Progress journal (default: <output-dir>/.streamshield-batch.jsonl)")
+    parser.add_argument("--no-recursive", action="store_true", help="Only take files directly inside directories")
+    add_worker_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def read_manifest(path: str):
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    inputs = list(args.inputs) + (read_manifest(args.manifest) if args.manifest else [])
+    if not inputs:
+        print("No inputs given", file=sys.stderr)
+        return 2
+
+    apply_worker_settings(args)
+    from StreamShield.batch import JOURNAL_NAME, BatchJournal, BatchRunner, collect, split_done
+
+    model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "StreamShield")
+    bad_words = None
+    if args.bad_words:
+        with open(args.bad_words) as f:
+            bad_words = [line.strip() for line in f if line.strip()]
+
+    items = collect(inputs, args.output_dir, recursive=not args.no_recursive)
+    journal = BatchJournal(args.journal or os.path.join(args.output_dir, JOURNAL_NAME))
+    runner = BatchRunner(os.path.join(model_dir, "best.pt"), os.path.join(model_dir, "vosk-model-small-en-in-0.4"),
+                         os.path.join(model_dir, "static", "badwords.txt"), workers=args.workers)
+    finished, total = [0], [0]
+
+    def report(entry: dict) -> None:
+        finished[0] += 1
+        detail = entry.get("error") or f"{entry['seconds']:.1f}s"
+        print(f"[{finished[0]}/{total[0]}] {entry['status']} {entry['input']} ({detail})", file=sys.stderr)
+
+    try:
+        done, pending = split_done(items, args.option, journal, runner.settings_hash(args.option, bad_words))
+        total[0] = len(pending)
+        print(f"{len(items)} files, {len(done)} already done, journal {journal.path}", file=sys.stderr)
+        summary = runner.run(items, args.option, journal, bad_words, args.order, on_item=report)
+    except KeyboardInterrupt:
+        print(f"Interrupted; run the same command again to resume from {journal.path}", file=sys.stderr)
+        return 130
+    finally:
+        runner.shutdown()
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Detection speed and agreement of each inference backend against the PyTorch baseline.
+
+Reference frames come from a video or a directory of images. The baseline is
+``best.pt`` on PyTorch at the model's default input size; every candidate is
+warmed up first, timed per frame and in batches, and its boxes are matched to
+the baseline's at IoU >= 0.5. Backends whose runtime is missing fall back to
+torch and are reported as such. Run from the server directory:
+
+    python -m benchmarks.bench_backends path/to/frames/ --backends onnx onnx:int8 openvino openvino:int8 --imgsz 480 640
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import cv2
+
+from StreamShield.video_processor import VideoBlurProcessor
+from StreamShield.video_processor.tracker import box_iou
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "StreamShield", "best.pt")
+
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+def load_frames(source: str, limit: int):
+    """Frames from an image directory (sorted by name) or a video file."""
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(_IMAGE_EXTENSIONS))
+        return [frame for frame in (cv2.imread(p) for p in paths[:limit]) if frame is not None]
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while cap.isOpened() and len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _time_detector(detector: VideoBlurProcessor, frames, batch: int):
+    detector.detect(frames[0])  # export, load and warm up outside the timings
+    start = time.perf_counter()
+    boxes = [detector.detect(frame) for frame in frames]
+    single_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch):
+        detector.detect_batch(frames[i:i + batch])
+    batch_seconds = time.perf_counter() - start
+    return boxes, len(frames) / single_seconds, len(frames) / batch_seconds
+
+
+def agreement(reference, candidate) -> dict:
+    """Box precision/recall at IoU 0.5, mean IoU of matches and frames that agree fully."""
+    ref_total = cand_total = recalled = precise = agreeing = 0
+    ious = []
+    for ref, cand in zip(reference, candidate):
+        ref_total += len(ref)
+        cand_total += len(cand)
+        best = [max((box_iou(box, other) for other in cand), default=0.0) for box in ref]
+        ious.extend(iou for iou in best if iou >= 0.5)
+        frame_recalled = sum(1 for iou in best if iou >= 0.5)
+        frame_precise = sum(1 for box in cand if any(box_iou(box, other) >= 0.5 for other in ref))
+        recalled += frame_recalled
+        precise += frame_precise
+        agreeing += frame_recalled == len(ref) and frame_precise == len(cand)
+    return {
+        "recall_iou50": round(recalled / ref_total, 4) if ref_total else 1.0,
+        "precision_iou50": round(precise / cand_total, 4) if cand_total else 1.0,
+        "mean_iou": round(sum(ious) / len(ious), 4) if ious else None,
+        "frame_agreement": round(agreeing / len(reference), 4),
+    }
+
+
+def run(source: str, model_path: str, backends, sizes, batch: int, max_frames: int) -> dict:
+    frames = load_frames(source, max_frames)
+    if not frames:
+        raise SystemExit(f"No frames read from {source}")
+    baseline = VideoBlurProcessor(model_path, backend="torch", imgsz=0, int8=False)
+    reference, single_fps, batch_fps = _time_detector(baseline, frames, batch)
+    results = [{"backend": "torch", "imgsz": 0, "int8": False, "active_backend": "torch",
+                "fps": round(single_fps, 2), "batch_fps": round(batch_fps, 2), **agreement(reference, reference)}]
+
+    for spec in backends:
+        backend, _, variant = spec.partition(":")
+        for imgsz in sizes:
+            detector = VideoBlurProcessor(model_path, backend=backend, imgsz=imgsz, int8=variant == "int8")
+            boxes, fps, b_fps = _time_detector(detector, frames, batch)
+            results.append({
+                "backend": backend,
+                "imgsz": imgsz,
+                "int8": detector.int8,
+                "active_backend": detector.active_backend,
+                "fps": round(fps, 2),
+                "batch_fps": round(b_fps, 2),
+                "speedup": round(fps / single_fps, 2),
+                **agreement(reference, boxes),
+            })
+    return {"source": source, "frames": len(frames), "batch": batch, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Video file or directory of reference images")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx:int8", "openvino", "openvino:int8"],
+                        help='Backends to compare, optionally suffixed with ":int8"')
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640],
+                        help="Detector input sizes to try for each backend (0 = model default)")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--max-frames", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.source, args.model, args.backends, args.imgsz, args.batch, args.max_frames), indent=2))
+
+
+if __name__ == "__main__":
+    main()
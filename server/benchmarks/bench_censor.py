@@ -0,0 +1,76 @@
+"""Single-buffer censor_audio against the previous per-word splicing.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_censor --minutes 60 --hits 500
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from StreamShield.audio_processor import censor_audio
+
+
+def legacy_censor_audio(audio, transcription_data, bad_words):
+    """The original implementation: rebuild the segment once per bad word."""
+    censored_transcript = []
+    for word in transcription_data:
+        word_text = word["word"].lower()
+        if word_text in bad_words:
+            start_time = int(word["start"] * 1000)
+            end_time = int(word["end"] * 1000)
+            word_duration = end_time - start_time
+            beep = Sine(1000).to_audio_segment(duration=word_duration).apply_gain(-5)
+            audio = audio[:start_time] + beep + audio[end_time:]
+            censored_transcript.append(f"[{word['start']:.2f}s - {word['end']:.2f}s] {word['word']}")
+    return audio, censored_transcript
+
+
+def make_fixture(minutes: float, hits: int, frame_rate: int, channels: int):
+    rng = np.random.default_rng(0)
+    frames = int(minutes * 60 * frame_rate)
+    samples = (rng.standard_normal(frames * channels) * 3000).astype(np.int16)
+    audio = AudioSegment(samples.tobytes(), frame_rate=frame_rate, sample_width=2, channels=channels)
+    duration = frames / frame_rate
+    starts = np.sort(rng.uniform(0, duration - 1, size=hits))
+    words = [{"word": "bleep", "start": float(s), "end": float(s + rng.uniform(0.2, 0.6)), "conf": 1.0}
+             for s in starts]
+    return audio, words
+
+
+def run(minutes: float, hits: int, frame_rate: int, channels: int, legacy: bool) -> dict:
+    audio, words = make_fixture(minutes, hits, frame_rate, channels)
+    bad_words = {"bleep"}
+    result = {"minutes": minutes, "hits": hits, "frame_rate": frame_rate, "channels": channels}
+
+    start = time.perf_counter()
+    censored, transcript = censor_audio(audio, words, bad_words)
+    result["numpy_seconds"] = round(time.perf_counter() - start, 3)
+    assert len(censored) == len(audio) and len(transcript) == hits
+
+    if legacy:
+        start = time.perf_counter()
+        legacy_censor_audio(audio, words, bad_words)
+        result["legacy_seconds"] = round(time.perf_counter() - start, 3)
+        result["speedup"] = round(result["legacy_seconds"] / max(result["numpy_seconds"], 1e-9), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--hits", type=int, default=500)
+    parser.add_argument("--frame-rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the new implementation")
+    args = parser.parse_args()
+    print(json.dumps(run(args.minutes, args.hits, args.frame_rate, args.channels,
+                         not args.skip_legacy), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Skip ratio, speed and coverage of tile-hash gating against detecting every frame.
+
+Runs the detector on every frame, then through GatedBlurProcessor with
+full-frame and changed-region detection, and reports how many frames were
+skipped, the fraction of pixels the detector saw, fps, and how much of the
+every-frame boxes the gated boxes still cover. Run from the server directory:
+
+    python -m benchmarks.bench_gating path/to/screen_recording.mp4 --tile-size 64 --threshold 3
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from StreamShield.video_processor import VideoBlurProcessor, GatedBlurProcessor
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "StreamShield", "best.pt")
+
+
+def _read_frames(video_path: str, limit: int):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while cap.isOpened() and len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _coverage(reference, candidate, shape) -> float:
+    """Fraction of the reference boxes' pixels covered by the candidate boxes."""
+    ref_mask = np.zeros(shape[:2], dtype=bool)
+    cand_mask = np.zeros(shape[:2], dtype=bool)
+    for x1, y1, x2, y2 in reference:
+        ref_mask[y1:y2, x1:x2] = True
+    for x1, y1, x2, y2 in candidate:
+        cand_mask[y1:y2, x1:x2] = True
+    total = ref_mask.sum()
+    return float((ref_mask & cand_mask).sum() / total) if total else 1.0
+
+
+def _gated(detector, frames, baseline, **kwargs) -> dict:
+    gate = GatedBlurProcessor(detector, **kwargs)
+    start = time.perf_counter()
+    boxes = [gate.detect(frame) for frame in frames]
+    seconds = time.perf_counter() - start
+    coverages = [_coverage(ref, cand, frame.shape) for frame, ref, cand in zip(frames, baseline, boxes)]
+    return {
+        **gate.report(),
+        "fps": round(len(frames) / seconds, 2),
+        "pixel_coverage_mean": round(float(np.mean(coverages)), 4),
+        "pixel_coverage_min": round(float(np.min(coverages)), 4),
+    }
+
+
+def run(video_path: str, model_path: str, tile_size: int, threshold: int, max_frames: int) -> dict:
+    frames = _read_frames(video_path, max_frames)
+    if not frames:
+        raise SystemExit(f"No frames read from {video_path}")
+    detector = VideoBlurProcessor(model_path)
+    detector.detect(frames[0])  # load and warm up the model outside the timings
+
+    start = time.perf_counter()
+    baseline = [detector.detect(frame) for frame in frames]
+    baseline_fps = len(frames) / (time.perf_counter() - start)
+
+    full = _gated(detector, frames, baseline, tile_size=tile_size, threshold=threshold)
+    region = _gated(detector, frames, baseline, tile_size=tile_size, threshold=threshold, region_detect=True)
+    for result in (full, region):
+        result["speedup"] = round(result["fps"] / baseline_fps, 2)
+    return {
+        "video": video_path,
+        "frames": len(frames),
+        "tile_size": tile_size,
+        "threshold": threshold,
+        "baseline_fps": round(baseline_fps, 2),
+        "gated": full,
+        "gated_regions": region,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--tile-size", type=int, default=64)
+    parser.add_argument("--threshold", type=int, default=3)
+    parser.add_argument("--max-frames", type=int, default=900)
+    args = parser.parse_args()
+    print(json.dumps(run(args.video, args.model, args.tile_size, args.threshold, args.max_frames), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compile and matching throughput of the bad-word matcher on large lists.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_matcher --terms 10000 --words 200000
+"""
+import argparse
+import json
+import random
+import string
+import time
+
+from StreamShield.audio_processor.matcher import compile_matcher
+
+
+def _random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def make_fixture(terms: int, words: int, phrase_ratio: float, hit_ratio: float, seed: int = 0):
+    rng = random.Random(seed)
+    vocabulary = [_random_word(rng) for _ in range(5000)]
+    bad_terms = []
+    for _ in range(terms):
+        if rng.random() < phrase_ratio:
+            bad_terms.append(" ".join(_random_word(rng) for _ in range(rng.randint(2, 4))))
+        else:
+            bad_terms.append(_random_word(rng))
+
+    transcript, t = [], 0.0
+    while len(transcript) < words:
+        if rng.random() < hit_ratio:
+            tokens = rng.choice(bad_terms).split()
+        else:
+            tokens = [rng.choice(vocabulary)]
+        for token in tokens:
+            transcript.append({"word": token, "start": t, "end": t + 0.3, "conf": rng.uniform(0.5, 1.0)})
+            t += 0.35
+    return bad_terms, transcript[:words]
+
+
+def run(terms: int, words: int, phrase_ratio: float, hit_ratio: float) -> dict:
+    bad_terms, transcript = make_fixture(terms, words, phrase_ratio, hit_ratio)
+
+    start = time.perf_counter()
+    matcher = compile_matcher(bad_terms)
+    compile_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = compile_matcher(list(reversed(bad_terms)))
+    cached_seconds = time.perf_counter() - start
+    assert cached is matcher
+
+    start = time.perf_counter()
+    matches = matcher.match_words(transcript)
+    match_seconds = time.perf_counter() - start
+
+    # Baseline: the previous exact single-token set lookup (no phrases, no normalization)
+    bad_set = set(bad_terms)
+    start = time.perf_counter()
+    exact = [w for w in transcript if w["word"].lower() in bad_set]
+    set_seconds = time.perf_counter() - start
+
+    return {
+        "terms": terms,
+        "automaton_terms": matcher.size,
+        "transcript_words": words,
+        "compile_seconds": round(compile_seconds, 4),
+        "cached_compile_seconds": round(cached_seconds, 4),
+        "match_seconds": round(match_seconds, 4),
+        "words_per_second": round(words / match_seconds),
+        "matches": len(matches),
+        "set_lookup_seconds": round(set_seconds, 4),
+        "set_lookup_matches": len(exact),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=200000)
+    parser.add_argument("--phrase-ratio", type=float, default=0.3)
+    parser.add_argument("--hit-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+    print(json.dumps(run(args.terms, args.words, args.phrase_ratio, args.hit_ratio), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Cost per megapixel of each region obfuscation method.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_obfuscation --width 1920 --height 1080
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from StreamShield.video_processor.obfuscation import OBFUSCATORS
+
+
+def run(width: int, height: int, repeats: int, kernel: int, sigma: float) -> dict:
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    megapixels = width * height / 1e6
+    results = {}
+    for name, obfuscate in OBFUSCATORS.items():
+        frame = source.copy()
+        obfuscate(frame, (kernel, kernel), sigma)  # warm up OpenCV's code paths
+        timings = []
+        for _ in range(repeats):
+            frame[:] = source
+            start = time.perf_counter()
+            obfuscate(frame, (kernel, kernel), sigma)
+            timings.append(time.perf_counter() - start)
+        median = float(np.median(timings))
+        results[name] = {
+            "ms_per_roi": round(median * 1000, 3),
+            "ms_per_megapixel": round(median * 1000 / megapixels, 3),
+        }
+    return {"roi": [width, height], "kernel": kernel, "sigma": sigma, "methods": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--kernel", type=int, default=99)
+    parser.add_argument("--sigma", type=float, default=30)
+    args = parser.parse_args()
+    print(json.dumps(run(args.width, args.height, args.repeats, args.kernel, args.sigma), indent=2))
+
+
+if __name__ == "__main__":
+    main()
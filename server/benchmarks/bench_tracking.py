@@ -0,0 +1,100 @@
+"""Accuracy and cost of keyframe tracking against every-frame detection.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_tracking path/to/video.mp4 --interval 5
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from StreamShield.video_processor import VideoBlurProcessor, TemporalBlurProcessor
+from StreamShield.video_processor.tracker import box_iou
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "StreamShield", "best.pt")
+
+
+def _read_frames(video_path: str, limit: int):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while cap.isOpened() and len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _coverage(reference, candidate, shape) -> float:
+    """Fraction of the reference boxes' pixels covered by the candidate boxes."""
+    ref_mask = np.zeros(shape[:2], dtype=bool)
+    cand_mask = np.zeros(shape[:2], dtype=bool)
+    for x1, y1, x2, y2 in reference:
+        ref_mask[y1:y2, x1:x2] = True
+    for x1, y1, x2, y2 in candidate:
+        cand_mask[y1:y2, x1:x2] = True
+    total = ref_mask.sum()
+    return float((ref_mask & cand_mask).sum() / total) if total else 1.0
+
+
+def run(video_path: str, model_path: str, interval: int, diff_threshold: float,
+        margin: float, max_frames: int) -> dict:
+    frames = _read_frames(video_path, max_frames)
+    if not frames:
+        raise SystemExit(f"No frames read from {video_path}")
+    detector = VideoBlurProcessor(model_path)
+    detector.detect(frames[0])  # load and warm up the model outside the timings
+
+    start = time.perf_counter()
+    baseline = [detector.detect(frame) for frame in frames]
+    baseline_seconds = time.perf_counter() - start
+
+    tracker = TemporalBlurProcessor(detector, keyframe_interval=interval,
+                                    diff_threshold=diff_threshold, box_margin=margin)
+    start = time.perf_counter()
+    tracked = [tracker.update(frame) for frame in frames]
+    tracked_seconds = time.perf_counter() - start
+
+    coverages, matched, total = [], 0, 0
+    for frame, ref, cand in zip(frames, baseline, tracked):
+        coverages.append(_coverage(ref, cand, frame.shape))
+        total += len(ref)
+        matched += sum(1 for box in ref if any(box_iou(box, c) >= 0.5 for c in cand))
+
+    return {
+        "video": video_path,
+        "frames": len(frames),
+        "keyframe_interval": interval,
+        "diff_threshold": diff_threshold,
+        "box_margin": margin,
+        "detection_ratio": round(tracker.detection_ratio, 4),
+        "baseline_fps": round(len(frames) / baseline_seconds, 2),
+        "tracked_fps": round(len(frames) / tracked_seconds, 2),
+        "speedup": round(baseline_seconds / tracked_seconds, 2),
+        "box_recall_iou50": round(matched / total, 4) if total else 1.0,
+        "pixel_coverage_mean": round(float(np.mean(coverages)), 4),
+        "pixel_coverage_min": round(float(np.min(coverages)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--interval", type=int, default=5)
+    parser.add_argument("--diff-threshold", type=float, default=0.04)
+    parser.add_argument("--margin", type=float, default=0.1)
+    parser.add_argument("--max-frames", type=int, default=900)
+    args = parser.parse_args()
+    print(json.dumps(run(args.video, args.model, args.interval, args.diff_threshold,
+                         args.margin, args.max_frames), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Serial against parallel chunked Vosk transcription: speed and timing agreement.
+
+Run from the server directory on a 16 kHz mono WAV:
+
+    python -m benchmarks.bench_transcribe speech.wav --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import time
+
+from StreamShield.audio_processor import transcribe_audio
+from StreamShield.audio_processor.parallel_transcribe import transcribe_audio_parallel
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "StreamShield", "vosk-model-small-en-in-0.4")
+
+
+def compare(serial, parallel, tolerance: float) -> dict:
+    """Match words in order and report how many agree within ``tolerance`` seconds."""
+    matched, offsets, j = 0, [], 0
+    for word in serial:
+        while j < len(parallel) and parallel[j]["start"] < word["start"] - tolerance:
+            j += 1
+        if j < len(parallel) and parallel[j]["word"] == word["word"] \
+                and abs(parallel[j]["start"] - word["start"]) <= tolerance:
+            offsets.append(abs(parallel[j]["start"] - word["start"]))
+            matched += 1
+            j += 1
+    return {
+        "serial_words": len(serial),
+        "parallel_words": len(parallel),
+        "matched_within_tolerance": round(matched / len(serial), 4) if serial else 1.0,
+        "max_start_offset": round(max(offsets), 3) if offsets else 0.0,
+    }
+
+
+def run(audio_file: str, model_path: str, workers_list, chunk_seconds: float,
+        overlap_seconds: float, tolerance: float) -> dict:
+    start = time.perf_counter()
+    serial = transcribe_audio(audio_file, model_path, workers=1)
+    serial_seconds = time.perf_counter() - start
+
+    results = {"audio": audio_file, "serial_seconds": round(serial_seconds, 2), "parallel": []}
+    for workers in workers_list:
+        # First call spawns and warms the pool; time the second one
+        transcribe_audio_parallel(audio_file, model_path, workers, chunk_seconds, overlap_seconds)
+        start = time.perf_counter()
+        parallel = transcribe_audio_parallel(audio_file, model_path, workers, chunk_seconds, overlap_seconds)
+        seconds = time.perf_counter() - start
+        entry = {"workers": workers, "seconds": round(seconds, 2),
+                 "speedup": round(serial_seconds / seconds, 2)}
+        entry.update(compare(serial, parallel, tolerance))
+        results["parallel"].append(entry)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 4])
+    parser.add_argument("--chunk-seconds", type=float, default=30.0)
+    parser.add_argument("--overlap-seconds", type=float, default=1.0)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.audio, args.model, args.workers, args.chunk_seconds,
+                         args.overlap_seconds, args.tolerance), indent=2))
+
+
+if __name__ == "__main__":
+    main()
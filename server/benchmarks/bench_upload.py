@@ -0,0 +1,78 @@
+"""Chunked upload throughput and time until a streaming consumer sees the first byte.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_upload --size-mb 512 --chunk-mb 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+from StreamShield import growing_file
+from StreamShield.uploads import UploadSession
+
+
+def _consume(path: str, result: dict) -> None:
+    """Stand-in for ffmpeg: read the growing file from stdin and note the first byte."""
+    proc = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    growing_file.start_feeder(path, proc)
+    first = proc.stdout.read(1)
+    result["first_byte_at"] = time.perf_counter()
+    total = len(first)
+    for chunk in iter(lambda: proc.stdout.read(1024 * 1024), b""):
+        total += len(chunk)
+    proc.wait()
+    result["done_at"] = time.perf_counter()
+    result["bytes"] = total
+
+
+def run(size_mb: int, chunk_mb: int, early_start: bool) -> dict:
+    size = size_mb * 1024 ** 2
+    chunk_size = chunk_mb * 1024 ** 2
+    payload = os.urandom(chunk_size)
+    with tempfile.TemporaryDirectory() as root:
+        session = UploadSession.create("bench.wav", size, chunk_size, root)
+        consumer: dict = {}
+        thread = threading.Thread(target=_consume, args=(session.input_path, consumer))
+        if early_start:
+            thread.start()
+
+        start = time.perf_counter()
+        for index in range(session.chunk_count):
+            data = payload[:session.chunk_length(index)]
+            session.write_chunk(index, data, hashlib.sha256(data).hexdigest())
+        session.finish()
+        upload_seconds = time.perf_counter() - start
+
+        if not early_start:
+            thread.start()
+        thread.join()
+
+    return {
+        "size_mb": size_mb,
+        "chunk_mb": chunk_mb,
+        "early_start": early_start,
+        "upload_seconds": round(upload_seconds, 3),
+        "upload_mb_s": round(size_mb / upload_seconds, 1),
+        "time_to_first_byte_seconds": round(consumer["first_byte_at"] - start, 4),
+        "consumer_done_after_upload_seconds": round(consumer["done_at"] - start - upload_seconds, 4),
+        "consumer_bytes_ok": consumer["bytes"] == size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--chunk-mb", type=int, default=8)
+    args = parser.parse_args()
+    results = [run(args.size_mb, args.chunk_mb, early_start) for early_start in (False, True)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
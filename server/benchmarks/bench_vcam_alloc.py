@@ -0,0 +1,97 @@
+"""Per-frame allocations of the virtual camera frame path, before and after buffer pooling.
+
+Uses synthetic BGRA grabs instead of mss, so it runs headless. Run from the
+server directory:
+
+    python -m benchmarks.bench_vcam_alloc --screen 2560x1440 --out 1920x1080 --frames 300
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from StreamShield.video_processor.obfuscation import gaussian
+from StreamShield.video_processor.realtime import FrameConverter
+
+_BOXES = [(200, 150, 520, 400), (900, 500, 1300, 800)]
+
+
+def _blur_boxes_legacy(frame) -> None:
+    for x1, y1, x2, y2 in _BOXES:
+        roi = frame[y1:y2, x1:x2]
+        roi[:] = cv2.GaussianBlur(roi, (99, 99), 30)
+
+
+def legacy_frame(raw: bytearray, shape, out_size, infer_width: int) -> None:
+    """The previous path: np.array copy, cvtColor and resize into fresh arrays."""
+    frame = cv2.cvtColor(np.array(np.frombuffer(raw, np.uint8).reshape(shape)), cv2.COLOR_BGRA2BGR)
+    if frame.shape[:2] != (out_size[1], out_size[0]):
+        frame = cv2.resize(frame, out_size)
+    scale = min(1.0, infer_width / float(out_size[0]))
+    cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    _blur_boxes_legacy(frame)
+
+
+def pooled_frame(raw: bytearray, shape, converter: FrameConverter) -> None:
+    frame, small = converter.convert(np.frombuffer(raw, np.uint8).reshape(shape))
+    for x1, y1, x2, y2 in _BOXES:
+        gaussian(frame[y1:y2, x1:x2], (99, 99), 30)
+    converter.smalls.release(small)
+    converter.frames.release(frame)
+
+
+def _profile(step, frames: int) -> dict:
+    step()  # Warm up lazily created buffers and OpenCV internals
+    tracemalloc.start()
+    transient = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step()
+        _, peak = tracemalloc.get_traced_memory()
+        transient += peak - before
+    seconds = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ms_per_frame": round(1000 * seconds / frames, 3),
+        "transient_mb_per_frame": round(transient / frames / 1024 ** 2, 3),
+        "allocated_mb_per_second_at_30fps": round(30 * transient / frames / 1024 ** 2, 1),
+        "retained_mb": round(current / 1024 ** 2, 3),
+    }
+
+
+def run(screen, out_size, frames: int, infer_width: int) -> dict:
+    shape = (screen[1], screen[0], 4)
+    raw = bytearray(np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8).tobytes())
+    converter = FrameConverter(out_size[0], out_size[1], infer_width)
+    return {
+        "screen": f"{screen[0]}x{screen[1]}",
+        "output": f"{out_size[0]}x{out_size[1]}",
+        "frames": frames,
+        "legacy": _profile(lambda: legacy_frame(raw, shape, out_size, infer_width), frames),
+        "pooled": _profile(lambda: pooled_frame(raw, shape, converter), frames),
+    }
+
+
+def _size(text: str):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--screen", type=_size, default=(2560, 1440))
+    parser.add_argument("--out", type=_size, default=(1920, 1080))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--infer-width", type=int, default=640)
+    args = parser.parse_args()
+    print(json.dumps(run(args.screen, args.out, args.frames, args.infer_width), indent=2))
+
+
+if __name__ == "__main__":
+    main()
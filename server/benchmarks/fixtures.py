@@ -0,0 +1,222 @@
+"""Deterministic synthetic fixtures for the benchmarks: screen recordings and speech-like audio.
+
+Everything is generated offline from a seed, so two runs with the same
+parameters time identical inputs. Generate a set by hand from the server
+directory:
+
+    python -m benchmarks.fixtures out_dir --seconds 20 --size 1280x720 --audio-seconds 60
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import wave
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Vocabulary of the synthetic speech; BAD_WORDS are the ones the benchmarks censor
+VOCABULARY = ["hello", "account", "password", "login", "secure", "today", "settings", "profile",
+              "damn", "hell", "crap", "bloody"]
+BAD_WORDS = ["damn", "hell", "crap", "bloody"]
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_LOREM = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+          "incididunt ut labore et dolore magna aliqua").split()
+
+
+def sha256_of(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ScreenScene:
+    """A browser-like login page: URL bar, scrolling page text and a login form being filled in.
+
+    The first and last thirds are static apart from a blinking cursor and
+    typing; the middle third scrolls the page, so gating and tracking see
+    both still and moving content.
+    """
+
+    def __init__(self, width: int, height: int, frames: int, seed: int = 0):
+        self.width, self.height, self.frames = width, height, frames
+        rng = np.random.default_rng(seed)
+        self.lines = [" ".join(rng.choice(_LOREM, size=8)) for _ in range(200)]
+        self.session = "".join(rng.choice(list("abcdef0123456789"), size=12))
+        self.scale = height / 720.0
+        s = self.scale
+        self.url_box = (int(20 * s), int(12 * s), width - int(20 * s), int(52 * s))
+        form_w, form_h = int(420 * s), int(260 * s)
+        x1, y1 = (width - form_w) // 2, (height - form_h) // 2 + int(20 * s)
+        self.login_box = (x1, y1, x1 + form_w, y1 + form_h)
+
+    def boxes(self):
+        """Ground-truth boxes of the sensitive regions (URL bar, login form)."""
+        return [self.url_box, self.login_box]
+
+    def render(self, index: int) -> np.ndarray:
+        s, width, height = self.scale, self.width, self.height
+        frame = np.full((height, width, 3), 245, np.uint8)
+        third = max(1, self.frames // 3)
+        scroll = min(max(index - third, 0), third) * 3 * s
+
+        # Page body
+        line_height = int(28 * s)
+        top = int(70 * s)
+        first = int(scroll // line_height)
+        for row in range(first, first + height // line_height + 2):
+            y = top + int(row * line_height - scroll) + line_height
+            if top < y < height:
+                cv2.putText(frame, self.lines[row % len(self.lines)], (int(40 * s), y), _FONT, 0.6 * s,
+                            (90, 90, 90), max(1, int(s)), cv2.LINE_AA)
+
+        # Browser chrome and URL bar
+        cv2.rectangle(frame, (0, 0), (width, int(64 * s)), (225, 225, 225), -1)
+        x1, y1, x2, y2 = self.url_box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 255), -1)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (180, 180, 180), 1)
+        cv2.putText(frame, f"https://accounts.example.com/login?session={self.session}",
+                    (x1 + int(12 * s), y2 - int(12 * s)), _FONT, 0.6 * s, (40, 40, 40), max(1, int(s)), cv2.LINE_AA)
+
+        # Login form, typed into over time
+        x1, y1, x2, y2 = self.login_box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 255), -1)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (160, 160, 160), 2)
+        cv2.putText(frame, "Sign in", (x1 + int(24 * s), y1 + int(44 * s)), _FONT, 0.9 * s, (30, 30, 30),
+                    max(1, int(2 * s)), cv2.LINE_AA)
+        typed = min(index // 4, 24)
+        fields = [("user@example.com"[:min(typed, 16)], y1 + int(80 * s)), ("*" * max(0, typed - 16), y1 + int(150 * s))]
+        for text, fy in fields:
+            cv2.rectangle(frame, (x1 + int(24 * s), fy), (x2 - int(24 * s), fy + int(44 * s)), (120, 120, 120), 1)
+            cv2.putText(frame, text, (x1 + int(36 * s), fy + int(30 * s)), _FONT, 0.6 * s, (20, 20, 20),
+                        max(1, int(s)), cv2.LINE_AA)
+        if (index // 15) % 2 == 0:
+            cursor_x = x1 + int(40 * s) + int(11 * s) * min(typed, 16)
+            cv2.line(frame, (cursor_x, y1 + int(86 * s)), (cursor_x, y1 + int(118 * s)), (0, 0, 0), 1)
+        cv2.rectangle(frame, (x1 + int(24 * s), y2 - int(50 * s)), (x2 - int(24 * s), y2 - int(14 * s)),
+                      (200, 120, 40), -1)
+        return frame
+
+
+def speech_samples(seconds: float, rate: int = 16000, seed: int = 0):
+    """Speech-like mono int16 samples and the timing of every synthetic word.
+
+    Words are voiced bursts: a wobbling fundamental with harmonics shaped by
+    two formants under a smooth envelope, separated by low noise.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * rate)
+    samples = rng.standard_normal(total) * 60.0
+    words = []
+    position = rng.uniform(0.2, 0.5)
+    while position < seconds - 0.8:
+        duration = rng.uniform(0.25, 0.6)
+        start, end = int(position * rate), int((position + duration) * rate)
+        t = np.arange(end - start) / rate
+        f0 = rng.uniform(100, 220)
+        pitch = f0 * (1 + 0.04 * np.sin(2 * np.pi * rng.uniform(3, 6) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / rate
+        f1, f2 = rng.uniform(300, 900), rng.uniform(900, 2500)
+        burst = np.zeros_like(t)
+        for harmonic in range(1, 25):
+            freq = harmonic * f0
+            gain = np.exp(-((freq - f1) / 150) ** 2) + 0.6 * np.exp(-((freq - f2) / 250) ** 2) + 0.03
+            burst += gain * np.sin(harmonic * phase)
+        burst *= np.hanning(len(t)) * 6000 / max(np.abs(burst).max(), 1e-6)
+        samples[start:end] += burst
+        words.append({"word": str(rng.choice(VOCABULARY)), "start": round(position, 3),
+                      "end": round(position + duration, 3), "conf": 1.0})
+        position += duration + rng.uniform(0.08, 0.4)
+    return np.clip(samples, -32768, 32767).astype(np.int16), words
+
+
+def write_wav(path: str, samples: np.ndarray, rate: int) -> None:
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+
+
+def write_video(path: str, scene: ScreenScene, fps: int, audio_path: Optional[str] = None) -> None:
+    """Encode the scene to H.264 (plus the audio as AAC) through an ffmpeg pipe."""
+    cmd = ["ffmpeg", "-y", "-loglevel", "error",
+           "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{scene.width}x{scene.height}", "-r", str(fps), "-i", "pipe:0"]
+    if audio_path:
+        cmd += ["-i", audio_path, "-c:a", "aac", "-shortest"]
+    cmd += ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p", path]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        for index in range(scene.frames):
+            proc.stdin.write(scene.render(index).tobytes())
+    finally:
+        proc.stdin.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed writing {path}")
+
+
+def generate(out_dir: str, seconds: float = 20, size=(1280, 720), fps: int = 30,
+             audio_seconds: float = 60, audio_rate: int = 44100, seed: int = 0) -> dict:
+    """Write every fixture to ``out_dir`` and return their paths, word timings and checksums.
+
+    An existing set generated with the same parameters is reused.
+    """
+    params = {"seconds": seconds, "size": list(size), "fps": fps, "audio_seconds": audio_seconds,
+              "audio_rate": audio_rate, "seed": seed}
+    manifest_path = os.path.join(out_dir, "fixtures.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["params"] == params and all(os.path.exists(p) for p in manifest["files"].values()):
+            return manifest
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = {
+        "speech_wav": os.path.join(out_dir, "speech.wav"),
+        "screen_video": os.path.join(out_dir, "screen.mp4"),
+    }
+    samples, words = speech_samples(audio_seconds, audio_rate, seed)
+    write_wav(files["speech_wav"], samples, audio_rate)
+    scene = ScreenScene(size[0], size[1], int(seconds * fps), seed)
+    write_video(files["screen_video"], scene, fps, files["speech_wav"])
+
+    manifest = {
+        "params": params,
+        "files": files,
+        "sha256": {name: sha256_of(path) for name, path in files.items()},
+        "words": words,
+        "bad_words": BAD_WORDS,
+        "boxes": scene.boxes(),
+        "video_frames": scene.frames,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _size(text: str):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--size", type=_size, default=(1280, 720))
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--audio-seconds", type=float, default=60)
+    parser.add_argument("--audio-rate", type=int, default=44100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    manifest = generate(args.out_dir, args.seconds, args.size, args.fps, args.audio_seconds, args.audio_rate, args.seed)
+    print(json.dumps({key: manifest[key] for key in ("params", "files", "sha256", "video_frames")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Job throughput as the worker pool grows from 1 to N processes.
+
+Runs the same input through JobQueue with 1, 2, ... N workers and reports
+jobs per minute, speedup over one worker and per-worker memory (resident and
+shared, to show copy-on-write model sharing with --preload). The result
+cache is disabled so every job does the full work. Run from the server
+directory:
+
+    python -m benchmarks.load_test sample.mp4 --max-workers 8 --jobs-per-worker 4 --preload --affinity auto
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+
+def _statm_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            fields = f.read().split()
+        page = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        return round(int(fields[1]) * page, 1), round(int(fields[2]) * page, 1)
+    except (OSError, ValueError, IndexError):
+        return None, None
+
+
+def run_once(input_path: str, workers: int, jobs: int, option: str, model_path: str,
+             vosk_model_path: str, badwords_path: str) -> dict:
+    from StreamShield.job_queue import JobQueue
+
+    queue = JobQueue(model_path, vosk_model_path, workers, max_queue_depth=jobs)
+    queue.start()
+    warm = []
+    try:
+        # Start every worker (and load its models) before timing
+        warm = [queue.submit(input_path, os.path.join(tempfile.gettempdir(), f"warm_{i}_{os.path.basename(input_path)}"),
+                             option, badwords_path) for i in range(workers)]
+        for job in warm:
+            job.future.result()
+        with tempfile.TemporaryDirectory() as out_dir:
+            start = time.perf_counter()
+            submitted = [queue.submit(input_path, os.path.join(out_dir, f"out_{i}_{os.path.basename(input_path)}"),
+                                      option, badwords_path) for i in range(jobs)]
+            for job in submitted:
+                job.future.result()
+            wall = time.perf_counter() - start
+        memory = [_statm_mb(child.pid) for child in multiprocessing.active_children()]
+        memory = [m for m in memory if m[0] is not None]
+    finally:
+        for job in warm:
+            if os.path.exists(job.output_path):
+                os.remove(job.output_path)
+        queue.shutdown()
+    return {
+        "workers": workers,
+        "jobs": jobs,
+        "wall_seconds": round(wall, 2),
+        "jobs_per_minute": round(jobs / wall * 60, 2),
+        "process_rss_mb": [rss for rss, _ in memory],
+        "process_shared_mb": [shared for _, shared in memory],
+    }
+
+
+def run(input_path: str, max_workers: int, jobs_per_worker: int, option: str, model_path: str,
+        vosk_model_path: str, badwords_path: str) -> dict:
+    counts, workers = [], 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+
+    results = [run_once(input_path, n, n * jobs_per_worker, option, model_path, vosk_model_path, badwords_path)
+               for n in counts]
+    base = results[0]["jobs_per_minute"]
+    for result in results:
+        result["speedup"] = round(result["jobs_per_minute"] / base, 2)
+        result["efficiency"] = round(result["speedup"] / result["workers"], 2)
+    return {"input": input_path, "option": option, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--jobs-per-worker", type=int, default=4)
+    parser.add_argument("--option", default="blur", choices=["blur", "beep_video", "beep_audio"])
+    parser.add_argument("--threads-per-worker", type=int)
+    parser.add_argument("--affinity", default="", help='"auto" or per-worker sets like "0-3;4-7"')
+    parser.add_argument("--preload", action="store_true", help="Fork workers from a preloaded fork server")
+    args = parser.parse_args()
+
+    # Settings are read by StreamShield.config, so export them before importing it
+    os.environ["STREAMSHIELD_CACHE_ENABLED"] = "0"
+    os.environ["STREAMSHIELD_WORKER_CPU_AFFINITY"] = args.affinity
+    if args.threads_per_worker:
+        os.environ["STREAMSHIELD_WORKER_THREADS"] = str(args.threads_per_worker)
+    if args.preload:
+        os.environ["STREAMSHIELD_WORKER_START_METHOD"] = "forkserver"
+
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    model_dir = os.path.join(server_dir, "StreamShield")
+    result = run(args.input, args.max_workers, args.jobs_per_worker, args.option,
+                 os.path.join(model_dir, "best.pt"), os.path.join(model_dir, "vosk-model-small-en-in-0.4"),
+                 os.path.join(model_dir, "static", "badwords.txt"))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Run many MediaProcessor jobs on the same input at once and check they don't interfere.
+
+Every job must succeed, produce its own output, and leave no scratch
+directories behind. Run from the server directory:
+
+    python -m benchmarks.stress_concurrency sample.mp4 --jobs 32 --concurrency 8
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from StreamShield import MediaProcessor, config
+from StreamShield.workspace import Workspace
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODEL = os.path.join(SERVER_DIR, "StreamShield", "best.pt")
+DEFAULT_BADWORDS = os.path.join(SERVER_DIR, "StreamShield", "static", "badwords.txt")
+
+
+def _digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def run(input_path: str, jobs: int, concurrency: int, option: str, model_path: str, badwords_path: str) -> dict:
+    scratch_before = set(glob.glob(os.path.join(config.SCRATCH_DIR, "media-*")))
+    name = os.path.basename(input_path)
+
+    with Workspace(prefix="stress-") as outputs:
+        def job(index: int):
+            output_path = outputs.file(f"output_{index}_{name}")
+            start = time.perf_counter()
+            MediaProcessor(model_path, badwords_path).process_media(input_path, output_path, option)
+            return time.perf_counter() - start, _digest(output_path)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(job, range(jobs)))
+        wall = time.perf_counter() - start
+
+    leaked = set(glob.glob(os.path.join(config.SCRATCH_DIR, "media-*"))) - scratch_before
+    durations = sorted(seconds for seconds, _ in results)
+    digests = {digest for _, digest in results}
+    return {
+        "input": input_path,
+        "option": option,
+        "jobs": jobs,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 2),
+        "jobs_per_minute": round(jobs / wall * 60, 2),
+        "p50_seconds": round(durations[len(durations) // 2], 2),
+        "max_seconds": round(durations[-1], 2),
+        # Every job processed the same input, so differing outputs point at shared state
+        "distinct_outputs": len(digests),
+        "leaked_scratch_dirs": sorted(leaked),
+        "ok": not leaked and len(digests) == 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input")
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--option", default="beep_audio", choices=["blur", "beep_video", "beep_audio"])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--badwords", default=DEFAULT_BADWORDS)
+    args = parser.parse_args()
+    result = run(args.input, args.jobs, args.concurrency, args.option, args.model, args.badwords)
+    print(json.dumps(result, indent=2))
+    raise SystemExit(0 if result["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
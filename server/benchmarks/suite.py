@@ -0,0 +1,203 @@
+"""Reproducible CPU-only benchmark of every media pipeline stage on synthetic fixtures.
+
+Generates (or reuses) the fixtures from benchmarks.fixtures, then times
+VideoBlurProcessor.process_frame, process_video, extract_audio,
+transcribe_audio, censor_audio, merge_audio_video and the end-to-end
+MediaProcessor.process_media for each processOption. The result cache is
+disabled, CUDA is hidden and nothing is downloaded. Writes JSON with the
+environment, fixture checksums and median/min timings. With --baseline, each
+timing is also compared with a previous result file. Run from the server
+directory:
+
+    python -m benchmarks.suite --preset standard --output bench.json --baseline previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import fixtures
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(SERVER_DIR, "StreamShield")
+
+# Frames held in memory for the process_frame stage
+FRAME_SAMPLE = 120
+
+PRESETS = {
+    "quick": {"seconds": 4, "size": (640, 360), "fps": 30, "audio_seconds": 15, "repeat": 1},
+    "standard": {"seconds": 20, "size": (1280, 720), "fps": 30, "audio_seconds": 60, "repeat": 3},
+}
+
+
+def _timed(fn, repeat: int):
+    """Median and min wall time of ``repeat`` calls, and the last call's result."""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return {"median_seconds": round(statistics.median(times), 4), "min_seconds": round(min(times), 4),
+            "runs": repeat}, result
+
+
+def environment() -> dict:
+    versions = {}
+    for module in ("numpy", "cv2", "torch", "ultralytics", "vosk", "pydub"):
+        try:
+            versions[module] = getattr(__import__(module), "__version__", "unknown")
+        except ImportError:
+            versions[module] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=SERVER_DIR, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+        "settings": {name: value for name, value in sorted(os.environ.items()) if name.startswith("STREAMSHIELD_")},
+    }
+
+
+def _read_frames(video_path: str, limit: int):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while cap.isOpened() and len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(fixture_dir: str, preset: dict, seed: int) -> dict:
+    from pydub import AudioSegment
+
+    from StreamShield.audio_processor import censor_audio, extract_audio, transcribe_audio
+    from StreamShield.media_processor import MediaProcessor
+    from StreamShield.merge import merge_audio_video
+    from StreamShield.model_registry import model_registry
+    from StreamShield.video_processor import VideoBlurProcessor, process_video
+    from StreamShield.workspace import Workspace
+
+    model_path = os.path.join(MODEL_DIR, "best.pt")
+    vosk_path = os.path.join(MODEL_DIR, "vosk-model-small-en-in-0.4")
+    repeat = preset["repeat"]
+
+    start = time.perf_counter()
+    manifest = fixtures.generate(fixture_dir, preset["seconds"], preset["size"], preset["fps"],
+                                 preset["audio_seconds"], seed=seed)
+    result = {
+        "fixtures": {"params": manifest["params"], "sha256": manifest["sha256"],
+                     "seconds": round(time.perf_counter() - start, 2)},
+        "stages": {},
+    }
+    stages = result["stages"]
+    video, speech = manifest["files"]["screen_video"], manifest["files"]["speech_wav"]
+    frame_count = manifest["video_frames"]
+
+    # Model loading is reported separately and kept out of the stage timings
+    result["models"] = model_registry.warmup(model_path, vosk_path)
+
+    with Workspace(prefix="bench-") as workspace:
+        detector = VideoBlurProcessor(model_path)
+        frames = _read_frames(video, min(frame_count, FRAME_SAMPLE))
+        timing, _ = _timed(lambda: [detector.process_frame(frame.copy()) for frame in frames], repeat)
+        stages["process_frame"] = {**timing, "frames": len(frames),
+                                   "fps": round(len(frames) / timing["median_seconds"], 2)}
+
+        blurred = workspace.file("blurred.mp4")
+        timing, _ = _timed(lambda: process_video(video, blurred, VideoBlurProcessor(model_path)), repeat)
+        stages["process_video"] = {**timing, "frames": frame_count,
+                                   "fps": round(frame_count / timing["median_seconds"], 2)}
+
+        timing, wav16k = _timed(lambda: extract_audio(speech, workspace), repeat)
+        stages["extract_audio"] = {**timing, "audio_seconds": preset["audio_seconds"]}
+
+        timing, transcript = _timed(lambda: transcribe_audio(wav16k, vosk_path), repeat)
+        stages["transcribe_audio"] = {**timing, "audio_seconds": preset["audio_seconds"], "words": len(transcript),
+                                      "realtime_factor": round(timing["median_seconds"] / preset["audio_seconds"], 4)}
+
+        audio = AudioSegment.from_wav(speech)
+        timing, (censored, hits) = _timed(lambda: censor_audio(audio, manifest["words"], manifest["bad_words"]),
+                                          repeat)
+        stages["censor_audio"] = {**timing, "audio_seconds": preset["audio_seconds"], "censored_words": len(hits)}
+
+        censored_wav = workspace.file("censored.wav")
+        censored.export(censored_wav, format="wav")
+        merged = workspace.file("merged.mp4")
+        timing, _ = _timed(lambda: merge_audio_video(blurred, censored_wav, merged), repeat)
+        stages["merge_audio_video"] = timing
+
+        # Censor whatever Vosk recognises in the synthetic speech, so the beep
+        # options exercise the censoring path instead of finding nothing to do
+        bad_words = sorted({word["word"] for word in transcript}) or manifest["bad_words"]
+        processor = MediaProcessor(model_path, os.path.join(MODEL_DIR, "static", "badwords.txt"), bad_words=bad_words)
+        end_to_end = [("blur", video), ("beep_video", video), ("beep_audio", video), ("beep_audio", speech)]
+        for option, source in end_to_end:
+            output = workspace.file(f"e2e_{option}{os.path.splitext(source)[1]}")
+            timing, _ = _timed(lambda: processor.process_media(source, output, option), repeat)
+            kind = "video" if source == video else "audio"
+            stages[f"process_media[{option},{kind}]"] = {**timing, "stats": processor.stats}
+    return result
+
+
+def compare(result: dict, baseline: dict) -> None:
+    """Annotate each stage with its median time relative to the baseline run."""
+    for name, stage in result["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if previous and previous.get("median_seconds"):
+            stage["vs_baseline"] = round(stage["median_seconds"] / previous["median_seconds"], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="standard")
+    parser.add_argument("--repeat", type=int, help="Runs per stage (default from the preset)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", help="Directory to generate or reuse fixtures in (default: temporary)")
+    parser.add_argument("--output", help="Write the JSON here as well as to stdout")
+    parser.add_argument("--baseline", help="Earlier result file to compare median timings against")
+    args = parser.parse_args()
+
+    # CPU only, no cache hits, no downloads; set before StreamShield reads its config
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    os.environ["YOLO_OFFLINE"] = "1"
+    os.environ["STREAMSHIELD_CACHE_ENABLED"] = "0"
+
+    preset = dict(PRESETS[args.preset])
+    if args.repeat:
+        preset["repeat"] = args.repeat
+    fixture_dir = args.fixtures or tempfile.mkdtemp(prefix="streamshield-fixtures-")
+    try:
+        result = {"preset": args.preset, "seed": args.seed, "environment": environment(),
+                  **run(fixture_dir, preset, args.seed)}
+    finally:
+        if not args.fixtures:
+            shutil.rmtree(fixture_dir, ignore_errors=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(result, json.load(f))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -8,37 +9,83 @@ import sys
 # Add the server directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from StreamShield.api import app as streamshield_app
+from worker_settings import add_worker_arguments, apply_worker_settings
 
-app = FastAPI()
 
-# Configure CORS to allow all origins
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins
-    allow_credentials=True,
-    allow_methods=["*"],  # Allow all methods
-    allow_headers=["*"],  # Allow all headers
-    expose_headers=["*"],  # Allow client to read all custom headers
-    max_age=3600,  # Cache preflight requests for 1 hour
-)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the StreamShield server")
+    parser.add_argument("--production", action="store_true",
+                        help="Disable auto-reload and run media jobs in a pool of pinned worker processes")
+    add_worker_arguments(parser)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=3000)
+    return parser.parse_args(argv)
 
-# Mount the StreamShield API
-app.mount("/api", streamshield_app)
 
-# Only serve static files if the dist directory exists (production mode)
-client_dist = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Client", "dist")
-if os.path.exists(client_dist):
-    app.mount("/", StaticFiles(directory=client_dist, html=True), name="static")
+def create_app() -> FastAPI:
+    """Build the server app; StreamShield is imported here so it sees the exported worker settings."""
+    from StreamShield.api import app as streamshield_app
 
-if __name__ == "__main__":
-    # Configure Uvicorn with increased limits
-    uvicorn.run(
-        "main:app", 
-        host="0.0.0.0", 
-        port=3000, 
-        reload=True,
-        timeout_keep_alive=300,  # Increase keep-alive timeout
-        limit_concurrency=1000,  # Increase concurrent connections limit
-        limit_max_requests=1000  # Increase max requests
+    app = FastAPI()
+
+    # Configure CORS to allow all origins
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allow all origins
+        allow_credentials=True,
+        allow_methods=["*"],  # Allow all methods
+        allow_headers=["*"],  # Allow all headers
+        expose_headers=["*"],  # Allow client to read all custom headers
+        max_age=3600,  # Cache preflight requests for 1 hour
     )
+
+    # Mount the StreamShield API
+    app.mount("/api", streamshield_app)
+
+    # Only serve static files if the dist directory exists (production mode)
+    client_dist = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Client", "dist")
+    if os.path.exists(client_dist):
+        app.mount("/", StaticFiles(directory=client_dist, html=True), name="static")
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # "main:app" keeps working for external ASGI servers, built on first access
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    apply_worker_settings(args)
+    if args.production:
+        # One asyncio HTTP process is enough for I/O; CPU-bound YOLO/Vosk work
+        # runs in the job worker processes, one per core group, outside the GIL.
+        # Job and upload state lives in this process, so it is not replicated.
+        uvicorn.run(
+            "main:create_app",
+            factory=True,
+            host=args.host,
+            port=args.port,
+            timeout_keep_alive=300,
+            limit_concurrency=1000,
+        )
+    else:
+        # Configure Uvicorn with increased limits
+        uvicorn.run(
+            "main:create_app",
+            factory=True,
+            host=args.host,
+            port=args.port,
+            reload=True,
+            timeout_keep_alive=300,  # Increase keep-alive timeout
+            limit_concurrency=1000,  # Increase concurrent connections limit
+            limit_max_requests=1000  # Increase max requests
+        )
@@ -0,0 +1,6 @@
+# Run from the server directory: python -m pytest tests
+import os
+import sys
+
+# Tests import the StreamShield package the same way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
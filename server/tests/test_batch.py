@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+pytest.importorskip("vosk")
+
+from StreamShield.batch import BatchItem, BatchJournal, collect, schedule, split_done, summarize
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_collect_mirrors_directories_and_skips_outputs(tmp_path):
+    source = tmp_path / "in"
+    output = source / "out"
+    write(str(source / "a.mp4"), 10)
+    write(str(source / "sub" / "b.wav"), 30)
+    write(str(source / "notes.txt"), 5)
+    write(str(source / ".hidden.mp3"), 5)
+    write(str(output / "done.mp4"), 5)
+    items = collect([str(source)], str(output))
+    assert [(item.input_path, item.output_path, item.size) for item in items] == [
+        (str(source / "a.mp4"), str(output / "a.mp4"), 10),
+        (str(source / "sub" / "b.wav"), str(output / "sub" / "b.wav"), 30),
+    ]
+
+
+def test_schedule_orders_by_size():
+    items = [BatchItem("a", "a.out", 5), BatchItem("b", "b.out", 50), BatchItem("c", "c.out", 20)]
+    assert [item.input_path for item in schedule(items)] == ["b", "c", "a"]
+    assert [item.input_path for item in schedule(items, 'smallest')] == ["a", "c", "b"]
+    assert schedule(items, 'manifest') == items
+
+
+def test_journal_survives_a_truncated_line(tmp_path):
+    journal = BatchJournal(str(tmp_path / "journal.jsonl"))
+    journal.record({"input": "a", "status": "done"})
+    with open(journal.path, "a") as f:
+        f.write('{"input": "b", "sta')
+    journal.record({"input": "c", "status": "failed"})
+    assert [entry["input"] for entry in journal.entries()] == ["a", "c"]
+    assert list(journal.completed()) == ["a"]
+    with open(journal.path) as f:
+        lines = f.read().splitlines()
+    assert json.loads(lines[-1])["input"] == "c"
+
+
+def test_split_done_needs_the_same_option_and_an_existing_output(tmp_path):
+    journal = BatchJournal(str(tmp_path / "journal.jsonl"))
+    items = [BatchItem("a", str(tmp_path / "a.out")), BatchItem("b", str(tmp_path / "b.out"))]
+    write(items[0].output_path, 1)
+    for item in items:
+        journal.record({"input": item.input_path, "status": "done", "option": "blur"})
+    done, pending = split_done(items, "blur", journal)
+    assert [entry["input"] for entry in done] == ["a"] and done[0]["resumed"]
+    assert [item.input_path for item in pending] == ["b"]
+    done, pending = split_done(items, "beep_audio", journal)
+    assert done == [] and len(pending) == 2
+
+
+def test_split_done_needs_the_same_settings(tmp_path):
+    journal = BatchJournal(str(tmp_path / "journal.jsonl"))
+    items = [BatchItem("a", str(tmp_path / "a.out")), BatchItem("b", str(tmp_path / "b.out"))]
+    for item in items:
+        write(item.output_path, 1)
+    journal.record({"input": "a", "status": "done", "option": "blur", "settings": "s1"})
+    journal.record({"input": "b", "status": "done", "option": "blur"})
+    done, pending = split_done(items, "blur", journal, "s1")
+    assert [entry["input"] for entry in done] == ["a"]
+    assert [item.input_path for item in pending] == ["b"]
+    done, pending = split_done(items, "blur", journal, "s2")
+    assert done == [] and len(pending) == 2
+
+
+def test_summarize_aggregates_counts_and_rates():
+    timings = {"stages": {"video": {"seconds": 2.0, "calls": 1}, "transcribe": {"seconds": 1.0, "calls": 1}},
+               "counters": {"frames": 50, "audio_seconds": 10, "bytes_written": 7}}
+    entries = [
+        {"input": "a", "status": "done", "size": 10, "seconds": 1, "resumed": True, "stats": {"timings": timings}},
+        {"input": "b", "status": "failed", "size": 30, "seconds": 1, "error": "x"},
+        {"input": "c", "status": "done", "size": 2000000, "seconds": 3, "stats": {"cached": True}},
+    ]
+    summary = summarize(entries, 2.0, resumed=1, pending=4)
+    assert (summary["files"], summary["completed"], summary["failed"], summary["pending"]) == (7, 2, 1, 4)
+    assert summary["cached"] == 1
+    assert summary["files_per_second"] == 0.5
+    assert summary["input_mb_per_second"] == 1.0
+    assert summary["frames_per_second"] == 25.0
+    assert summary["audio_realtime_factor"] == 0.1
@@ -0,0 +1,57 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("ultralytics")
+pytest.importorskip("vosk")
+
+from StreamShield.audio_processor import word_intervals
+from StreamShield.audio_processor.censor import beep_waveform, censor_samples, merge_intervals
+
+RATE = 8000
+
+
+def test_word_intervals_convert_seconds_to_frames():
+    words = [{"word": "a", "start": 0.5, "end": 0.75}, {"word": "b", "start": 1.0, "end": 1.25}]
+    assert word_intervals(words, RATE) == [(4000, 6000), (8000, 10000)]
+
+
+def test_merge_intervals_sorts_merges_and_drops_empty():
+    assert merge_intervals([(50, 60), (0, 10), (5, 20), (30, 30)]) == [(0, 20), (50, 60)]
+    assert merge_intervals([(0, 10), (12, 20)], gap=2) == [(0, 20)]
+    assert merge_intervals([(0, 10), (13, 20)], gap=2) == [(0, 10), (13, 20)]
+
+
+def test_beep_replaces_only_the_interval_on_every_channel():
+    samples = np.full((RATE, 2), 1000, dtype=np.int16)
+    censor_samples(samples, RATE, [(100, 300)])
+    expected = (beep_waveform(RATE)[:200] * np.iinfo(np.int16).max).astype(np.int16)
+    assert np.array_equal(samples[100:300, 0], expected)
+    assert np.array_equal(samples[100:300, 1], expected)
+    assert (samples[:100] == 1000).all() and (samples[300:] == 1000).all()
+
+
+def test_beep_tiles_across_intervals_longer_than_a_second():
+    samples = np.zeros(3 * RATE, dtype=np.int16)
+    censor_samples(samples, RATE, [(0, 3 * RATE)])
+    assert np.array_equal(samples[:RATE], samples[RATE:2 * RATE])
+
+
+def test_mute_duck_and_clamping():
+    samples = np.full(1000, 10000, dtype=np.int16)
+    censor_samples(samples, RATE, [(-50, 100), (900, 5000)], mode='mute')
+    assert (samples[:100] == 0).all() and (samples[900:] == 0).all() and (samples[100:900] == 10000).all()
+
+    ducked = np.full(1000, 10000, dtype=np.int16)
+    censor_samples(ducked, RATE, [(0, 1000)], mode='duck')
+    assert 500 < ducked[0] < 700
+
+
+def test_fade_starts_from_the_original_audio():
+    samples = np.full(1000, 10000, dtype=np.int16)
+    censor_samples(samples, RATE, [(0, 1000)], mode='mute', fade_samples=100)
+    assert samples[0] == 10000 and samples[500] == 0 and samples[999] > 9000
+
+
+def test_unknown_mode_raises():
+    with pytest.raises(ValueError):
+        censor_samples(np.zeros(100, dtype=np.int16), RATE, [(0, 10)], mode='bleep')
@@ -0,0 +1,36 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+pytest.importorskip("vosk")
+
+from StreamShield.video_processor.gating import tile_hashes
+
+
+def frame(height=128, width=192, seed=0):
+    rng = np.random.default_rng(seed)
+    return cv2.resize(rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8), (width, height))
+
+
+def test_one_hash_per_tile():
+    assert tile_hashes(frame(), 64).shape == (2, 3, 64)
+    assert tile_hashes(frame(100, 100), 64).shape == (2, 2, 64)
+
+
+def test_identical_frames_have_identical_hashes():
+    assert np.array_equal(tile_hashes(frame(), 64), tile_hashes(frame().copy(), 64))
+
+
+def test_a_change_only_affects_its_tile():
+    changed = frame()
+    changed[70:120, 140:185] = 255 - changed[70:120, 140:185]
+    differing = np.count_nonzero(tile_hashes(frame(), 64) != tile_hashes(changed, 64), axis=2)
+    assert differing[1, 2] > 0
+    assert differing.sum() == differing[1, 2]
+
+
+def test_flat_noise_does_not_flip_bits():
+    flat = np.full((128, 128, 3), 120, np.uint8)
+    noisy = flat + np.random.default_rng(1).integers(0, 2, flat.shape, dtype=np.uint8)
+    assert np.array_equal(tile_hashes(flat, 64), tile_hashes(noisy, 64))
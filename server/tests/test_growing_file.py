@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+from StreamShield import config, growing_file
+from StreamShield.growing_file import Feeder, UploadStalledError, mark_complete, mark_partial
+
+CAT = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(sys.stdin.buffer.read())"]
+
+
+class FakeConsumer:
+    killed = False
+
+    def kill(self):
+        self.killed = True
+
+
+@pytest.fixture
+def partial_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_STALL_TIMEOUT", 0.3)
+    path = tmp_path / "input.wav"
+    path.write_bytes(b"abcdef" + bytes(10))
+    mark_partial(str(path), 6)
+    return str(path)
+
+
+def test_complete_file_is_fed_whole(tmp_path):
+    path = tmp_path / "input.wav"
+    path.write_bytes(b"abcdef")
+    result = growing_file.run(CAT, str(path), True, capture_output=True)
+    assert result.stdout == b"abcdef"
+
+
+def test_stall_kills_the_consumer_and_records_the_error(partial_file):
+    read_fd, write_fd = os.pipe()
+    consumer = FakeConsumer()
+    feeder = Feeder(partial_file, os.fdopen(write_fd, "wb"), consumer)
+    with os.fdopen(read_fd, "rb") as pipe:
+        assert pipe.read() == b"abcdef"
+    feeder.thread.join()
+    assert consumer.killed
+    with pytest.raises(UploadStalledError):
+        feeder.check()
+
+
+def test_consumer_attached_after_a_stall_is_killed(partial_file):
+    read_fd, feeder = growing_file.pipe_input(partial_file)
+    feeder.thread.join()
+    os.close(read_fd)
+    consumer = FakeConsumer()
+    feeder.attach(consumer)
+    assert consumer.killed
+
+
+def test_run_raises_when_the_upload_stalls(partial_file):
+    with pytest.raises(UploadStalledError):
+        growing_file.run(CAT, partial_file, True, capture_output=True)
+
+
+def test_feeder_finishes_once_the_upload_completes(partial_file):
+    read_fd, write_fd = os.pipe()
+    feeder = Feeder(partial_file, os.fdopen(write_fd, "wb"))
+    with os.fdopen(read_fd, "rb") as pipe:
+        assert pipe.read(6) == b"abcdef"
+        mark_complete(partial_file)
+        assert pipe.read() == bytes(10)
+    feeder.thread.join()
+    feeder.check()
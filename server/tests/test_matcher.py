@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from StreamShield.audio_processor.matcher import BadWordMatcher, compile_matcher, token_variants, tokenize
+
+BADWORDS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "StreamShield", "static", "badwords.txt")
+
+with open(BADWORDS_PATH) as f:
+    BADWORDS = [line.strip().lower() for line in f if line.strip()]
+
+
+def transcript(text, conf=1.0):
+    return [{"word": word, "start": index * 0.5, "end": index * 0.5 + 0.4, "conf": conf}
+            for index, word in enumerate(text.split())]
+
+
+def flagged(matcher, text):
+    return [match["word"] for match in matcher.match_words(transcript(text))]
+
+
+@pytest.fixture(scope="module")
+def default_list():
+    return compile_matcher(BADWORDS)
+
+
+def test_list_entries_are_only_lowercased_and_stripped_of_punctuation():
+    assert tokenize("2 Girls 1 Cup") == ["2", "girls", "1", "cup"]
+    assert tokenize("rosy palm and her 5 sisters") == ["rosy", "palm", "and", "her", "5", "sisters"]
+    assert tokenize("2g1c") == ["2g1c"]
+    assert tokenize("Cocks!") == ["cocks"]
+
+
+@pytest.mark.parametrize("entry", BADWORDS)
+def test_every_list_entry_matches_itself(default_list, entry):
+    assert entry in flagged(default_list, entry)
+
+
+def test_plural_entries_do_not_flag_unlisted_singulars(default_list):
+    listed = set(BADWORDS)
+    singles = [entry for entry in BADWORDS if " " not in entry and entry.endswith("s") and entry[:-1] not in listed]
+    assert singles
+    for entry in singles:
+        assert flagged(default_list, entry[:-1]) == [], entry
+
+
+def test_transcript_words_are_expanded():
+    matcher = BadWordMatcher(["bitch", "shit", "bastard"])
+    assert flagged(matcher, "bitches") == ["bitches"]
+    assert flagged(matcher, "b1tch") == ["b1tch"]
+    assert flagged(matcher, "$hit") == ["$hit"]
+    assert flagged(matcher, "bastard's") == ["bastard's"]
+    assert flagged(matcher, "Bastard,") == ["Bastard,"]
+
+
+def test_leet_symbols_are_not_dropped():
+    assert "hit" not in token_variants("$hit")
+    assert flagged(BadWordMatcher(["hit"]), "$hit") == []
+
+
+def test_spelled_out_numbers_match_digit_entries(default_list):
+    assert "two girls one cup" in flagged(default_list, "watch two girls one cup")
+    assert "rosy palm and her five sisters" in flagged(default_list, "rosy palm and her five sisters")
+
+
+def test_phrases_and_overlapping_matches():
+    matcher = BadWordMatcher(["alabama hot pocket", "hot", "hot pocket"])
+    assert flagged(matcher, "an alabama hot pocket") == ["alabama hot pocket", "hot", "hot pocket"]
+    assert flagged(matcher, "alabama hot dog") == ["hot"]
+
+
+def test_interrupted_phrase_restarts():
+    matcher = BadWordMatcher(["ball gag"])
+    assert flagged(matcher, "ball ball gag") == ["ball gag"]
+    assert flagged(matcher, "ball red gag") == []
+
+
+def test_match_timings_span_the_phrase():
+    match = BadWordMatcher(["blow job"]).match_words(transcript("a blow job here"))[0]
+    assert (match["start"], match["end"]) == (0.5, 1.4)
+
+
+def test_min_confidence_filters_matches():
+    matcher = BadWordMatcher(["damn"], min_conf=0.8)
+    assert matcher.match_words(transcript("damn", conf=0.5)) == []
+    assert len(matcher.match_words(transcript("damn", conf=0.9))) == 1
+
+
+def test_compile_matcher_is_cached_by_content():
+    first = compile_matcher(["Damn", "hell "])
+    assert compile_matcher(["hell", "damn"]) is first
+    assert first.content_hash
+    assert compile_matcher(["damn"]).content_hash != first.content_hash
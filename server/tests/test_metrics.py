@@ -0,0 +1,50 @@
+import threading
+
+from StreamShield.metrics import MetricsRegistry, Spans, count, span
+
+
+def test_render_counters_and_histograms():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs")
+    registry.histogram("job_seconds", "Job time", buckets=(1, 5))
+    registry.inc("jobs_total", status="completed")
+    registry.inc("jobs_total", 2, status="completed")
+    registry.observe("job_seconds", 0.5)
+    registry.observe("job_seconds", 3)
+    registry.observe("job_seconds", 30)
+    lines = registry.render().splitlines()
+    assert "# TYPE jobs_total counter" in lines
+    assert 'jobs_total{status="completed"} 3' in lines
+    assert 'job_seconds_bucket{le="1"} 1' in lines
+    assert 'job_seconds_bucket{le="5"} 2' in lines
+    assert 'job_seconds_bucket{le="+Inf"} 3' in lines
+    assert "job_seconds_sum 33.5" in lines
+    assert "job_seconds_count 3" in lines
+
+
+def test_unreadable_gauges_are_left_out():
+    registry = MetricsRegistry()
+    registry.gauge("ok", "Readable", lambda: 4)
+    registry.gauge("broken", "Unreadable", lambda: 1 / 0)
+    text = registry.render()
+    assert "ok 4" in text
+    assert "broken" not in text
+
+
+def test_spans_nest_and_record_self_time():
+    spans = Spans()
+    with spans.activate():
+        with span("video"):
+            with span("infer"):
+                count("frames", 2)
+    report = spans.report()
+    assert report["stages"]["video"]["calls"] == 1
+    assert report["counters"] == {"frames": 2}
+    name = threading.current_thread().name
+    paths = [line.rsplit(" ", 1)[0] for line in spans.collapsed().splitlines()]
+    assert paths == [f"{name};video", f"{name};video;infer"]
+
+
+def test_spans_are_free_without_a_collector():
+    with span("video"):
+        count("frames")
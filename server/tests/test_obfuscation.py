@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from StreamShield.video_processor.obfuscation import OBFUSCATORS, clamp_box, merge_boxes
+
+
+def covered(boxes, size=(60, 60)):
+    mask = np.zeros(size, dtype=bool)
+    for x1, y1, x2, y2 in boxes:
+        mask[y1:y2, x1:x2] = True
+    return mask
+
+
+def test_clamp_box():
+    assert clamp_box((-5, -5, 20, 30), 10, 25) == (0, 0, 10, 25)
+    assert clamp_box((12, 0, 20, 10), 10, 10) is None
+
+
+@pytest.mark.parametrize("boxes, expected", [
+    ([(0, 0, 10, 10), (0, 0, 10, 10)], [(0, 0, 10, 10)]),
+    ([(0, 0, 20, 20), (5, 5, 10, 10)], [(0, 0, 20, 20)]),
+    ([(0, 0, 10, 10), (0, 5, 10, 20)], [(0, 0, 10, 20)]),
+    ([(0, 0, 10, 10), (10, 0, 25, 10)], [(0, 0, 25, 10)]),
+    ([(0, 0, 10, 10), (30, 30, 40, 40)], [(0, 0, 10, 10), (30, 30, 40, 40)]),
+])
+def test_merge_boxes(boxes, expected):
+    assert merge_boxes(boxes) == expected
+
+
+def test_merge_never_covers_extra_pixels():
+    boxes = [(0, 0, 20, 20), (10, 10, 40, 40), (35, 0, 50, 15), (0, 0, 5, 5)]
+    merged = merge_boxes(boxes)
+    assert np.array_equal(covered(merged), covered(boxes))
+    assert (0, 0, 5, 5) not in merged
+
+
+@pytest.mark.parametrize("method", sorted(OBFUSCATORS))
+def test_obfuscators_write_in_place(method):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    original = frame.copy()
+    OBFUSCATORS[method](frame[16:48, 16:48], (15, 15), 5)
+    assert not np.array_equal(frame[16:48, 16:48], original[16:48, 16:48])
+    outside = np.ones((64, 64), dtype=bool)
+    outside[16:48, 16:48] = False
+    assert np.array_equal(frame[outside], original[outside])
@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from StreamShield.audio_processor.resample import StreamResampler
+
+
+def tone(rate, seconds, frequency=440.0, channels=1):
+    t = np.arange(int(rate * seconds)) / rate
+    mono = (np.sin(2 * np.pi * frequency * t) * 10000).astype(np.int16)
+    return np.repeat(mono[:, np.newaxis], channels, axis=1)
+
+
+def resample(resampler, samples, block):
+    data = b"".join(resampler.process(samples[i:i + block]) for i in range(0, len(samples), block))
+    return np.frombuffer(data + resampler.flush(), dtype=np.int16)
+
+
+@pytest.mark.parametrize("rate", [8000, 16000, 22050, 44100, 48000])
+def test_output_length_matches_the_rate_ratio(rate):
+    out = resample(StreamResampler(rate), tone(rate, 2.0), 4096)
+    assert abs(len(out) - 32000) <= 2
+
+
+def test_output_does_not_depend_on_block_size():
+    samples = tone(44100, 1.0, channels=2)
+    whole = resample(StreamResampler(44100), samples, len(samples))
+    for block in (1000, 4096, 7):
+        # Interpolation positions may round differently at block boundaries
+        split = resample(StreamResampler(44100), samples, block)
+        assert len(split) == len(whole)
+        assert np.abs(split.astype(np.int32) - whole).max() <= 1
+
+
+def test_tone_keeps_its_frequency_and_level():
+    out = resample(StreamResampler(48000), tone(48000, 1.0, 1000.0), 4800).astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(out[:16000]))
+    assert abs(np.argmax(spectrum) - 1000) <= 1
+    assert 9000 < np.abs(out[1000:15000]).max() < 10500
+
+
+def test_frequencies_above_the_output_nyquist_are_attenuated():
+    out = resample(StreamResampler(44100), tone(44100, 1.0, 12000.0), 4096).astype(np.float64)
+    assert np.abs(out[1000:15000]).max() < 1000
+
+
+def test_channels_are_averaged():
+    stereo = np.stack([np.full(16000, 1000), np.full(16000, 3000)], axis=1).astype(np.int16)
+    out = resample(StreamResampler(16000), stereo, 4000)
+    assert (out[10:-10] == 2000).all()
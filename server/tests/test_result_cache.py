@@ -0,0 +1,64 @@
+import json
+import os
+
+from StreamShield import result_cache as result_cache_module
+from StreamShield.result_cache import ResultCache, make_key
+
+
+def test_make_key_is_stable():
+    assert make_key("a", {"x": 1, "y": 2}) == make_key("a", {"y": 2, "x": 1})
+    assert make_key("a", 1) != make_key("a", 2)
+
+
+def test_json_round_trip_and_counters(tmp_path):
+    cache = ResultCache(str(tmp_path), 1024 ** 2)
+    assert cache.get_json("transcripts", "ab12") is None
+    cache.put_json("transcripts", "ab12", {"words": [1, 2]})
+    assert cache.get_json("transcripts", "ab12") == {"words": [1, 2]}
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["kinds"]["transcripts"] == {"hits": 1, "misses": 1, "stores": 1, "hit_ratio": 0.5}
+
+
+def test_counters_are_flushed_in_batches(tmp_path):
+    cache = ResultCache(str(tmp_path), 1024 ** 2)
+    stats_path = tmp_path / "stats" / f"{os.getpid()}.json"
+    cache.get_json("transcripts", "ab12")
+    assert json.loads(stats_path.read_text()) == {"transcripts.misses": 1}
+    cache.get_json("transcripts", "ab12")
+    assert json.loads(stats_path.read_text()) == {"transcripts.misses": 1}
+    cache.flush()
+    assert json.loads(stats_path.read_text()) == {"transcripts.misses": 2}
+
+
+def test_files_of_exited_processes_are_folded(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), 1024 ** 2)
+    stats_dir = tmp_path / "stats"
+    stats_dir.mkdir()
+    (stats_dir / "999999.json").write_text(json.dumps({"outputs.hits": 3}))
+    monkeypatch.setattr(result_cache_module, "_alive", lambda pid: False)
+    assert cache.stats()["kinds"]["outputs"]["hits"] == 3
+    assert not (stats_dir / "999999.json").exists()
+    assert cache.stats()["kinds"]["outputs"]["hits"] == 3
+
+
+def test_evicts_least_recently_used_once_over_the_limit(tmp_path):
+    cache = ResultCache(str(tmp_path), 3500)
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"x" * 1000)
+    for index, key in enumerate(["aa01", "bb02", "cc03"]):
+        cache.put_file("outputs", key, str(source))
+        os.utime(cache._path("outputs", key, ".bin"), (index, index))
+    cache.put_file("outputs", "dd04", str(source))
+    assert not os.path.exists(cache._path("outputs", "aa01", ".bin"))
+    assert cache.get_file("outputs", "dd04", str(tmp_path / "copy.bin"))
+
+
+def test_file_hash_memo_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache_module, "_HASH_MEMO_SIZE", 2)
+    cache = ResultCache(str(tmp_path / "cache"), 1024 ** 2)
+    for index in range(4):
+        path = tmp_path / f"{index}.bin"
+        path.write_bytes(bytes([index]))
+        cache.file_hash(str(path))
+    assert len(cache._hashes) == 2
@@ -0,0 +1,59 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+pytest.importorskip("vosk")
+
+from StreamShield.video_processor.tracker import TemporalBlurProcessor, box_iou
+
+
+class FakeDetector:
+    """Finds one box over the bright square of each frame and counts model calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def detect_batch(self, frames):
+        self.calls.append(len(frames))
+        boxes = []
+        for frame in frames:
+            ys, xs = np.nonzero(frame[..., 0] > 128)
+            boxes.append([(int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)] if len(xs) else [])
+        return boxes
+
+    def apply_boxes(self, frame, boxes):
+        pass
+
+
+def frames(count=12, size=(120, 160)):
+    result = []
+    for i in range(count):
+        frame = np.zeros(size + (3,), dtype=np.uint8)
+        frame[40:70, 20 + 2 * i:50 + 2 * i] = 255
+        result.append(frame)
+    return result
+
+
+def test_box_iou():
+    assert box_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert box_iou((0, 0, 10, 10), (20, 20, 30, 30)) == 0.0
+    assert box_iou((0, 0, 10, 10), (5, 0, 15, 10)) == pytest.approx(1 / 3)
+
+
+def test_batch_detects_keyframes_in_one_call():
+    detector = FakeDetector()
+    tracker = TemporalBlurProcessor(detector, keyframe_interval=4, diff_threshold=1.0)
+    tracker.detect_batch(frames(8))
+    assert detector.calls == [2]
+    assert tracker.detections == 2 and tracker.frames == 8
+
+
+def test_batch_matches_frame_by_frame():
+    batched, single = FakeDetector(), FakeDetector()
+    batch_tracker = TemporalBlurProcessor(batched, keyframe_interval=3, diff_threshold=1.0)
+    frame_tracker = TemporalBlurProcessor(single, keyframe_interval=3, diff_threshold=1.0)
+    video = frames()
+    boxes = batch_tracker.detect_batch(video[:6]) + batch_tracker.detect_batch(video[6:])
+    assert boxes == [frame_tracker.update(frame) for frame in video]
+    assert sum(batched.calls) == sum(single.calls) == 4
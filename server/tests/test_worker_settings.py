@@ -0,0 +1,23 @@
+import argparse
+import os
+
+from worker_settings import add_worker_arguments, apply_worker_settings
+
+SETTINGS = ("STREAMSHIELD_JOB_WORKERS", "STREAMSHIELD_WORKER_THREADS",
+            "STREAMSHIELD_WORKER_CPU_AFFINITY", "STREAMSHIELD_WORKER_START_METHOD")
+
+
+def parse(argv):
+    parser = argparse.ArgumentParser()
+    add_worker_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def test_only_given_options_are_exported(monkeypatch):
+    for name in SETTINGS:
+        monkeypatch.delenv(name, raising=False)
+    apply_worker_settings(parse(["--workers", "3", "--preload"]))
+    assert os.environ["STREAMSHIELD_JOB_WORKERS"] == "3"
+    assert os.environ["STREAMSHIELD_WORKER_START_METHOD"] == "forkserver"
+    assert "STREAMSHIELD_WORKER_THREADS" not in os.environ
+    assert "STREAMSHIELD_WORKER_CPU_AFFINITY" not in os.environ
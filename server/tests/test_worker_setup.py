@@ -0,0 +1,24 @@
+from StreamShield import worker_setup
+from StreamShield.worker_setup import cpu_sets
+
+
+def test_unpinned_without_a_spec():
+    assert cpu_sets(3, "") == [None, None, None]
+
+
+def test_explicit_sets_are_parsed_and_repeated():
+    assert cpu_sets(3, "0-1;4,6") == [{0, 1}, {4, 6}, {0, 1}]
+
+
+def test_auto_splits_the_allowed_cores_into_contiguous_blocks(monkeypatch):
+    monkeypatch.setattr(worker_setup, "available_cpus", lambda: list(range(8)))
+    assert cpu_sets(2, "auto") == [{0, 1, 2, 3}, {4, 5, 6, 7}]
+    assert cpu_sets(3, "auto") == [{0, 1}, {2, 3}, {4, 5}]
+
+
+def test_cpu_share_is_the_worker_thread_share(monkeypatch):
+    monkeypatch.setattr(worker_setup, "available_cpus", lambda: list(range(8)))
+    monkeypatch.setattr(worker_setup, "_cpu_share", None)
+    assert worker_setup.cpu_share() == 8
+    monkeypatch.setattr(worker_setup, "_cpu_share", 2)
+    assert worker_setup.cpu_share() == 2
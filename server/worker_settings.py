@@ -0,0 +1,29 @@
+"""Command-line options for the job worker pool, shared by main.py and batch_cli.py.
+
+StreamShield.config reads its settings from the environment when the package
+is first imported, so apply_worker_settings() must run before any StreamShield
+import. The environment is inherited by uvicorn's reloader and by the worker
+processes.
+"""
+import os
+
+
+def add_worker_arguments(parser) -> None:
+    parser.add_argument("--workers", type=int, help="Worker processes (default: half the cores)")
+    parser.add_argument("--threads-per-worker", type=int, help="torch/OpenCV threads per worker (default: cores / workers)")
+    parser.add_argument("--cpu-affinity", help='Pin workers to cores: "auto" or per-worker sets like "0-3;4-7"')
+    parser.add_argument("--preload", action="store_true",
+                        help="Load models once and fork workers from them so the weights are shared copy-on-write")
+
+
+def apply_worker_settings(args) -> None:
+    """Export the worker options as STREAMSHIELD_* environment variables."""
+    settings = {
+        "STREAMSHIELD_JOB_WORKERS": args.workers,
+        "STREAMSHIELD_WORKER_THREADS": args.threads_per_worker,
+        "STREAMSHIELD_WORKER_CPU_AFFINITY": args.cpu_affinity,
+        "STREAMSHIELD_WORKER_START_METHOD": "forkserver" if args.preload else None,
+    }
+    for name, value in settings.items():
+        if value is not None:
+            os.environ[name] = str(value)